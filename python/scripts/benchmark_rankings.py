@@ -0,0 +1,101 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.rankings import Ranking, select_rankings
+
+# Benchmark of the report rankings on a synthetic product catalog of growing size:
+#   sort_values : one full sort per ranking, then .head(n)
+#   nlargest    : one DataFrame.nlargest / nsmallest call per ranking
+#   rankings    : select_rankings() (src/rankings.py), all rankings in one call
+# All three must return the same rows in the same order; the script checks it at every size.
+#
+# Run from the python/ directory:  python -m scripts.benchmark_rankings --sizes 30000,1000000,5000000
+
+# The rankings of the product report, plus the review rankings of the seller report
+PRODUCT_RANKINGS = {
+    "top_by_items": Ranking('total_items_sold', 10),
+    "top_by_revenue": Ranking('total_revenue', 10),
+    "bottom_by_items": Ranking('total_items_sold', 10, largest=False),
+    "top_by_review": Ranking('avg_review_score', 10),
+    "bottom_by_review": Ranking('avg_review_score', 10, largest=False),
+}
+
+def synthetic_catalog(n_products, seed=0):
+    """A BI_product_performance-like frame: skewed sales with many ties, some products without reviews."""
+    rng = np.random.default_rng(seed)
+    items = rng.geometric(0.3, n_products)
+    price = rng.lognormal(4.0, 1.0, n_products).round(2)
+    reviews = rng.integers(10, 51, n_products) / 10
+    reviews[rng.random(n_products) < 0.02] = np.nan
+    return pd.DataFrame({
+        "product_id": np.char.add("p", np.arange(n_products).astype(str)),
+        "product_category_name": pd.Categorical.from_codes(rng.integers(0, 70, n_products),
+                                                           [f"category_{i}" for i in range(70)]),
+        "total_orders": np.maximum(items - rng.integers(0, 2, n_products), 1),
+        "total_items_sold": items,
+        "total_revenue": (items * price).round(2),
+        "avg_review_score": reviews,
+        "avg_delivery_days": rng.gamma(3.0, 4.0, n_products),
+    })
+
+def with_sort_values(df, rankings):
+    return {name: df.sort_values(r.column, ascending=not r.largest, kind="stable").head(r.n).copy()
+            for name, r in rankings.items()}
+
+def with_nlargest(df, rankings):
+    return {name: (df.nlargest if r.largest else df.nsmallest)(r.n, r.column).copy()
+            for name, r in rankings.items()}
+
+def with_rankings(df, rankings):
+    return select_rankings(df, rankings)
+
+METHODS = {"sort_values": with_sort_values, "nlargest": with_nlargest, "rankings": with_rankings}
+
+def best_time(fn, df, repeat):
+    """Fastest of `repeat` runs, in milliseconds, and the result of the last one."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(df, PRODUCT_RANKINGS)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+def main(sizes, repeat=3):
+    """
+    Times every method at every catalog size and prints one row per size.
+
+    Parameters:
+    sizes : Numbers of products in the synthetic catalogs.
+    repeat : Runs per method; the fastest one is reported.
+    """
+    print(f"⏱️ Report rankings: {len(PRODUCT_RANKINGS)} top/bottom-10 lists, best of {repeat} runs")
+    print(f"{'products':>12} " + " ".join(f"{name + ' ms':>16}" for name in METHODS) + f" {'speedup':>9}")
+    rows = []
+    for size in sizes:
+        df = synthetic_catalog(size)
+        timings = {}
+        results = {}
+        for name, fn in METHODS.items():
+            timings[name], results[name] = best_time(fn, df, repeat)
+        for name in PRODUCT_RANKINGS:
+            for method in METHODS:
+                pd.testing.assert_frame_equal(results[method][name], results["rankings"][name])
+        speedup = timings["nlargest"] / timings["rankings"]
+        print(f"{size:>12,} " + " ".join(f"{timings[name]:>16.1f}" for name in METHODS) + f" {speedup:>8.1f}x")
+        rows.append({"products": size, **timings})
+    print("✅ All methods returned identical rankings (speedup: nlargest vs rankings).")
+    return rows
+
+def _size_list(value):
+    return [int(size) for size in value.split(",") if size.strip()]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the report top-N rankings on a growing product catalog.")
+    parser.add_argument("--sizes", type=_size_list, default=[30_000, 300_000, 1_000_000, 3_000_000],
+                        help="comma-separated catalog sizes (number of products)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per method (the fastest is reported)")
+    args = parser.parse_args()
+    main(args.sizes, repeat=args.repeat)
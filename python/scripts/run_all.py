@@ -1,4 +1,5 @@
 import os
+import argparse
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -8,58 +9,133 @@ from src.anomaly_detection import run_anomaly_detection    # Step 2a
 from src.analysis import run_analysis              # Step 2b
 from src.context_builder import run_context_builder   # Step 3
 from src.ai_generator import run_ai_generator  # Step 4
+from src import raw_data_qc, anomaly_detection, analysis, context_builder, ai_generator
+from src.verbosity import set_verbosity, quiet_reports
+from src.metrics import start_run, instrument, write_run_metrics, METRICS_DIR
+from src.scheduler import Stage, run_dag, OK, SUCCEEDED
+from src.fingerprints import code_version, hash_files
+from src.utils import source_table_versions
+from src.datasets import set_shared_datasets, shared_datasets_enabled, REGISTRY, SHARED_TABLES
 
 # Load environment variables (API Keys, BQ Path)
 load_dotenv()
 
-def main():
-    print("🚀 --- STARTING OLIST AI-ANALYTICS PIPELINE --- 🚀")
-    print("="*50)
+OUTPUT_DIR = Path(__file__).resolve().parents[1] / "output"
+REPORT_DIRS = [OUTPUT_DIR / "QC_Reports", OUTPUT_DIR / "Anomaly_Detection", OUTPUT_DIR / "Analysis"]
 
-    # STEP 1: RAW DATA QC
-    print("\n🔍 STEP 1: Running Raw Data Quality Control...")
-    try:
-        run_raw_data_qc()
-        print("✅ Data QC Complete.")
-    except Exception as e:
-        print(f"❌ QC Failed: {e}")
+# --- Stage inputs (a stage is skipped when these match its last successful run) ---
+def warehouse_inputs(module, sql_queries):
+    """Inputs of a stage that reads the warehouse: versions of the tables it queries and its code."""
+    def inputs():
+        tables = source_table_versions(sql_queries)
+        return None if tables is None else {"tables": tables, "code": code_version(module)}
+    return inputs
 
-    # STEP 2: ANOMALY DETECTION
-    print("\n📈 STEP 2: Detecting Anomalies in BigQuery Data...")
-    try:
-        run_anomaly_detection()
-        print("✅ Anomaly Detection Complete.")
-    except Exception as e:
-        print(f"❌ Anomaly Detection Failed: {e}")
+def context_inputs():
+    return {"reports": hash_files(*REPORT_DIRS, pattern="*.json"), "code": code_version(context_builder),
+            "token_budget": context_builder.context_token_budget()}
 
-    # STEP 3: CORE ANALYSIS (Metrics, KPIs)
-    print("\n📊 STEP 3: Computing Core Business Metrics...")
-    try:
-        run_analysis()
-        print("✅ Business Analysis Complete.")
-    except Exception as e:
-        print(f"❌ Analysis Failed: {e}")
+def ai_inputs():
+    prompt = ai_generator.input_fingerprint()
+    return None if prompt is None else {**prompt, "code": code_version(ai_generator)}
 
-    # STEP 4: CONTEXT BUILDERs
-    print("\n📝 STEP 4: Building AI Context from JSON outputs...")
-    try:
-        run_context_builder()
-        print("✅ AI Context built (business_context.txt created).")
-    except Exception as e:
-        print(f"❌ Context Builder Failed: {e}")
+# Pipeline stages and their dependencies. QC, anomaly detection and analysis read the
+# warehouse independently and run concurrently; the context builder waits for all three.
+PIPELINE = [
+    Stage("raw_data_qc", run_raw_data_qc, (), "🔍 Raw Data Quality Control",
+          warehouse_inputs(raw_data_qc, raw_data_qc.QC_QUERIES.values()), (OUTPUT_DIR / "QC_Reports",)),
+    Stage("anomaly_detection", run_anomaly_detection, (), "📈 Anomaly Detection",
+          warehouse_inputs(anomaly_detection, anomaly_detection.ANOMALY_QUERIES), (OUTPUT_DIR / "Anomaly_Detection",)),
+    Stage("analysis", run_analysis, (), "📊 Core Business Metrics",
+          warehouse_inputs(analysis, analysis.ANALYSIS_QUERIES), (OUTPUT_DIR / "Analysis",)),
+    Stage("context_builder", run_context_builder, ("raw_data_qc", "anomaly_detection", "analysis"),
+          "📝 AI Context from the JSON outputs", context_inputs, (OUTPUT_DIR / "business_context.txt",)),
+    Stage("ai_generator", run_ai_generator, ("context_builder",), "✨ AI Reports and Recommendations",
+          ai_inputs, (OUTPUT_DIR / "AI_Report_OpenAI.txt", OUTPUT_DIR / "AI_Report_Gemini.txt")),
+]
 
-    # STEP 5: AI GENERATOR (Gemini / OpenAI)
-    print("\n✨ STEP 5: Generating AI Reports and Recommendations...")
-    try:
-        run_ai_generator()
-        print("✅ AI Reports generated successfully.")
-    except Exception as e:
-        print(f"❌ AI Generation Failed: {e}")
+def main(quiet=False, trace_memory=False, openmetrics=False, only=None, start_from=None, max_workers=None,
+         force=False, shared_datasets=False):
+    """
+    Runs the pipeline stages (independent ones concurrently) and saves their metrics to
+    output/run_metrics.json. Returns {stage: outcome}.
+
+    Parameters:
+    quiet : If True (`--quiet`), nothing is printed to the console; every step, query and
+            report writes a JSON timing/log record to stderr instead (see src/verbosity.py).
+    trace_memory : If True (`--trace-memory`), stages also record their tracemalloc peak.
+    openmetrics : If True (`--openmetrics`), the metrics are also written to
+                  output/run_metrics.prom in OpenMetrics text format.
+    only : Stage names to run on their own (`--only`), using the existing outputs of their inputs.
+           They run even if their inputs are unchanged.
+    start_from : Stage names to rerun together with everything downstream (`--from`). They run
+                 even if their inputs are unchanged; the downstream stages are skipped if theirs are.
+    max_workers : Maximum number of stages running at once (`--max-workers`).
+    force : If True (`--force`), stages run even when their inputs are unchanged since the
+            last run (by default they are skipped and their outputs reused, see src/fingerprints.py).
+    shared_datasets : If True (`--shared-datasets`), the fact and dimension tables are loaded
+                      once for the run and the queries that only aggregate them are computed
+                      locally (see src/datasets.py).
+    """
+    if quiet:
+        set_verbosity("quiet")
+    if shared_datasets:
+        set_shared_datasets(True)
+    start_run(trace_memory=trace_memory)
+
+    with quiet_reports():
+        try:
+            # Holding the shared tables for the whole run lets every stage reuse one copy
+            with instrument("pipeline", "run_all"), \
+                    REGISTRY.use(*(SHARED_TABLES if shared_datasets_enabled() else ())):
+                results = _run_pipeline(only, start_from, max_workers, force)
+        finally:
+            write_run_metrics(openmetrics_path=METRICS_DIR / "run_metrics.prom" if openmetrics else None)
+    return results
+
+def _run_pipeline(only, start_from, max_workers, force):
+    print("🚀 --- STARTING OLIST AI-ANALYTICS PIPELINE --- 🚀")
+    print("="*50)
+
+    results = run_dag(PIPELINE, only=only, start_from=start_from, max_workers=max_workers, force=force)
 
     print("\n" + "="*50)
-    print("🏁 PIPELINE FULLY EXECUTED!")
-    print("📂 Check 'python/output/' for all reports and JSON files.")
-    print("📊 Your Power BI dashboard is ready for refresh.")
+    for name, outcome in results.items():
+        print(f"{'✅' if outcome == OK else '⏩' if outcome in SUCCEEDED else '❌'} {name}: {outcome}")
+    if all(outcome in SUCCEEDED for outcome in results.values()):
+        print("🏁 PIPELINE FULLY EXECUTED!")
+        print("📂 Check 'python/output/' for all reports and JSON files.")
+        print("📊 Your Power BI dashboard is ready for refresh.")
+    else:
+        print("⚠️ PIPELINE FINISHED WITH FAILURES (downstream stages were skipped).")
+    return results
+
+def _stage_list(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    stage_names = ", ".join(stage.name for stage in PIPELINE)
+    parser = argparse.ArgumentParser(description="Run the OLIST AI-analytics pipeline.")
+    parser.add_argument("--quiet", action="store_true",
+                        help="headless mode: skip console reports, log JSON timing records to stderr")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="record the tracemalloc peak of every stage (slower)")
+    parser.add_argument("--openmetrics", action="store_true",
+                        help="also write output/run_metrics.prom in OpenMetrics text format")
+    parser.add_argument("--only", type=_stage_list, metavar="STAGES",
+                        help=f"comma-separated stages to run on their own, even if unchanged ({stage_names})")
+    parser.add_argument("--from", dest="start_from", type=_stage_list, metavar="STAGES",
+                        help="comma-separated stages to rerun (even if unchanged) together with everything downstream")
+    parser.add_argument("--max-workers", type=int, help="maximum number of stages running at once")
+    parser.add_argument("--force", action="store_true",
+                        help="run every selected stage even if its inputs are unchanged since the last run")
+    parser.add_argument("--shared-datasets", action="store_true",
+                        help="load the fact/dimension tables once and compute their aggregates locally")
+    args = parser.parse_args()
+    try:
+        results = main(quiet=args.quiet, trace_memory=args.trace_memory, openmetrics=args.openmetrics,
+                       only=args.only, start_from=args.start_from, max_workers=args.max_workers,
+                       force=args.force, shared_datasets=args.shared_datasets)
+    except ValueError as e:  # unknown stage in --only/--from
+        parser.error(str(e))
+    raise SystemExit(0 if all(outcome in SUCCEEDED for outcome in results.values()) else 1)
@@ -1,8 +1,15 @@
 from pathlib import Path
 import os
+import re
+import json
+import time
+import random
+import asyncio
+from collections import namedtuple
 from dotenv import load_dotenv
-from openai import OpenAI
-from google import genai  
+from .fingerprints import hash_text
+from .llm_providers import LLMProvider, create_provider, provider_override_from_env, estimate_tokens
+from .metrics import record_llm_call
 
 # --- PATH CONFIGURATION ---
 basedir = Path(__file__).resolve().parents[2]
@@ -11,6 +18,36 @@ load_dotenv(basedir / '.env')
 # export destination folder
 directory = Path(__file__).resolve().parents[2] / "python" / "output"
 
+# models used for the two reports
+OPENAI_MODEL = "gpt-4o-mini"
+OPENAI_TEMPERATURE = 0.3
+GEMINI_MODEL = "gemini-2.5-flash"
+
+# One entry per AI report: which provider/model writes it and where it is saved.
+# All reports are requested concurrently (see generate_reports).
+Report = namedtuple("Report", ["label", "provider", "model", "temperature", "filename"])
+
+AI_REPORTS = [
+    Report("OpenAI", "openai", OPENAI_MODEL, OPENAI_TEMPERATURE, "AI_Report_OpenAI.txt"),
+    Report("Gemini", "gemini", GEMINI_MODEL, None, "AI_Report_Gemini.txt"),
+]
+
+# --- LLM call settings ---
+LLM_TIMEOUT_SECONDS = 180     # per attempt
+LLM_MAX_RETRIES = 3           # retries after the first attempt (timeouts, connection errors, 429, 5xx)
+LLM_BACKOFF_SECONDS = 2.0     # first retry delay, doubled on every retry (plus jitter)
+
+# --- Streaming mode (OLIST_LLM_STREAM=1 or run_ai_generator(stream=True)) ---
+# Reports are appended to their files chunk by chunk as the providers generate them, instead
+# of being written once complete. In streaming mode LLM_TIMEOUT_SECONDS applies to the wait
+# for each chunk rather than to the whole call.
+STREAM_FLUSH_SECONDS = 0.5    # the report file is flushed at most this often while streaming
+
+# --- Local LLM response cache ---
+# Responses are stored as JSON files named after a hash of (provider, model, prompt hash,
+# temperature), so an unchanged prompt is never sent to a paid API twice.
+LLM_CACHE_DIR = Path(__file__).resolve().parents[1] / ".cache" / "llm_responses"
+
 # -------------------------
 # File helpers
 # -------------------------
@@ -23,67 +60,278 @@ def write_file(file_path, content):
         f.write(content)
 
 # -------------------------
-# OpenAI LLM call
+# Response cache
+# -------------------------
+def prompt_digest(prompt):
+    """Hash of the prompt without its 'Generated:' timestamp line, which changes on every run."""
+    return hash_text(re.sub(r"^Generated: .*$", "", prompt, flags=re.MULTILINE))
+
+def response_cache_key(provider, model, prompt, temperature):
+    payload = json.dumps({"provider": provider, "model": model, "prompt": prompt_digest(prompt),
+                          "temperature": temperature}, sort_keys=True)
+    return hash_text(payload)
+
+def read_cached_response(key):
+    """Returns the cached response text for the key, or None."""
+    try:
+        with open(LLM_CACHE_DIR / f"{key}.json", "r", encoding="utf-8") as f:
+            return json.load(f)["text"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return None
+
+def write_cached_response(key, text, **meta):
+    LLM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = LLM_CACHE_DIR / f"{key}.json"
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({**meta, "created": time.time(), "text": text}, f)
+    os.replace(tmp_path, path)  # atomic: concurrent runs never read a half-written entry
+
+def stream_enabled_from_env():
+    return os.environ.get("OLIST_LLM_STREAM", "").strip().lower() in ("1", "true", "yes")
+
+# -------------------------
+# Async LLM calls
 # -------------------------
-def generate_openai_response(prompt, model="gpt-4o-mini"):
+async def with_retries(call, name, retries=LLM_MAX_RETRIES, backoff=LLM_BACKOFF_SECONDS, retryable=None):
+    """
+    Awaits call() (a function returning a new coroutine per attempt), retrying attempts that
+    fail with a transient error with exponential backoff. retryable(error) decides which
+    errors are transient (defaults to LLMProvider.is_retryable); any other error, or the last
+    one if every attempt fails, is raised.
+    """
+    retryable = retryable or LLMProvider().is_retryable
+    for attempt in range(retries + 1):
+        try:
+            return await call()
+        except Exception as e:
+            if attempt == retries or not retryable(e):
+                raise
+            delay = backoff * 2**attempt * random.uniform(1.0, 1.5)
+            error = "timed out" if isinstance(e, asyncio.TimeoutError) else f"failed ({e!r})"
+            print(f"⚠️ {name} attempt {attempt + 1} {error}; retrying in {delay:.1f}s...")
+            await asyncio.sleep(delay)
+
+async def generate_with_retries(provider, prompt, model, temperature=None, timeout=LLM_TIMEOUT_SECONDS,
+                                retries=LLM_MAX_RETRIES, backoff=LLM_BACKOFF_SECONDS):
+    """
+    Calls provider.generate with a timeout per attempt, retrying attempts that fail with a
+    transient error (provider.is_retryable) with exponential backoff. Raises the error otherwise.
+    """
+    text = await with_retries(lambda: asyncio.wait_for(provider.generate(prompt, model, temperature), timeout),
+                              provider.name, retries, backoff, provider.is_retryable)
+    return text or ""  # a model can return no content
+
+async def stream_to_file(provider, prompt, model, temperature, path, timeout=LLM_TIMEOUT_SECONDS,
+                         flush_seconds=STREAM_FLUSH_SECONDS):
     """
-    Sends prompt to OpenAI. Includes error handling for Rate Limits.
+    Streams one response into `path` (overwritten) as it is generated, flushing the file at
+    most every flush_seconds. Only one chunk is held in memory at a time.
+    Returns (seconds, time to first token, completion tokens, whether tokens were estimated).
     """
+    start = time.perf_counter()
+    last_flush = start
+    ttft, chars, tokens = None, 0, None
+    chunks = provider.stream(prompt, model, temperature)
     try:
-        client = OpenAI() # uses OPENAI_API_KEY from environment
-        response = client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        return f"⚠️ OpenAI Error: {e}"
+        with open(path, "w", encoding="utf-8") as f:
+            while True:
+                try:
+                    text, usage = await asyncio.wait_for(chunks.__anext__(), timeout)
+                except StopAsyncIteration:
+                    break
+                if usage is not None:
+                    tokens = usage
+                if not text:
+                    continue
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                f.write(text)
+                chars += len(text)
+                if time.perf_counter() - last_flush >= flush_seconds:
+                    f.flush()
+                    last_flush = time.perf_counter()
+    finally:
+        await chunks.aclose()
+    estimated = tokens is None
+    return time.perf_counter() - start, ttft, estimate_tokens(chars) if estimated else tokens, estimated
+
+async def generate_reports(prompt, reports=None, provider=None, use_cache=True):
+    """
+    Generates every report concurrently and returns {report filename: text}. A report whose
+    generation fails contains an error message starting with "⚠️" instead.
+
+    Parameters:
+    prompt : Full prompt (the business context).
+    reports : List of Report (defaults to AI_REPORTS).
+    provider : Provider name used for every report instead of its own, e.g. 'stub'
+               (defaults to OLIST_LLM_PROVIDER).
+    use_cache : If True, responses are read from / written to the local response cache.
+    """
+    reports = AI_REPORTS if reports is None else reports
+    provider = provider or provider_override_from_env()
+    clients = {}  # one client per provider, shared by its reports
+
+    async def generate(report):
+        provider_name = provider or report.provider
+        key = response_cache_key(provider_name, report.model, prompt, report.temperature)
+        if use_cache:
+            cached = read_cached_response(key)
+            if cached is not None:
+                print(f"💾 {report.label} report loaded from the response cache.")
+                record_llm_call(provider_name, report.model, "ok", cache_hit=True)
+                return cached
+        try:
+            if provider_name not in clients:
+                clients[provider_name] = create_provider(provider_name)
+            start = time.perf_counter()
+            text = await generate_with_retries(clients[provider_name], prompt, report.model, report.temperature)
+            tokens = estimate_tokens(text)
+        except Exception as e:
+            record_llm_call(provider_name, report.model, "error", error=repr(e))
+            return f"⚠️ {report.label} Error: {e}"
+        seconds = time.perf_counter() - start
+        print(f"✅ {report.label} report generated in {seconds:.1f}s.")
+        record_llm_call(provider_name, report.model, "ok", seconds=seconds, tokens=tokens, tokens_estimated=True)
+        if use_cache:
+            write_cached_response(key, text, provider=provider_name, model=report.model,
+                                  temperature=report.temperature)
+        return text
+
+    try:
+        texts = await asyncio.gather(*(generate(report) for report in reports))
+    finally:
+        for client in clients.values():
+            await client.aclose()
+    return {report.filename: text for report, text in zip(reports, texts)}
+
+async def stream_reports(prompt, output_dir, reports=None, provider=None, use_cache=True):
+    """
+    Streaming counterpart of generate_reports: every report is streamed concurrently into
+    output_dir / report.filename. Returns {report filename: None, or the error message
+    ("⚠️ ...") that was written to the file instead of the report}.
+
+    Parameters: as generate_reports, plus output_dir (directory of the report files).
+    """
+    reports = AI_REPORTS if reports is None else reports
+    provider = provider or provider_override_from_env()
+    clients = {}  # one client per provider, shared by its reports
+
+    async def stream(report):
+        provider_name = provider or report.provider
+        path = Path(output_dir) / report.filename
+        key = response_cache_key(provider_name, report.model, prompt, report.temperature)
+        if use_cache:
+            cached = read_cached_response(key)
+            if cached is not None:
+                print(f"💾 {report.label} report loaded from the response cache.")
+                record_llm_call(provider_name, report.model, "ok", streamed=True, cache_hit=True)
+                write_file(path, cached)
+                return None
+        try:
+            if provider_name not in clients:
+                clients[provider_name] = create_provider(provider_name)
+            client = clients[provider_name]
+            seconds, ttft, tokens, estimated = await with_retries(
+                lambda: stream_to_file(client, prompt, report.model, report.temperature, path), client.name,
+                retryable=client.is_retryable)
+        except Exception as e:
+            record_llm_call(provider_name, report.model, "error", streamed=True, error=repr(e))
+            error = f"⚠️ {report.label} Error: {e}"
+            write_file(path, error)
+            return error
+        print(f"✅ {report.label} report streamed in {seconds:.1f}s "
+              f"(first token after {ttft if ttft is not None else seconds:.2f}s, {tokens:,} tokens).")
+        record_llm_call(provider_name, report.model, "ok", seconds=seconds, ttft_seconds=ttft, tokens=tokens,
+                        tokens_estimated=estimated, streamed=True)
+        if use_cache:
+            write_cached_response(key, read_file(path), provider=provider_name, model=report.model,
+                                  temperature=report.temperature)
+        return None
+
+    try:
+        errors = await asyncio.gather(*(stream(report) for report in reports))
+    finally:
+        for client in clients.values():
+            await client.aclose()
+    return {report.filename: error for report, error in zip(reports, errors)}
 
 # -------------------------
-# Gemini LLM call
+# OpenAI / Gemini LLM calls (one report at a time)
 # -------------------------
-def generate_gemini_response(prompt, model_name="gemini-2.5-flash"):
+def generate_openai_response(prompt, model=OPENAI_MODEL):
+    """
+    Sends prompt to OpenAI (with retries and the response cache).
+    """
+    report = Report("OpenAI", "openai", model, OPENAI_TEMPERATURE, "AI_Report_OpenAI.txt")
+    return asyncio.run(generate_reports(prompt, [report]))[report.filename]
+
+def generate_gemini_response(prompt, model_name=GEMINI_MODEL):
     """
-    Uses the new google-genai Client. 
+    Sends prompt to Gemini (with retries and the response cache).
     It automatically detects the 'GOOGLE_API_KEY' environment variable.
     """
-    try:
-        client = genai.Client(api_key=os.environ.get("GOOGLE_API_KEY"))
-        response = client.models.generate_content(
-            model=model_name,
-            contents=prompt
-        )
-        return response.text
-    except Exception as e:
-        return f"⚠️ Gemini Error: {e}"
+    report = Report("Gemini", "gemini", model_name, None, "AI_Report_Gemini.txt")
+    return asyncio.run(generate_reports(prompt, [report]))[report.filename]
+
+# -------------------------
+# Input fingerprint
+# -------------------------
+def input_fingerprint():
+    """
+    Describes what the reports depend on: the prompt (business_context.txt without its
+    'Generated:' timestamp line) and the model settings. run_all skips this step, and the
+    two paid API calls, when it matches the last successful run (see fingerprints.py).
+    """
+    input_path = directory / "business_context.txt"
+    if not input_path.exists():
+        return None
+    provider = provider_override_from_env()
+    return {
+        "prompt": prompt_digest(read_file(input_path)),
+        "reports": [[provider or r.provider, r.model, r.temperature, r.filename] for r in AI_REPORTS],
+    }
 
 # -------------------------
 # Main pipeline
 # -------------------------
-def run_ai_generator():
+def run_ai_generator(provider=None, use_cache=True, stream=None):
+    """
+    Writes one AI report per entry of AI_REPORTS, requesting them all concurrently.
+
+    Parameters:
+    provider : Provider used for every report instead of its own, e.g. 'stub' for an offline
+               run (defaults to OLIST_LLM_PROVIDER).
+    use_cache : If False, every report is regenerated even if the same prompt was sent before.
+    stream : If True, the reports are streamed into their files as they are generated
+             (defaults to OLIST_LLM_STREAM).
+    """
     input_path = directory / "business_context.txt"
-    
+
     if not input_path.exists():
         print(f"❌ Error: Could not find {input_path}")
-        return
+        return False
 
     # 1. Read full business context
     print("📖 Reading business context...")
     business_context = read_file(input_path)
 
-    # 2. Generate OpenAI Report
-    print("🤖 Generating OpenAI report...")
-    openai_report = generate_openai_response(business_context)
-    write_file(directory / "AI_Report_OpenAI.txt", openai_report)
-
-    # 3. Generate Gemini Report
-    print("✨ Generating Gemini report...")
-    gemini_report = generate_gemini_response(business_context)
-    write_file(directory / "AI_Report_Gemini.txt", gemini_report)
+    # 2. Generate all reports concurrently
+    print(f"🤖 Generating the {', '.join(r.label for r in AI_REPORTS)} reports...")
+    if stream_enabled_from_env() if stream is None else stream:
+        errors = asyncio.run(stream_reports(business_context, directory, provider=provider, use_cache=use_cache))
+        failed = any(errors.values())
+    else:
+        texts = asyncio.run(generate_reports(business_context, provider=provider, use_cache=use_cache))
+        for filename, text in texts.items():
+            write_file(directory / filename, text)
+        failed = any(text.startswith("⚠️") for text in texts.values())
 
     print(f"\n✅ Done! Check your output folder:")
     print(f"📍 {directory}")
 
+    # An API error is written into the report; report it so the step is retried next run
+    return not failed
+
 if __name__ == "__main__":
-    run_ai_generator()
\ No newline at end of file
+    run_ai_generator()
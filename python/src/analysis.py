@@ -1,7 +1,16 @@
 import numpy as np
 import pandas as pd
 from . import sql_queries as q
-from .utils import fetch_data_from_bq
+from .utils import as_pandas
+from .datasets import fetch_data, fetch_many, shared_datasets_enabled, REGISTRY, SHARED_TABLES
+from .records import Field, frame_to_records
+from .rankings import Ranking, select_rankings
+from .formatting import Column, print_table
+from .verbosity import is_quiet, log_event, quiet_reports
+from .metrics import instrument
+from .report_pushdown import (DeliveryAggregates, SellerAggregates, bracket_counts,
+                              delivery_aggregate_queries, seller_aggregate_queries)
+import os
 import json
 from pathlib import Path
 from typing import Optional, Dict, Any
@@ -11,6 +20,74 @@ from datetime import datetime
 
 
 
+###################################################################################################################
+#### Report Engines (pandas / Polars)
+###################################################################################################################
+
+# The RFM, seller, delivery and region reports compute their aggregates with one of two engines:
+#   'pandas' : eager pandas (the default).
+#   'polars' : Polars LazyFrame plans, collected together: multi-threaded, only the columns each
+#              aggregate needs are read and the row-level frame is never copied.
+# Both engines hand the same small result frames to the shared report code, so the JSON files
+# are identical. Select with run_analysis(engine=...) or OLIST_ANALYSIS_ENGINE=polars.
+ANALYSIS_ENGINES = ("pandas", "polars")
+
+def analysis_engine_from_env():
+    engine = os.environ.get("OLIST_ANALYSIS_ENGINE", "pandas").strip().lower()
+    return engine if engine in ANALYSIS_ENGINES else "pandas"
+
+def _run_engine(engine, pandas_fn, polars_fn, df):
+    """Computes a report's aggregates with the selected engine."""
+    if engine not in ANALYSIS_ENGINES:
+        raise ValueError(f"Invalid engine '{engine}'. Must be one of {ANALYSIS_ENGINES}.")
+    return polars_fn(df) if engine == "polars" else pandas_fn(df)
+
+def _lazy_frame(df):
+    """Polars LazyFrame over a pandas, Arrow or Polars input (categorical strings become plain strings)."""
+    import polars as pl
+
+    if isinstance(df, pd.DataFrame):
+        frame = pl.from_pandas(df)
+    elif isinstance(df, (pl.DataFrame, pl.LazyFrame)):
+        frame = df
+    else:
+        frame = pl.from_arrow(df)
+    return frame.lazy().with_columns(pl.col(pl.Categorical).cast(pl.String))
+
+def _bracket_counts(column, bins, labels, include_lowest=False):
+    """
+    Polars expressions counting the values of `column` in each pd.cut bracket (right-closed
+    intervals between consecutive bins; include_lowest closes the first one on the left too).
+    """
+    import polars as pl
+
+    value = pl.col(column)
+    expressions = []
+    for i, label in enumerate(labels):
+        lower = value >= bins[i] if include_lowest and i == 0 else value > bins[i]
+        expressions.append((lower & (value <= bins[i + 1])).sum().alias(label))
+    return expressions
+
+def _count(value):
+    """A count or sum returned by the warehouse (NULL over no rows) as an int."""
+    return 0 if pd.isna(value) else int(value)
+
+def _mean(value):
+    """A mean returned by the warehouse (NULL over no rows) as a float."""
+    return float('nan') if pd.isna(value) else float(value)
+
+def _top_rows(lf, n, column, largest=True):
+    """
+    Polars equivalent of DataFrame.nlargest / nsmallest (keep='first'): the n rows with the
+    largest (or smallest) values, ties kept in their original order, missing values skipped.
+    """
+    import polars as pl
+
+    return (lf.filter(pl.col(column).is_not_null())
+              .sort(column, descending=largest, maintain_order=True)
+              .head(n))
+
+
 ###################################################################################################################
 #### Cohort Analysis and Retention Rates
 ###################################################################################################################
@@ -26,6 +103,7 @@ def create_cohort_report(df, path= None):
     df : Cohort analysis dataframe with pre-calculated cohort data.
     path : If provided, saves JSON output to this file path. If None, only returns dict.
     """
+    df = as_pandas(df)
 
     # Separate DataFrames for Matrix and Averages
  
@@ -80,30 +158,21 @@ def create_cohort_report(df, path= None):
     print("-" * 80)
 
     # Select pre-calculated data from the aggregated DataFrame
-    avg_display = avg_df[['period_index', 'active_customers', 'retention_rate', 'total_spent']].copy()
-    avg_display_table = avg_display.copy()
-    avg_display_table.columns = ['Period Index', 'Active Customers (Total)', 'Retention % (Cross-Cohort)',
-                                 'Total Spent (Aggregated)']
-
-    avg_display_table['Retention % (Cross-Cohort)'] = avg_display_table['Retention % (Cross-Cohort)'].apply(
-        lambda x: f"{x}%" if pd.notna(x) else "N/A"
-    )
-    avg_display_table['Total Spent (Aggregated)'] = avg_display_table['Total Spent (Aggregated)'].apply(
-        lambda x: f"${x:,.2f}" if pd.notna(x) else "N/A"
-    )
-
-    print(avg_display_table.to_string(index=False))
+    print_table(avg_df, [
+        Column('period_index', 'Period Index'),
+        Column('active_customers', 'Active Customers (Total)'),
+        Column('retention_rate', 'Retention % (Cross-Cohort)', 'percent', na="N/A"),
+        Column('total_spent', 'Total Spent (Aggregated)', 'currency', na="N/A"),
+    ])
     print("-" * 80)
 
     # Build JSON block for cross-cohort aggregations
-    aggregated_by_index_month = []
-    for _, row in avg_df.iterrows():
-        aggregated_by_index_month.append({
-            "period_index": int(row['period_index']) if pd.notna(row['period_index']) else None,
-            "retention_rate": round(row['retention_rate'], 2) if pd.notna(row['retention_rate']) else None,
-            "total_spent": round(row['total_spent'], 2) if pd.notna(row['total_spent']) else None,
-            "total_active_customers": int(row['active_customers']) if pd.notna(row['active_customers']) else None
-        })
+    aggregated_by_index_month = frame_to_records(avg_df, [
+        Field("period_index", "period_index", "int", nullable=True),
+        Field("retention_rate", "retention_rate", "round", 2, nullable=True),
+        Field("total_spent", "total_spent", "round", 2, nullable=True),
+        Field("total_active_customers", "active_customers", "int", nullable=True),
+    ])
 
     # Final Output Construction 
     output = {
@@ -130,7 +199,97 @@ def create_cohort_report(df, path= None):
 
 ### RFM Analysis Data to JSON Format
 
-def create_rfm_report(df: pd.DataFrame, path: Optional[str] = None, further_notes="") -> Dict[str, Any]:
+RFM_INT_COLUMNS = ['total_orders', 'recency_days', 'r_score', 'f_score', 'm_score', 'rfm_score', 'rfm_label']
+
+def _rfm_stats(df):
+    """RFM summary statistics and per-segment aggregates, computed with pandas."""
+    df = as_pandas(df)
+
+    # Convert data types
+    df[RFM_INT_COLUMNS] = df[RFM_INT_COLUMNS].astype(int)
+    df['total_spent'] = df['total_spent'].astype(float)
+
+    segment_dist = df.groupby('rfm_segment').agg({
+        'customer_unique_id': 'count',
+        'total_spent': 'sum',
+        'total_orders': 'sum'
+    }).reset_index()
+
+    segment_metrics = df.groupby('rfm_segment').agg({
+        'total_orders': ['mean', 'median'],
+        'total_spent': ['mean', 'median'],
+        'recency_days': ['mean', 'median'],
+        'r_score': 'mean',
+        'f_score': 'mean',
+        'm_score': 'mean'
+    }).reset_index()
+    segment_metrics.columns = ['segment', 'avg_orders', 'median_orders', 'avg_spent',
+                                'median_spent', 'avg_recency', 'median_recency',
+                                'avg_r_score', 'avg_f_score', 'avg_m_score']
+
+    return {
+        "total_customers": len(df),
+        "total_revenue": float(df['total_spent'].sum()),
+        "avg_customer_value": float(df['total_spent'].mean()),
+        "avg_orders_per_customer": float(df['total_orders'].mean()),
+        "avg_recency_days": float(df['recency_days'].mean()),
+        "r_avg": float(df['r_score'].mean()),
+        "r_median": int(df['r_score'].median()),
+        "f_avg": float(df['f_score'].mean()),
+        "f_median": int(df['f_score'].median()),
+        "m_avg": float(df['m_score'].mean()),
+        "m_median": int(df['m_score'].median()),
+        "segment_dist": segment_dist,
+        "segment_metrics": segment_metrics,
+    }
+
+def _rfm_stats_polars(df):
+    """Same as _rfm_stats, as Polars lazy queries collected together in one parallel run."""
+    import polars as pl
+
+    lf = _lazy_frame(df).with_columns(pl.col(RFM_INT_COLUMNS).cast(pl.Int64), pl.col('total_spent').cast(pl.Float64))
+    segments = lf.filter(pl.col('rfm_segment').is_not_null()).group_by('rfm_segment')
+
+    summary, segment_dist, segment_metrics = pl.collect_all([
+        lf.select(
+            total_customers=pl.len(),
+            total_revenue=pl.col('total_spent').sum(),
+            avg_customer_value=pl.col('total_spent').mean(),
+            avg_orders_per_customer=pl.col('total_orders').mean(),
+            avg_recency_days=pl.col('recency_days').mean(),
+            r_avg=pl.col('r_score').mean(),
+            r_median=pl.col('r_score').median(),
+            f_avg=pl.col('f_score').mean(),
+            f_median=pl.col('f_score').median(),
+            m_avg=pl.col('m_score').mean(),
+            m_median=pl.col('m_score').median(),
+        ),
+        segments.agg(
+            customer_unique_id=pl.col('customer_unique_id').count(),
+            total_spent=pl.col('total_spent').sum(),
+            total_orders=pl.col('total_orders').sum(),
+        ).sort('rfm_segment'),
+        segments.agg(
+            avg_orders=pl.col('total_orders').mean(),
+            median_orders=pl.col('total_orders').median(),
+            avg_spent=pl.col('total_spent').mean(),
+            median_spent=pl.col('total_spent').median(),
+            avg_recency=pl.col('recency_days').mean(),
+            median_recency=pl.col('recency_days').median(),
+            avg_r_score=pl.col('r_score').mean(),
+            avg_f_score=pl.col('f_score').mean(),
+            avg_m_score=pl.col('m_score').mean(),
+        ).sort('rfm_segment').rename({'rfm_segment': 'segment'}),
+    ])
+
+    stats = summary.row(0, named=True)
+    for score in ('r', 'f', 'm'):
+        stats[f"{score}_median"] = int(stats[f"{score}_median"])
+    stats["segment_dist"] = segment_dist.to_pandas()
+    stats["segment_metrics"] = segment_metrics.to_pandas()
+    return stats
+
+def create_rfm_report(df: pd.DataFrame, path: Optional[str] = None, further_notes="", engine="pandas") -> Dict[str, Any]:
     """
     Convert RFM analysis DataFrame to JSON format with printed report. Additional notes can be provided.
     Parameters:
@@ -138,14 +297,15 @@ def create_rfm_report(df: pd.DataFrame, path: Optional[str] = None, further_note
     df : RFM dataframe with columns: customer_unique_id, total_orders, total_spent,
         recency_days, r_score, f_score, m_score, rfm_score, rfm_label, rfm_segment
     path : If provided, saves JSON to this path.
+    engine : 'pandas' or 'polars', the engine computing the aggregates (see ANALYSIS_ENGINES).
     Returns: Structured JSON-ready dictionary
     """
-    
-    # Convert data types
-    int_columns = ['total_orders', 'recency_days', 'r_score', 'f_score', 'm_score',
-                   'rfm_score', 'rfm_label']
-    df[int_columns] = df[int_columns].astype(int)
-    df['total_spent'] = df['total_spent'].astype(float)
+    stats = _run_engine(engine, _rfm_stats, _rfm_stats_polars, df)
+    total_customers = stats['total_customers']
+    total_revenue = stats['total_revenue']
+    avg_customer_value = stats['avg_customer_value']
+    avg_orders_per_customer = stats['avg_orders_per_customer']
+    avg_recency_days = stats['avg_recency_days']
     
     print("="*80)
     print("              *** RFM (Recency, Frequency, Monetary) Analysis Report ***")
@@ -153,12 +313,6 @@ def create_rfm_report(df: pd.DataFrame, path: Optional[str] = None, further_note
     
     # --- Summary Statistics ---
     print("\n### Overall Summary ###")
-    total_customers = len(df)
-    total_revenue = float(df['total_spent'].sum())
-    avg_customer_value = float(df['total_spent'].mean())
-    avg_orders_per_customer = float(df['total_orders'].mean())
-    avg_recency_days = float(df['recency_days'].mean())
-    
     print(f"Total Customers: {total_customers:,}")
     print(f"Total Revenue: ${total_revenue:,.2f}")
     print(f"Average Customer Value: ${avg_customer_value:,.2f}")
@@ -168,90 +322,69 @@ def create_rfm_report(df: pd.DataFrame, path: Optional[str] = None, further_note
     
     # --- RFM Score Distribution ---
     print("\n### RFM Score Distribution ###")
-    r_avg = float(df['r_score'].mean())
-    r_median = int(df['r_score'].median())
-    f_avg = float(df['f_score'].mean())
-    f_median = int(df['f_score'].median())
-    m_avg = float(df['m_score'].mean())
-    m_median = int(df['m_score'].median())
-    
-    rfm_stats = pd.DataFrame({
-        'Score Type': ['Recency', 'Frequency', 'Monetary'],
-        'Avg Score': [round(r_avg, 2), round(f_avg, 2), round(m_avg, 2)],
-        'Median Score': [r_median, f_median, m_median],
-        'Metric Avg': [
-            f"{avg_recency_days:.2f} days",
-            f"{avg_orders_per_customer:.2f} orders",
-            f"${avg_customer_value:,.2f}"
-        ]
-    })
-    print(rfm_stats.to_string(index=False))
+    r_avg, r_median = stats['r_avg'], stats['r_median']
+    f_avg, f_median = stats['f_avg'], stats['f_median']
+    m_avg, m_median = stats['m_avg'], stats['m_median']
+    
+    if not is_quiet():
+        rfm_stats = pd.DataFrame({
+            'Score Type': ['Recency', 'Frequency', 'Monetary'],
+            'Avg Score': [round(r_avg, 2), round(f_avg, 2), round(m_avg, 2)],
+            'Median Score': [r_median, f_median, m_median],
+            'Metric Avg': [
+                f"{avg_recency_days:.2f} days",
+                f"{avg_orders_per_customer:.2f} orders",
+                f"${avg_customer_value:,.2f}"
+            ]
+        })
+        print(rfm_stats.to_string(index=False))
     print("-" * 80)
     
     # --- Segment Distribution ---
     print("\n### Customer Segment Distribution ###")
-    segment_dist = df.groupby('rfm_segment').agg({
-        'customer_unique_id': 'count',
-        'total_spent': 'sum',
-        'total_orders': 'sum'
-    }).reset_index()
-    
+    segment_dist = stats['segment_dist']
     segment_dist['percentage'] = (segment_dist['customer_unique_id'] / total_customers * 100).round(2)
     segment_dist['revenue_percentage'] = (segment_dist['total_spent'] / total_revenue * 100).round(2)
     segment_dist = segment_dist.sort_values('total_spent', ascending=False)
     
-    segment_display = segment_dist.copy()
-    segment_display.columns = ['Segment', 'Customers', 'Total Revenue', 'Total Orders', 
-                                'Customer %', 'Revenue %']
-    segment_display['Total Revenue'] = segment_display['Total Revenue'].apply(lambda x: f"${x:,.2f}")
-    segment_display['Customer %'] = segment_display['Customer %'].apply(lambda x: f"{x}%")
-    segment_display['Revenue %'] = segment_display['Revenue %'].apply(lambda x: f"{x}%")
-    
-    print(segment_display.to_string(index=False))
+    print_table(segment_dist, [
+        Column('rfm_segment', 'Segment'),
+        Column('customer_unique_id', 'Customers'),
+        Column('total_spent', 'Total Revenue', 'currency'),
+        Column('total_orders', 'Total Orders'),
+        Column('percentage', 'Customer %', 'percent'),
+        Column('revenue_percentage', 'Revenue %', 'percent'),
+    ])
     print("-" * 80)
     
     # --- Detailed Segment Metrics ---
     print("\n### Detailed Segment Metrics ###")
-    segment_metrics = df.groupby('rfm_segment').agg({
-        'total_orders': ['mean', 'median'],
-        'total_spent': ['mean', 'median'],
-        'recency_days': ['mean', 'median'],
-        'r_score': 'mean',
-        'f_score': 'mean',
-        'm_score': 'mean'
-    }).reset_index()
-    
-    segment_metrics.columns = ['segment', 'avg_orders', 'median_orders', 'avg_spent', 
-                                'median_spent', 'avg_recency', 'median_recency',
-                                'avg_r_score', 'avg_f_score', 'avg_m_score']
-    
-    segment_metrics_display = segment_metrics.copy()
-    segment_metrics_display['avg_spent'] = segment_metrics_display['avg_spent'].apply(lambda x: f"${x:,.2f}")
-    segment_metrics_display['median_spent'] = segment_metrics_display['median_spent'].apply(lambda x: f"${x:,.2f}")
-    segment_metrics_display = segment_metrics_display[['segment', 'avg_orders', 'avg_spent', 
-                                                         'avg_recency', 'avg_r_score', 
-                                                         'avg_f_score', 'avg_m_score']]
-    segment_metrics_display.columns = ['Segment', 'Avg Orders', 'Avg Spent', 'Avg Recency', 
-                                        'Avg R', 'Avg F', 'Avg M']
-    
-    print(segment_metrics_display.round(2).to_string(index=False))
+    segment_metrics = stats['segment_metrics']
+    print_table(segment_metrics, [
+        Column('segment', 'Segment'),
+        Column('avg_orders', 'Avg Orders', 'round_2'),
+        Column('avg_spent', 'Avg Spent', 'currency'),
+        Column('avg_recency', 'Avg Recency', 'round_2'),
+        Column('avg_r_score', 'Avg R', 'round_2'),
+        Column('avg_f_score', 'Avg F', 'round_2'),
+        Column('avg_m_score', 'Avg M', 'round_2'),
+    ])
     print("-" * 80)
     
     # --- Top Segments ---
     print("\n### Top 5 Segments by Revenue ###")
-    top_revenue = segment_dist.nlargest(5, 'total_spent')[['rfm_segment', 'total_spent', 'revenue_percentage']]
-    top_revenue_display = top_revenue.copy()
-    top_revenue_display['total_spent'] = top_revenue_display['total_spent'].apply(lambda x: f"${x:,.2f}")
-    top_revenue_display['revenue_percentage'] = top_revenue_display['revenue_percentage'].apply(lambda x: f"{x}%")
-    top_revenue_display.columns = ['Segment', 'Total Revenue', 'Revenue %']
-    print(top_revenue_display.to_string(index=False))
+    print_table(segment_dist.nlargest(5, 'total_spent'), [
+        Column('rfm_segment', 'Segment'),
+        Column('total_spent', 'Total Revenue', 'currency'),
+        Column('revenue_percentage', 'Revenue %', 'percent'),
+    ])
     
     print("\n### Top 5 Segments by Customer Count ###")
-    top_count = segment_dist.nlargest(5, 'customer_unique_id')[['rfm_segment', 'customer_unique_id', 'percentage']]
-    top_count_display = top_count.copy()
-    top_count_display['percentage'] = top_count_display['percentage'].apply(lambda x: f"{x}%")
-    top_count_display.columns = ['Segment', 'Customer Count', 'Customer %']
-    print(top_count_display.to_string(index=False))
+    print_table(segment_dist.nlargest(5, 'customer_unique_id'), [
+        Column('rfm_segment', 'Segment'),
+        Column('customer_unique_id', 'Customer Count'),
+        Column('percentage', 'Customer %', 'percent'),
+    ])
     print(f"\n* Note that:\n {further_notes}")
     print("\n" + "="*80)
     
@@ -299,32 +432,28 @@ def create_rfm_report(df: pd.DataFrame, path: Optional[str] = None, further_note
     }
     
     # Populate segment distribution data (already sorted by revenue in descending order)
-    for _, row in segment_dist.iterrows():
-        output['rfm_segment_distribution']['data'].append({
-            "segment": str(row['rfm_segment']),
-            "customer_count": int(row['customer_unique_id']),
-            "percentage_of_customers": float(row['percentage']),
-            "total_revenue": round(float(row['total_spent']), 2),
-            "percentage_of_revenue": float(row['revenue_percentage']),
-            "total_orders": int(row['total_orders'])
-        })
+    output['rfm_segment_distribution']['data'].extend(frame_to_records(segment_dist, [
+        Field("segment", "rfm_segment", "str"),
+        Field("customer_count", "customer_unique_id", "int"),
+        Field("percentage_of_customers", "percentage", "float"),
+        Field("total_revenue", "total_spent", "float", 2),
+        Field("percentage_of_revenue", "revenue_percentage", "float"),
+        Field("total_orders", "total_orders", "int"),
+    ]))
     
     # Populate segment metrics data
-    for _, row in segment_metrics.iterrows():
-        output['segment_metrics']['data'].append({
-            "segment": str(row['segment']),
-            "avg_orders": round(float(row['avg_orders']), 2),
-            "median_orders": int(row['median_orders']),
-            "avg_spent": round(float(row['avg_spent']), 2),
-            "median_spent": round(float(row['median_spent']), 2),
-            "avg_recency_days": round(float(row['avg_recency']), 2),
-            "median_recency_days": int(row['median_recency']),
-            "avg_rfm_scores": {
-                "recency": round(float(row['avg_r_score']), 2),
-                "frequency": round(float(row['avg_f_score']), 2),
-                "monetary": round(float(row['avg_m_score']), 2)
-            }
-        })
+    output['segment_metrics']['data'].extend(frame_to_records(segment_metrics, [
+        Field("segment", "segment", "str"),
+        Field("avg_orders", "avg_orders", "float", 2),
+        Field("median_orders", "median_orders", "int"),
+        Field("avg_spent", "avg_spent", "float", 2),
+        Field("median_spent", "median_spent", "float", 2),
+        Field("avg_recency_days", "avg_recency", "float", 2),
+        Field("median_recency_days", "median_recency", "int"),
+        Field("avg_rfm_scores.recency", "avg_r_score", "float", 2),
+        Field("avg_rfm_scores.frequency", "avg_f_score", "float", 2),
+        Field("avg_rfm_scores.monetary", "avg_m_score", "float", 2),
+    ]))
 
     # Save to file if path is provided
     if path:
@@ -342,6 +471,26 @@ def create_rfm_report(df: pd.DataFrame, path: Optional[str] = None, further_note
 
 ### Product Performance Data to JSON Format
 
+# Console table columns shared by the top and bottom product tables
+PRODUCT_TABLE_COLUMNS = [
+    Column('product_id', 'Product ID', 'short_id'),
+    Column('product_category_name', 'Category'),
+    Column('total_items_sold', 'Items Sold'),
+    Column('total_orders', 'Orders'),
+    Column('total_revenue', 'Revenue', 'currency'),
+    Column('avg_review_score', 'Avg Review'),
+    Column('avg_delivery_days', 'Avg Delivery'),
+]
+PRODUCT_REVENUE_TABLE_COLUMNS = [
+    Column('product_id', 'Product ID', 'short_id'),
+    Column('product_category_name', 'Category'),
+    Column('total_revenue', 'Revenue', 'currency'),
+    Column('total_items_sold', 'Items Sold'),
+    Column('total_orders', 'Orders'),
+    Column('avg_review_score', 'Avg Review'),
+    Column('avg_delivery_days', 'Avg Delivery'),
+]
+
 def create_product_performance_report(df: pd.DataFrame, path: Optional[str] = None) -> Dict[str, Any]:
     """    
     Parameters:
@@ -356,6 +505,7 @@ def create_product_performance_report(df: pd.DataFrame, path: Optional[str] = No
     Dict[str, Any]
         Structured JSON-ready dictionary
     """
+    df = as_pandas(df)
     
     print("="*100)
     print("                  *** Product Performance Analysis Report ***")
@@ -381,50 +531,33 @@ def create_product_performance_report(df: pd.DataFrame, path: Optional[str] = No
     print(f"Average Review Score: {avg_review_score:.2f}")
     print(f"Average Delivery Days: {avg_delivery_days:.2f}")
     print("-" * 100)
+
+    # Top and bottom lists, selected in one call (see rankings.py)
+    rankings = select_rankings(df, {
+        "top_by_items": Ranking('total_items_sold', 10),
+        "top_by_revenue": Ranking('total_revenue', 10),
+        "bottom_by_items": Ranking('total_items_sold', 10, largest=False),
+    })
     
     # --- Top 10 Products by Items Sold (High Demand) ---
     print("\n### Top 10 Products by Items Sold (High Demand) ###")
-    top_by_items = df.nlargest(10, 'total_items_sold').copy()
+    top_by_items = rankings['top_by_items']
     
-    top_items_display = top_by_items[['product_id', 'product_category_name', 'total_items_sold', 
-                                       'total_orders', 'total_revenue', 'avg_review_score', 
-                                       'avg_delivery_days']].copy()
-    top_items_display['product_id'] = top_items_display['product_id'].str[:16] + '...'
-    top_items_display['total_revenue'] = top_items_display['total_revenue'].apply(lambda x: f"${x:,.2f}")
-    top_items_display.columns = ['Product ID', 'Category', 'Items Sold', 'Orders', 
-                                  'Revenue', 'Avg Review', 'Avg Delivery']
-    
-    print(top_items_display.to_string(index=False))
+    print_table(top_by_items, PRODUCT_TABLE_COLUMNS)
     print("-" * 100)
     
     # --- Top 10 Products by Revenue ---
     print("\n### Top 10 Products by Revenue (Highest Revenue) ###")
-    top_by_revenue = df.nlargest(10, 'total_revenue').copy()
-    
-    top_revenue_display = top_by_revenue[['product_id', 'product_category_name', 'total_revenue',
-                                           'total_items_sold', 'total_orders', 'avg_review_score', 
-                                           'avg_delivery_days']].copy()
-    top_revenue_display['product_id'] = top_revenue_display['product_id'].str[:16] + '...'
-    top_revenue_display['total_revenue'] = top_revenue_display['total_revenue'].apply(lambda x: f"${x:,.2f}")
-    top_revenue_display.columns = ['Product ID', 'Category', 'Revenue', 'Items Sold', 
-                                    'Orders', 'Avg Review', 'Avg Delivery']
+    top_by_revenue = rankings['top_by_revenue']
     
-    print(top_revenue_display.to_string(index=False))
+    print_table(top_by_revenue, PRODUCT_REVENUE_TABLE_COLUMNS)
     print("-" * 100)
     
     # --- Bottom 10 Products (Worst Selling) ---
     print("\n### Bottom 10 Products by Items Sold (Worst Selling) ###")
-    bottom_by_items = df.nsmallest(10, 'total_items_sold').copy()
+    bottom_by_items = rankings['bottom_by_items']
     
-    bottom_items_display = bottom_by_items[['product_id', 'product_category_name', 'total_items_sold',
-                                             'total_orders', 'total_revenue', 'avg_review_score', 
-                                             'avg_delivery_days']].copy()
-    bottom_items_display['product_id'] = bottom_items_display['product_id'].str[:16] + '...'
-    bottom_items_display['total_revenue'] = bottom_items_display['total_revenue'].apply(lambda x: f"${x:,.2f}")
-    bottom_items_display.columns = ['Product ID', 'Category', 'Items Sold', 'Orders', 
-                                     'Revenue', 'Avg Review', 'Avg Delivery']
-    
-    print(bottom_items_display.to_string(index=False))
+    print_table(bottom_by_items, PRODUCT_TABLE_COLUMNS)
     print("-" * 100)
     
     # --- Correlation Analysis ---
@@ -436,10 +569,11 @@ def create_product_performance_report(df: pd.DataFrame, path: Optional[str] = No
     corr_matrix = df[correlation_cols].corr(method='spearman')
     
     print("Correlation Matrix:")
-    corr_display = corr_matrix.copy()
-    corr_display.columns = ['Items Sold', 'Review Score', 'Delivery Days']
-    corr_display.index = ['Items Sold', 'Review Score', 'Delivery Days']
-    print(corr_display.round(3).to_string())
+    if not is_quiet():
+        corr_display = corr_matrix.copy()
+        corr_display.columns = ['Items Sold', 'Review Score', 'Delivery Days']
+        corr_display.index = ['Items Sold', 'Review Score', 'Delivery Days']
+        print(corr_display.round(3).to_string())
     print()
     
     # Interpret correlations
@@ -490,40 +624,37 @@ def create_product_performance_report(df: pd.DataFrame, path: Optional[str] = No
     }
     
     # Populate top performers by items sold
-    for _, row in top_by_items.iterrows():
-        output['top_performers']['by_items_sold']['data'].append({
-            "product_id": str(row['product_id']),
-            "product_category_name": str(row['product_category_name']),
-            "total_items_sold": int(row['total_items_sold']),
-            "total_orders": int(row['total_orders']),
-            "total_revenue": round(float(row['total_revenue']), 2),
-            "avg_review_score": round(float(row['avg_review_score']), 2),
-            "avg_delivery_days": round(float(row['avg_delivery_days']), 2)
-        })
+    output['top_performers']['by_items_sold']['data'].extend(frame_to_records(top_by_items, [
+        Field("product_id", "product_id", "str"),
+        Field("product_category_name", "product_category_name", "str"),
+        Field("total_items_sold", "total_items_sold", "int"),
+        Field("total_orders", "total_orders", "int"),
+        Field("total_revenue", "total_revenue", "float", 2),
+        Field("avg_review_score", "avg_review_score", "float", 2),
+        Field("avg_delivery_days", "avg_delivery_days", "float", 2),
+    ]))
     
     # Populate top performers by revenue
-    for _, row in top_by_revenue.iterrows():
-        output['top_performers']['by_revenue']['data'].append({
-            "product_id": str(row['product_id']),
-            "product_category_name": str(row['product_category_name']),
-            "total_revenue": round(float(row['total_revenue']), 2),
-            "total_items_sold": int(row['total_items_sold']),
-            "total_orders": int(row['total_orders']),
-            "avg_review_score": round(float(row['avg_review_score']), 2),
-            "avg_delivery_days": round(float(row['avg_delivery_days']), 2)
-        })
+    output['top_performers']['by_revenue']['data'].extend(frame_to_records(top_by_revenue, [
+        Field("product_id", "product_id", "str"),
+        Field("product_category_name", "product_category_name", "str"),
+        Field("total_revenue", "total_revenue", "float", 2),
+        Field("total_items_sold", "total_items_sold", "int"),
+        Field("total_orders", "total_orders", "int"),
+        Field("avg_review_score", "avg_review_score", "float", 2),
+        Field("avg_delivery_days", "avg_delivery_days", "float", 2),
+    ]))
     
     # Populate bottom performers
-    for _, row in bottom_by_items.iterrows():
-        output['bottom_performers']['data'].append({
-            "product_id": str(row['product_id']),
-            "product_category_name": str(row['product_category_name']),
-            "total_items_sold": int(row['total_items_sold']),
-            "total_orders": int(row['total_orders']),
-            "total_revenue": round(float(row['total_revenue']), 2),
-            "avg_review_score": round(float(row['avg_review_score']), 2),
-            "avg_delivery_days": round(float(row['avg_delivery_days']), 2)
-        })
+    output['bottom_performers']['data'].extend(frame_to_records(bottom_by_items, [
+        Field("product_id", "product_id", "str"),
+        Field("product_category_name", "product_category_name", "str"),
+        Field("total_items_sold", "total_items_sold", "int"),
+        Field("total_orders", "total_orders", "int"),
+        Field("total_revenue", "total_revenue", "float", 2),
+        Field("avg_review_score", "avg_review_score", "float", 2),
+        Field("avg_delivery_days", "avg_delivery_days", "float", 2),
+    ]))
     
     # Save to file if path is provided
     if path:
@@ -542,6 +673,22 @@ def create_product_performance_report(df: pd.DataFrame, path: Optional[str] = No
 #### Product Category Performance  
 ###################################################################################################################
 
+# Console table columns shared by the top and bottom category tables
+CATEGORY_TABLE_COLUMNS = [
+    Column('product_category_name', 'Category'),
+    Column('total_items_sold', 'Items Sold'),
+    Column('items_percentage', 'Items %', 'percent'),
+    Column('total_revenue', 'Revenue', 'currency'),
+    Column('revenue_percentage', 'Revenue %', 'percent'),
+]
+CATEGORY_REVENUE_TABLE_COLUMNS = [
+    Column('product_category_name', 'Category'),
+    Column('total_revenue', 'Revenue', 'currency'),
+    Column('revenue_percentage', 'Revenue %', 'percent'),
+    Column('total_items_sold', 'Items Sold'),
+    Column('items_percentage', 'Items %', 'percent'),
+]
+
 def create_category_performance_report(df: pd.DataFrame, path: Optional[str] = None) -> Dict[str, Any]:
     """
     Analyze product category performance and create a comprehensive report.
@@ -551,6 +698,7 @@ def create_category_performance_report(df: pd.DataFrame, path: Optional[str] = N
         - product_category_name, total_items_sold, total_revenue
     path : If provided, saves JSON to this path.
     """
+    df = as_pandas(df)
     
     print("="*80)
     print("              *** Product Category Performance Analysis Report ***")
@@ -568,62 +716,45 @@ def create_category_performance_report(df: pd.DataFrame, path: Optional[str] = N
     print(f"Total Revenue: ${total_revenue:,.2f}")
     print(f"Total Items Sold: {total_items_sold:,}")
     print("-" * 80)
+
+    # Top and bottom lists, selected in one call (see rankings.py)
+    rankings = select_rankings(df, {
+        "top_by_items": Ranking('total_items_sold', 10),
+        "top_by_revenue": Ranking('total_revenue', 10),
+        "bottom_by_revenue": Ranking('total_revenue', 10, largest=False),
+    })
     
     # --- Top 10 Categories by Items Sold (High Demand) ---
     print("\n### Top 10 Categories by Items Sold (High Demand) ###")
-    top_by_items = df.nlargest(10, 'total_items_sold').copy()
+    top_by_items = rankings['top_by_items']
     
     # Calculate percentage of total
     top_by_items['items_percentage'] = (top_by_items['total_items_sold'] / total_items_sold * 100).round(2)
     top_by_items['revenue_percentage'] = (top_by_items['total_revenue'] / total_revenue * 100).round(2)
     
-    top_items_display = top_by_items[['product_category_name', 'total_items_sold', 
-                                       'items_percentage', 'total_revenue', 
-                                       'revenue_percentage']].copy()
-    top_items_display['total_revenue'] = top_items_display['total_revenue'].apply(lambda x: f"${x:,.2f}")
-    top_items_display['items_percentage'] = top_items_display['items_percentage'].apply(lambda x: f"{x}%")
-    top_items_display['revenue_percentage'] = top_items_display['revenue_percentage'].apply(lambda x: f"{x}%")
-    top_items_display.columns = ['Category', 'Items Sold', 'Items %', 'Revenue', 'Revenue %']
-    
-    print(top_items_display.to_string(index=False))
+    print_table(top_by_items, CATEGORY_TABLE_COLUMNS)
     print("-" * 80)
     
     # --- Top 10 Categories by Revenue ---
     print("\n### Top 10 Categories by Revenue (Highest Revenue) ###")
-    top_by_revenue = df.nlargest(10, 'total_revenue').copy()
+    top_by_revenue = rankings['top_by_revenue']
     
     # Calculate percentage of total
     top_by_revenue['revenue_percentage'] = (top_by_revenue['total_revenue'] / total_revenue * 100).round(2)
     top_by_revenue['items_percentage'] = (top_by_revenue['total_items_sold'] / total_items_sold * 100).round(2)
     
-    top_revenue_display = top_by_revenue[['product_category_name', 'total_revenue',
-                                           'revenue_percentage', 'total_items_sold', 
-                                           'items_percentage']].copy()
-    top_revenue_display['total_revenue'] = top_revenue_display['total_revenue'].apply(lambda x: f"${x:,.2f}")
-    top_revenue_display['revenue_percentage'] = top_revenue_display['revenue_percentage'].apply(lambda x: f"{x}%")
-    top_revenue_display['items_percentage'] = top_revenue_display['items_percentage'].apply(lambda x: f"{x}%")
-    top_revenue_display.columns = ['Category', 'Revenue', 'Revenue %', 'Items Sold', 'Items %']
-    
-    print(top_revenue_display.to_string(index=False))
+    print_table(top_by_revenue, CATEGORY_REVENUE_TABLE_COLUMNS)
     print("-" * 80)
     
     # --- Bottom 10 Categories (Worst Selling) ---
     print("\n### Bottom 10 Categories by Revenue (Worst Selling) ###")
-    bottom_by_items = df.nsmallest(10, 'total_revenue').copy()
+    bottom_by_items = rankings['bottom_by_revenue']
     
     # Calculate percentage of total
     bottom_by_items['items_percentage'] = (bottom_by_items['total_items_sold'] / total_items_sold * 100).round(2)
     bottom_by_items['revenue_percentage'] = (bottom_by_items['total_revenue'] / total_revenue * 100).round(2)
     
-    bottom_items_display = bottom_by_items[['product_category_name', 'total_items_sold',
-                                             'items_percentage', 'total_revenue', 
-                                             'revenue_percentage']].copy()
-    bottom_items_display['total_revenue'] = bottom_items_display['total_revenue'].apply(lambda x: f"${x:,.2f}")
-    bottom_items_display['items_percentage'] = bottom_items_display['items_percentage'].apply(lambda x: f"{x}%")
-    bottom_items_display['revenue_percentage'] = bottom_items_display['revenue_percentage'].apply(lambda x: f"{x}%")
-    bottom_items_display.columns = ['Category', 'Items Sold', 'Items %', 'Revenue', 'Revenue %']
-    
-    print(bottom_items_display.to_string(index=False))
+    print_table(bottom_by_items, CATEGORY_TABLE_COLUMNS)
     print("-" * 80)
     
     # --- Category Concentration Analysis ---
@@ -638,7 +769,7 @@ def create_category_performance_report(df: pd.DataFrame, path: Optional[str] = N
     print(f"Top {top_20_pct_categories} categories account for 80% of revenue")
     print(f"  → Revenue concentration ratio: {top_20_pct_categories}/{total_categories} = {(top_20_pct_categories/total_categories*100):.1f}%")
     
-    top_5_revenue_share = (df.nlargest(5, 'total_revenue')['total_revenue'].sum() / total_revenue * 100)
+    top_5_revenue_share = (top_by_revenue['total_revenue'].head(5).sum() / total_revenue * 100)
     print(f"Top 5 categories account for {top_5_revenue_share:.1f}% of total revenue")
     
     print("\n" + "="*80)
@@ -678,37 +809,31 @@ def create_category_performance_report(df: pd.DataFrame, path: Optional[str] = N
     }
     
     # Populate top performers by items sold
-    top_by_items_reset = top_by_items.reset_index(drop=True)
-    for _, row in top_by_items_reset.iterrows():
-        output['top_performers']['by_items_sold']['data'].append({
-            "product_category_name": str(row['product_category_name']),
-            "total_items_sold": int(row['total_items_sold']),
-            "items_percentage": float(row['items_percentage']),
-            "total_revenue": round(float(row['total_revenue']), 2),
-            "revenue_percentage": float(row['revenue_percentage'])
-        })
+    output['top_performers']['by_items_sold']['data'].extend(frame_to_records(top_by_items, [
+        Field("product_category_name", "product_category_name", "str"),
+        Field("total_items_sold", "total_items_sold", "int"),
+        Field("items_percentage", "items_percentage", "float"),
+        Field("total_revenue", "total_revenue", "float", 2),
+        Field("revenue_percentage", "revenue_percentage", "float"),
+    ]))
     
     # Populate top performers by revenue
-    top_by_revenue_reset = top_by_revenue.reset_index(drop=True)
-    for _, row in top_by_revenue_reset.iterrows():
-        output['top_performers']['by_revenue']['data'].append({
-            "product_category_name": str(row['product_category_name']),
-            "total_revenue": round(float(row['total_revenue']), 2),
-            "revenue_percentage": float(row['revenue_percentage']),
-            "total_items_sold": int(row['total_items_sold']),
-            "items_percentage": float(row['items_percentage'])
-        })
+    output['top_performers']['by_revenue']['data'].extend(frame_to_records(top_by_revenue, [
+        Field("product_category_name", "product_category_name", "str"),
+        Field("total_revenue", "total_revenue", "float", 2),
+        Field("revenue_percentage", "revenue_percentage", "float"),
+        Field("total_items_sold", "total_items_sold", "int"),
+        Field("items_percentage", "items_percentage", "float"),
+    ]))
     
     # Populate bottom performers
-    bottom_by_items_reset = bottom_by_items.reset_index(drop=True)
-    for _, row in bottom_by_items_reset.iterrows():
-        output['bottom_performers']['data'].append({
-            "product_category_name": str(row['product_category_name']),
-            "total_items_sold": int(row['total_items_sold']),
-            "items_percentage": float(row['items_percentage']),
-            "total_revenue": round(float(row['total_revenue']), 2),
-            "revenue_percentage": float(row['revenue_percentage'])
-        })
+    output['bottom_performers']['data'].extend(frame_to_records(bottom_by_items, [
+        Field("product_category_name", "product_category_name", "str"),
+        Field("total_items_sold", "total_items_sold", "int"),
+        Field("items_percentage", "items_percentage", "float"),
+        Field("total_revenue", "total_revenue", "float", 2),
+        Field("revenue_percentage", "revenue_percentage", "float"),
+    ]))
     
     # Save to file if path is provided
     if path:
@@ -723,7 +848,133 @@ def create_category_performance_report(df: pd.DataFrame, path: Optional[str] = N
 ###################################################################################################################
 #### Sellers Performance  
 ###################################################################################################################
-def create_seller_performance_report(df, path=None):
+# Console table columns shared by the top and bottom sellers by review score
+SELLER_REVIEW_TABLE_COLUMNS = [
+    Column('seller_id', 'Seller ID'),
+    Column('avg_review_score', 'Avg Review', 'decimal_2'),
+    Column('total_orders', 'Orders'),
+    Column('total_revenue', 'Revenue', 'currency'),
+    Column('avg_delivery_days', 'Avg Delivery', 'decimal_1'),
+]
+
+SELLER_REVIEW_BINS = [0, 2.0, 3.0, 4.0, 4.5, 5.0]
+SELLER_REVIEW_LABELS = ['Poor (0-2)', 'Fair (2-3)', 'Good (3-4)', 'Very Good (4-4.5)', 'Excellent (4.5-5)']
+
+def _seller_stats(df):
+    """Seller summary, top/bottom sellers, revenue concentration and review brackets, computed with pandas."""
+    df = as_pandas(df)
+
+    # Data type conversions
+    int_cols = ['total_orders', 'total_items_sold']
+    flt_cols = ['total_revenue', 'avg_delivery_days']
+    df[int_cols] = df[int_cols].astype(int)
+    df[flt_cols] = df[flt_cols].astype(float)
+
+    # Handle review scores separately - convert only non-null values
+    df['avg_review_score'] = pd.to_numeric(df['avg_review_score'], errors='coerce')
+
+    # Create subset for review analysis
+    df_with_reviews = df[df['avg_review_score'].notna()].copy()
+    df_min_orders = df_with_reviews[df_with_reviews['total_orders'] >= 10]
+    total_revenue = float(df['total_revenue'].sum())
+
+    # Sellers needed for 80% of the revenue
+    df_sorted = df.sort_values('total_revenue', ascending=False).copy()
+    df_sorted['cumulative_revenue_pct'] = (df_sorted['total_revenue'].cumsum() / total_revenue * 100)
+
+    review_brackets = pd.cut(df_with_reviews['avg_review_score'], bins=SELLER_REVIEW_BINS,
+                             labels=SELLER_REVIEW_LABELS, right=True, include_lowest=True)
+
+    min_orders = df['avg_review_score'].notna() & (df['total_orders'] >= 10)  # the rows of df_min_orders
+    rankings = select_rankings(df, {
+        "top_by_revenue": Ranking('total_revenue', 10),
+        "top_by_review": Ranking('avg_review_score', 10, where=min_orders),
+        "bottom_by_review": Ranking('avg_review_score', 10, largest=False, where=min_orders),
+    })
+
+    return {
+        "total_sellers": len(df),
+        "sellers_with_reviews": len(df_with_reviews),
+        "total_orders": int(df['total_orders'].sum()),
+        "total_items": int(df['total_items_sold'].sum()),
+        "total_revenue": total_revenue,
+        "avg_delivery": float(df['avg_delivery_days'].mean()),
+        "avg_review": float(df_with_reviews['avg_review_score'].mean()) if len(df_with_reviews) > 0 else 0,
+        "sellers_min_orders": len(df_min_orders),
+        **rankings,
+        "sellers_for_80pct": (df_sorted['cumulative_revenue_pct'] <= 80).sum(),
+        "review_dist": review_brackets.value_counts().sort_index(),
+    }
+
+def _seller_stats_polars(df):
+    """Same as _seller_stats, as Polars lazy queries collected together in one parallel run."""
+    import polars as pl
+
+    lf = _lazy_frame(df).with_columns(
+        pl.col(['total_orders', 'total_items_sold']).cast(pl.Int64),
+        pl.col(['total_revenue', 'avg_delivery_days']).cast(pl.Float64),
+        pl.col('avg_review_score').cast(pl.Float64, strict=False).fill_nan(None),
+    )
+    with_reviews = lf.filter(pl.col('avg_review_score').is_not_null())
+    min_orders = with_reviews.filter(pl.col('total_orders') >= 10)
+    revenue = pl.col('total_revenue')
+
+    summary, reviews, concentration, top_by_revenue, top_by_review, bottom_by_review = pl.collect_all([
+        lf.select(
+            total_sellers=pl.len(),
+            total_orders=pl.col('total_orders').sum(),
+            total_items=pl.col('total_items_sold').sum(),
+            total_revenue=revenue.sum(),
+            avg_delivery=pl.col('avg_delivery_days').mean(),
+        ),
+        with_reviews.select(
+            pl.len().alias('sellers_with_reviews'),
+            pl.col('avg_review_score').mean().alias('avg_review'),
+            (pl.col('total_orders') >= 10).sum().alias('sellers_min_orders'),
+            *_bracket_counts('avg_review_score', SELLER_REVIEW_BINS, SELLER_REVIEW_LABELS, include_lowest=True),
+        ),
+        lf.sort('total_revenue', descending=True, nulls_last=True, maintain_order=True).select(
+            sellers_for_80pct=(revenue.cum_sum() / revenue.sum() * 100 <= 80).sum()),
+        _top_rows(lf, 10, 'total_revenue'),
+        _top_rows(min_orders, 10, 'avg_review_score'),
+        _top_rows(min_orders, 10, 'avg_review_score', largest=False),
+    ])
+
+    stats = {**summary.row(0, named=True), **concentration.row(0, named=True)}
+    reviews = reviews.row(0, named=True)
+    stats["sellers_with_reviews"] = reviews.pop('sellers_with_reviews')
+    stats["sellers_min_orders"] = reviews.pop('sellers_min_orders')
+    stats["avg_review"] = reviews.pop('avg_review') if stats["sellers_with_reviews"] > 0 else 0
+    stats["review_dist"] = reviews  # bracket label -> seller count
+    stats["top_by_revenue"] = top_by_revenue.to_pandas()
+    stats["top_by_review"] = top_by_review.to_pandas()
+    stats["bottom_by_review"] = bottom_by_review.to_pandas()
+    return stats
+
+def _seller_stats_from_aggregates(aggregates):
+    """Same as _seller_stats, from the SellerAggregates computed in the warehouse (see report_pushdown.py)."""
+    summary = as_pandas(aggregates.summary).iloc[0]
+    top = as_pandas(aggregates.top)
+    top = top.astype({'total_orders': int, 'total_items_sold': int,
+                      'total_revenue': float, 'avg_delivery_days': float})
+    top['avg_review_score'] = pd.to_numeric(top['avg_review_score'], errors='coerce')
+
+    def ranking(name, column, largest=True):
+        rows = top[top['ranking'] == name].drop(columns='ranking')
+        return rows.sort_values([column, 'seller_id'], ascending=[not largest, True]).reset_index(drop=True)
+
+    stats = {key: _count(summary[key]) for key in ('total_sellers', 'sellers_with_reviews', 'total_orders',
+                                                    'total_items', 'sellers_min_orders', 'sellers_for_80pct')}
+    stats["total_revenue"] = _mean(summary['total_revenue'])
+    stats["avg_delivery"] = _mean(summary['avg_delivery'])
+    stats["avg_review"] = _mean(summary['avg_review']) if stats["sellers_with_reviews"] > 0 else 0
+    stats["top_by_revenue"] = ranking('top_by_revenue', 'total_revenue')
+    stats["top_by_review"] = ranking('top_by_review', 'avg_review_score')
+    stats["bottom_by_review"] = ranking('bottom_by_review', 'avg_review_score', largest=False)
+    stats["review_dist"] = bracket_counts(summary, 'review', SELLER_REVIEW_LABELS)
+    return stats
+
+def create_seller_performance_report(df, path=None, engine="pandas"):
     """
     Analyze seller performance and create a comprehensive report.
     Parameters:
@@ -731,42 +982,38 @@ def create_seller_performance_report(df, path=None):
     df : Seller performance dataframe with columns:
         - seller_id, total_orders, total_items_sold, total_revenue,
           avg_delivery_days, avg_review_score
+         or the SellerAggregates computed in the warehouse (query mode 'aggregate').
     path : If provided, saves JSON to this path.
+    engine : 'pandas' or 'polars', the engine computing the aggregates (see ANALYSIS_ENGINES).
     """
+    if isinstance(df, SellerAggregates):
+        stats = _seller_stats_from_aggregates(df)
+    else:
+        stats = _run_engine(engine, _seller_stats, _seller_stats_polars, df)
     
     print("="*80)
     print("                 *** Seller Performance Analysis Report ***")
     print("="*80)
     
-    # Data type conversions
-    int_cols = ['total_orders', 'total_items_sold']
-    flt_cols = ['total_revenue', 'avg_delivery_days']
-    df[int_cols] = df[int_cols].astype(int)
-    df[flt_cols] = df[flt_cols].astype(float)
-    
-    # Handle review scores separately - convert only non-null values
-    df['avg_review_score'] = pd.to_numeric(df['avg_review_score'], errors='coerce')
-    
-    # Create subset for review analysis
-    df_with_reviews = df[df['avg_review_score'].notna()].copy()
-    sellers_without_reviews = len(df) - len(df_with_reviews)
+    sellers_with_reviews = stats['sellers_with_reviews']
+    sellers_without_reviews = stats['total_sellers'] - sellers_with_reviews
 
     # --- Overall Summary ---
     print("\n### Overall Summary ###")
-    total_sellers = len(df)
-    total_orders = int(df['total_orders'].sum())
-    total_items = int(df['total_items_sold'].sum())
-    total_revenue = float(df['total_revenue'].sum())
-    avg_delivery = float(df['avg_delivery_days'].mean())
-    avg_review = float(df_with_reviews['avg_review_score'].mean()) if len(df_with_reviews) > 0 else 0
+    total_sellers = stats['total_sellers']
+    total_orders = stats['total_orders']
+    total_items = stats['total_items']
+    total_revenue = stats['total_revenue']
+    avg_delivery = stats['avg_delivery']
+    avg_review = stats['avg_review']
     
     print(f"Total Sellers: {total_sellers:,}")
     print(f"Total Orders: {total_orders:,}")
     print(f"Total Items Sold: {total_items:,}")
     print(f"Total Revenue: ${total_revenue:,.2f}")
     print(f"Average Delivery Time: {avg_delivery:.1f} days")
-    if len(df_with_reviews) > 0:
-        print(f"Average Review Score: {avg_review:.2f} / 5.0 (based on {len(df_with_reviews):,} sellers)")
+    if sellers_with_reviews > 0:
+        print(f"Average Review Score: {avg_review:.2f} / 5.0 (based on {sellers_with_reviews:,} sellers)")
         if sellers_without_reviews > 0:
             print(f"  → {sellers_without_reviews:,} sellers have no reviews yet")
     else:
@@ -775,68 +1022,47 @@ def create_seller_performance_report(df, path=None):
     
     # --- Top 10 Sellers by Revenue ---
     print("\n### Top 10 Sellers by Revenue ###")
-    top_by_revenue = df.nlargest(10, 'total_revenue').copy()
+    top_by_revenue = stats['top_by_revenue']
     
     # Calculate revenue percentage
     top_by_revenue['revenue_pct'] = (top_by_revenue['total_revenue'] / total_revenue * 100).round(2)
     
-    top_revenue_display = top_by_revenue[['seller_id', 'total_revenue', 'revenue_pct', 
-                                           'total_orders', 'avg_review_score', 
-                                           'avg_delivery_days']].copy()
-    top_revenue_display['total_revenue'] = top_revenue_display['total_revenue'].apply(lambda x: f"${x:,.2f}")
-    top_revenue_display['revenue_pct'] = top_revenue_display['revenue_pct'].apply(lambda x: f"{x}%")
-    top_revenue_display['avg_review_score'] = top_revenue_display['avg_review_score'].apply(
-        lambda x: f"{x:.2f}" if pd.notna(x) else "N/A"
-    )
-    top_revenue_display['avg_delivery_days'] = top_revenue_display['avg_delivery_days'].apply(lambda x: f"{x:.1f}")
-    top_revenue_display.columns = ['Seller ID', 'Revenue', 'Revenue %', 'Orders', 'Avg Review', 'Avg Delivery']
-    
-    print(top_revenue_display.to_string(index=False))
+    print_table(top_by_revenue, [
+        Column('seller_id', 'Seller ID'),
+        Column('total_revenue', 'Revenue', 'currency'),
+        Column('revenue_pct', 'Revenue %', 'percent'),
+        Column('total_orders', 'Orders'),
+        Column('avg_review_score', 'Avg Review', 'decimal_2', na="N/A"),
+        Column('avg_delivery_days', 'Avg Delivery', 'decimal_1'),
+    ])
     print("-" * 80)
     
     # --- Top 10 Sellers by Review Score (min 10 orders) ---
     print("\n### Top 10 Sellers by Review Score (min 10 orders) ###")
-    df_min_orders = df_with_reviews[df_with_reviews['total_orders'] >= 10].copy()
+    sellers_min_orders = stats['sellers_min_orders']
     
-    if len(df_min_orders) > 0:
-        top_by_review = df_min_orders.nlargest(10, 'avg_review_score').copy()
-        
-        top_review_display = top_by_review[['seller_id', 'avg_review_score', 'total_orders',
-                                             'total_revenue', 'avg_delivery_days']].copy()
-        top_review_display['avg_review_score'] = top_review_display['avg_review_score'].apply(lambda x: f"{x:.2f}")
-        top_review_display['total_revenue'] = top_review_display['total_revenue'].apply(lambda x: f"${x:,.2f}")
-        top_review_display['avg_delivery_days'] = top_review_display['avg_delivery_days'].apply(lambda x: f"{x:.1f}")
-        top_review_display.columns = ['Seller ID', 'Avg Review', 'Orders', 'Revenue', 'Avg Delivery']
+    if sellers_min_orders > 0:
+        top_by_review = stats['top_by_review']
         
-        print(top_review_display.to_string(index=False))
+        print_table(top_by_review, SELLER_REVIEW_TABLE_COLUMNS)
     else:
         print("No sellers with >= 10 orders and reviews found")
     print("-" * 80)
     
     # --- Bottom 10 Sellers by Review Score (min 10 orders) ---
     print("\n### Bottom 10 Sellers by Review Score (min 10 orders) ###")
-    if len(df_min_orders) > 0:
-        bottom_by_review = df_min_orders.nsmallest(10, 'avg_review_score').copy()
+    if sellers_min_orders > 0:
+        bottom_by_review = stats['bottom_by_review']
         
-        bottom_review_display = bottom_by_review[['seller_id', 'avg_review_score', 'total_orders',
-                                                   'total_revenue', 'avg_delivery_days']].copy()
-        bottom_review_display['avg_review_score'] = bottom_review_display['avg_review_score'].apply(lambda x: f"{x:.2f}")
-        bottom_review_display['total_revenue'] = bottom_review_display['total_revenue'].apply(lambda x: f"${x:,.2f}")
-        bottom_review_display['avg_delivery_days'] = bottom_review_display['avg_delivery_days'].apply(lambda x: f"{x:.1f}")
-        bottom_review_display.columns = ['Seller ID', 'Avg Review', 'Orders', 'Revenue', 'Avg Delivery']
-        
-        print(bottom_review_display.to_string(index=False))
+        print_table(bottom_by_review, SELLER_REVIEW_TABLE_COLUMNS)
     else:
         print("No sellers with >= 10 orders and reviews found")
     print("-" * 80)
     
     # --- Seller Concentration Analysis ---
     print("\n### Seller Concentration Analysis ###")
-    df_sorted = df.sort_values('total_revenue', ascending=False).copy()
-    df_sorted['cumulative_revenue_pct'] = (df_sorted['total_revenue'].cumsum() / total_revenue * 100)
-    
-    sellers_for_80pct = (df_sorted['cumulative_revenue_pct'] <= 80).sum()
-    top_10_revenue_share = (df.nlargest(10, 'total_revenue')['total_revenue'].sum() / total_revenue * 100)
+    sellers_for_80pct = stats['sellers_for_80pct']
+    top_10_revenue_share = (top_by_revenue['total_revenue'].sum() / total_revenue * 100)
     
     print(f"Top {sellers_for_80pct} sellers account for 80% of revenue")
     print(f"  → Concentration ratio: {sellers_for_80pct}/{total_sellers} = {(sellers_for_80pct/total_sellers*100):.1f}%")
@@ -844,18 +1070,13 @@ def create_seller_performance_report(df, path=None):
     print("-" * 80)
     
     # --- Review Score Distribution (only for sellers with reviews) ---
-    if len(df_with_reviews) > 0:
+    review_dist = stats['review_dist']
+    if sellers_with_reviews > 0:
         print("\n### Review Score Distribution ###")
-        print(f"(Based on {len(df_with_reviews):,} sellers with reviews)")
-        review_bins = [0, 2.0, 3.0, 4.0, 4.5, 5.0]
-        review_labels = ['Poor (0-2)', 'Fair (2-3)', 'Good (3-4)', 'Very Good (4-4.5)', 'Excellent (4.5-5)']
-        df_with_reviews['review_bracket'] = pd.cut(df_with_reviews['avg_review_score'], bins=review_bins, 
-                                                     labels=review_labels, right=True, include_lowest=True)
-        
-        review_dist = df_with_reviews['review_bracket'].value_counts().sort_index()
-        for bracket in review_labels:
+        print(f"(Based on {sellers_with_reviews:,} sellers with reviews)")
+        for bracket in SELLER_REVIEW_LABELS:
             count = review_dist.get(bracket, 0)
-            pct = (count / len(df_with_reviews) * 100) if len(df_with_reviews) > 0 else 0
+            pct = (count / sellers_with_reviews * 100) if sellers_with_reviews > 0 else 0
             print(f"{bracket:22s}: {count:5,} sellers ({pct:5.1f}%)")
         print("-" * 80)
     else:
@@ -871,13 +1092,13 @@ def create_seller_performance_report(df, path=None):
         
         "summary": {
             "total_sellers": int(total_sellers),
-            "sellers_with_reviews": int(len(df_with_reviews)),
+            "sellers_with_reviews": int(sellers_with_reviews),
             "sellers_without_reviews": int(sellers_without_reviews),
             "total_orders": int(total_orders),
             "total_items_sold": int(total_items),
             "total_revenue": round(float(total_revenue), 2),
             "avg_delivery_days": round(float(avg_delivery), 1),
-            "avg_review_score": round(float(avg_review), 2) if len(df_with_reviews) > 0 else None
+            "avg_review_score": round(float(avg_review), 2) if sellers_with_reviews > 0 else None
         },
         
         "top_performers": {
@@ -910,46 +1131,39 @@ def create_seller_performance_report(df, path=None):
     }
     
     # Populate top performers by revenue
-    top_by_revenue_reset = top_by_revenue.reset_index(drop=True)
-    for _, row in top_by_revenue_reset.iterrows():
-        output['top_performers']['by_revenue']['data'].append({
-            "seller_id": str(row['seller_id']),
-            "total_revenue": round(float(row['total_revenue']), 2),
-            "revenue_percentage": float(row['revenue_pct']),
-            "total_orders": int(row['total_orders']),
-            "avg_review_score": round(float(row['avg_review_score']), 2) if pd.notna(row['avg_review_score']) else None,
-            "avg_delivery_days": round(float(row['avg_delivery_days']), 1)
-        })
+    output['top_performers']['by_revenue']['data'].extend(frame_to_records(top_by_revenue, [
+        Field("seller_id", "seller_id", "str"),
+        Field("total_revenue", "total_revenue", "float", 2),
+        Field("revenue_percentage", "revenue_pct", "float"),
+        Field("total_orders", "total_orders", "int"),
+        Field("avg_review_score", "avg_review_score", "float", 2, nullable=True),
+        Field("avg_delivery_days", "avg_delivery_days", "float", 1),
+    ]))
     
     # Populate top performers by review score
-    if len(df_min_orders) > 0:
-        top_by_review_reset = top_by_review.reset_index(drop=True)
-        for _, row in top_by_review_reset.iterrows():
-            output['top_performers']['by_review_score']['data'].append({
-                "seller_id": str(row['seller_id']),
-                "avg_review_score": round(float(row['avg_review_score']), 2),
-                "total_orders": int(row['total_orders']),
-                "total_revenue": round(float(row['total_revenue']), 2),
-                "avg_delivery_days": round(float(row['avg_delivery_days']), 1)
-            })
+    if sellers_min_orders > 0:
+        output['top_performers']['by_review_score']['data'].extend(frame_to_records(top_by_review, [
+            Field("seller_id", "seller_id", "str"),
+            Field("avg_review_score", "avg_review_score", "float", 2),
+            Field("total_orders", "total_orders", "int"),
+            Field("total_revenue", "total_revenue", "float", 2),
+            Field("avg_delivery_days", "avg_delivery_days", "float", 1),
+        ]))
         
         # Populate bottom performers by review score
-        bottom_by_review_reset = bottom_by_review.reset_index(drop=True)
-        for _, row in bottom_by_review_reset.iterrows():
-            output['bottom_performers']['data'].append({
-                "seller_id": str(row['seller_id']),
-                "avg_review_score": round(float(row['avg_review_score']), 2),
-                "total_orders": int(row['total_orders']),
-                "total_revenue": round(float(row['total_revenue']), 2),
-                "avg_delivery_days": round(float(row['avg_delivery_days']), 1)
-            })
+        output['bottom_performers']['data'].extend(frame_to_records(bottom_by_review, [
+            Field("seller_id", "seller_id", "str"),
+            Field("avg_review_score", "avg_review_score", "float", 2),
+            Field("total_orders", "total_orders", "int"),
+            Field("total_revenue", "total_revenue", "float", 2),
+            Field("avg_delivery_days", "avg_delivery_days", "float", 1),
+        ]))
     
     # Populate review score distribution
-    if len(df_with_reviews) > 0:
-        review_dist = df_with_reviews['review_bracket'].value_counts().sort_index()
-        for bracket in review_labels:
+    if sellers_with_reviews > 0:
+        for bracket in SELLER_REVIEW_LABELS:
             count = int(review_dist.get(bracket, 0))
-            pct = (count / len(df_with_reviews) * 100) if len(df_with_reviews) > 0 else 0
+            pct = (count / sellers_with_reviews * 100) if sellers_with_reviews > 0 else 0
             output['review_score_distribution']['data'].append({
                 "bracket": bracket,
                 "seller_count": count,
@@ -971,33 +1185,197 @@ def create_seller_performance_report(df, path=None):
 #### Delivery Performance 
 ###################################################################################################################
 
-def create_delivery_performance_report(df, path = None):
+# Console table columns shared by the top and bottom sellers by on-time rate
+DELIVERY_SELLER_TABLE_COLUMNS = [
+    Column('seller_id', 'Seller ID'),
+    Column('total_orders', 'Total Orders'),
+    Column('on_time_orders', 'On-Time'),
+    Column('on_time_rate', 'On-Time Rate', 'percent'),
+    Column('avg_delivery_days', 'Avg Delivery', 'decimal_2'),
+    Column('avg_delay', 'Avg Delay', 'decimal_2'),
+]
+
+# Delivery, delay and fulfillment brackets (right-closed intervals, as pd.cut)
+DELIVERY_BINS = [0, 7, 14, 21, 30, float('inf')]
+DELIVERY_LABELS = ['0-7 days', '8-14 days', '15-21 days', '22-30 days', '30+ days']
+DELAY_BINS = [1, 3, 7, 14, float('inf')]
+DELAY_LABELS = ['1-3 days late', '4-7 days late', '8-14 days late', '14+ days late']
+FULFILLMENT_BINS = [0, 1, 3, 7, float('inf')]
+FULFILLMENT_LABELS = ['Same day', '2-3 days', '4-7 days', '7+ days']
+
+def _bracket_histogram(positions, bins, labels, weights=None):
+    """
+    Counts per pd.cut bracket from np.searchsorted(bins, values, side='left') positions:
+    position i falls in (bins[i-1], bins[i]]; 0 and len(bins) are outside every bracket.
+    `weights` (a boolean mask) restricts the counts to a subset of rows without copying it.
+    """
+    counts = np.bincount(positions, weights=weights, minlength=len(bins) + 1)[1:len(bins)]
+    return dict(zip(labels, counts.astype(np.int64).tolist()))
+
+def _delivery_stats(df):
+    """
+    Delivery summary, bracket histograms and per-seller on-time stats, computed with NumPy in
+    one vectorized pass over the columns: brackets come from np.searchsorted on the bracket
+    edges and np.bincount, late-order and per-seller figures from weighted bincounts. The
+    input frame is neither copied nor modified.
+    """
+    df = as_pandas(df)
+
+    actual = df['actual_delivery_days'].to_numpy(dtype=np.int64)
+    delay = df['delay_vs_estimate'].to_numpy(dtype=np.int64)
+    fulfillment = df['fulfillment_days'].to_numpy(dtype=np.int64)
+    on_time = df['on_time_flag'].to_numpy(dtype=bool)
+    late = ~on_time
+    total_orders = len(df)
+    late_orders = int(late.sum())
+
+    stats = {
+        "total_orders": total_orders,
+        "total_on_time": total_orders - late_orders,
+        # Integer sums are exact, so these equal the pandas means
+        "avg_actual_delivery": float(actual.sum() / total_orders) if total_orders else float('nan'),
+        "avg_fulfillment": float(fulfillment.sum() / total_orders) if total_orders else float('nan'),
+        "avg_delay": float(delay.sum() / total_orders) if total_orders else float('nan'),
+        "delivery_dist": _bracket_histogram(np.searchsorted(DELIVERY_BINS, actual), DELIVERY_BINS, DELIVERY_LABELS),
+        "fulfillment_dist": _bracket_histogram(np.searchsorted(FULFILLMENT_BINS, fulfillment),
+                                               FULFILLMENT_BINS, FULFILLMENT_LABELS),
+        "late_orders": late_orders,
+    }
+    if late_orders > 0:
+        stats["avg_late_delay"] = float(delay.sum(where=late) / late_orders)
+        stats["max_delay"] = int(delay.max(where=late, initial=np.iinfo(np.int64).min))
+        stats["min_delay"] = int(delay.min(where=late, initial=np.iinfo(np.int64).max))
+        stats["delay_dist"] = _bracket_histogram(np.searchsorted(DELAY_BINS, delay), DELAY_BINS, DELAY_LABELS,
+                                                 weights=late)
+
+    # Per-seller stats: sellers are numbered in sorted order, as groupby('seller_id') lists them
+    codes, sellers = pd.factorize(df['seller_id'], sort=True)
+    in_group = codes >= 0
+    if in_group.all():
+        in_group = None
+    else:  # rows without a seller belong to no group
+        codes = np.where(in_group, codes, 0)
+
+    def per_seller(weights=None):
+        if in_group is not None:
+            weights = in_group if weights is None else weights * in_group
+        return np.bincount(codes, weights=weights, minlength=len(sellers))
+
+    group_rows = per_seller()
+    stats["seller_stats"] = pd.DataFrame({
+        'seller_id': sellers,
+        'total_orders': per_seller(df['order_id'].notna().to_numpy()).astype(np.int64),  # 'count' skips missing ids
+        'on_time_orders': per_seller(on_time).astype(np.int64),
+        # Group sums of integers are exact in float64, so these equal the groupby means
+        'avg_delivery_days': per_seller(actual) / group_rows,
+        'avg_delay': per_seller(delay) / group_rows,
+    })
+    return stats
+
+def _delivery_stats_polars(df):
+    """Same as _delivery_stats, as Polars lazy queries collected together in one parallel run."""
+    import polars as pl
+
+    lf = _lazy_frame(df).with_columns(
+        pl.col(['actual_delivery_days', 'delay_vs_estimate', 'fulfillment_days']).cast(pl.Int64),
+        pl.col('on_time_flag').cast(pl.Boolean),
+    )
+    late = pl.col('on_time_flag').not_()
+
+    summary, late_stats, seller_stats = pl.collect_all([
+        lf.select(
+            pl.len().alias('total_orders'),
+            pl.col('on_time_flag').sum().alias('total_on_time'),
+            pl.col('actual_delivery_days').mean().alias('avg_actual_delivery'),
+            pl.col('fulfillment_days').mean().alias('avg_fulfillment'),
+            pl.col('delay_vs_estimate').mean().alias('avg_delay'),
+            *_bracket_counts('actual_delivery_days', DELIVERY_BINS, DELIVERY_LABELS),
+            *_bracket_counts('fulfillment_days', FULFILLMENT_BINS, FULFILLMENT_LABELS),
+        ),
+        lf.filter(late).select(
+            pl.len().alias('late_orders'),
+            pl.col('delay_vs_estimate').mean().alias('avg_late_delay'),
+            pl.col('delay_vs_estimate').max().alias('max_delay'),
+            pl.col('delay_vs_estimate').min().alias('min_delay'),
+            *_bracket_counts('delay_vs_estimate', DELAY_BINS, DELAY_LABELS),
+        ),
+        lf.filter(pl.col('seller_id').is_not_null()).group_by('seller_id').agg(
+            total_orders=pl.col('order_id').count(),
+            on_time_orders=pl.col('on_time_flag').sum(),
+            avg_delivery_days=pl.col('actual_delivery_days').mean(),
+            avg_delay=pl.col('delay_vs_estimate').mean(),
+        ).sort('seller_id'),
+    ])
+
+    summary = summary.row(0, named=True)
+    late_stats = late_stats.row(0, named=True)
+    stats = {key: summary[key] for key in ('total_orders', 'total_on_time', 'avg_actual_delivery',
+                                           'avg_fulfillment', 'avg_delay')}
+    stats["delivery_dist"] = {label: summary[label] for label in DELIVERY_LABELS}
+    stats["fulfillment_dist"] = {label: summary[label] for label in FULFILLMENT_LABELS}
+    stats["late_orders"] = late_stats['late_orders']
+    if stats["late_orders"] > 0:
+        for key in ('avg_late_delay', 'max_delay', 'min_delay'):
+            stats[key] = late_stats[key]
+        stats["delay_dist"] = {label: late_stats[label] for label in DELAY_LABELS}
+    stats["seller_stats"] = seller_stats.to_pandas()
+    return stats
+
+def _delivery_stats_from_aggregates(aggregates):
+    """
+    Same as _delivery_stats, from the DeliveryAggregates computed in the warehouse (see
+    report_pushdown.py). seller_stats only lists the sellers with at least 10 orders.
+    """
+    summary = as_pandas(aggregates.summary).iloc[0]
+    stats = {
+        "total_orders": _count(summary['total_orders']),
+        "total_on_time": _count(summary['total_on_time']),
+        "avg_actual_delivery": _mean(summary['avg_actual_delivery']),
+        "avg_fulfillment": _mean(summary['avg_fulfillment']),
+        "avg_delay": _mean(summary['avg_delay']),
+        "delivery_dist": bracket_counts(summary, 'delivery', DELIVERY_LABELS),
+        "fulfillment_dist": bracket_counts(summary, 'fulfillment', FULFILLMENT_LABELS),
+        "late_orders": _count(summary['late_orders']),
+    }
+    if stats["late_orders"] > 0:
+        stats["avg_late_delay"] = _mean(summary['avg_late_delay'])
+        stats["max_delay"] = int(summary['max_delay'])
+        stats["min_delay"] = int(summary['min_delay'])
+        stats["delay_dist"] = bracket_counts(summary, 'delay', DELAY_LABELS)
+    stats["seller_stats"] = as_pandas(aggregates.sellers).astype({
+        'total_orders': np.int64, 'on_time_orders': np.int64,
+        'avg_delivery_days': np.float64, 'avg_delay': np.float64})
+    return stats
+
+def create_delivery_performance_report(df, path = None, engine="pandas"):
     """
     Analyze delivery performance and create a comprehensive report.
     Parameters:
     -----------
     df : Delivery performance dataframe with columns:
         - order_id, seller_id, actual_delivery_days, fulfillment_days, delay_vs_estimate, on_time_flag
+         or the DeliveryAggregates computed in the warehouse (query mode 'aggregate').
     path : If provided, saves JSON to this path.
+    engine : 'pandas' or 'polars', the engine computing the aggregates (see ANALYSIS_ENGINES).
     """
+    if isinstance(df, DeliveryAggregates):
+        stats = _delivery_stats_from_aggregates(df)
+    else:
+        stats = _run_engine(engine, _delivery_stats, _delivery_stats_polars, df)
     
     print("="*80)
     print("                *** Delivery Performance Analysis Report ***")
     print("="*80)
     
-    # Data type conversions
-    df[['actual_delivery_days', 'delay_vs_estimate', 'fulfillment_days']] = df[['actual_delivery_days', 'delay_vs_estimate', 'fulfillment_days']].astype(int)
-    df['on_time_flag'] = df['on_time_flag'].astype(bool)
-
     # --- Overall Summary ---
     print("\n### Overall Summary ###")
-    total_orders = len(df)
-    total_on_time = int(df['on_time_flag'].sum())
+    total_orders = stats['total_orders']
+    total_on_time = stats['total_on_time']
     on_time_rate = (total_on_time / total_orders * 100) if total_orders > 0 else 0
     
-    avg_actual_delivery = float(df['actual_delivery_days'].mean())
-    avg_fulfillment = float(df['fulfillment_days'].mean())
-    avg_delay = float(df['delay_vs_estimate'].mean())
+    avg_actual_delivery = stats['avg_actual_delivery']
+    avg_fulfillment = stats['avg_fulfillment']
+    avg_delay = stats['avg_delay']
     
     print(f"Total Orders: {total_orders:,}")
     print(f"On-Time Deliveries: {total_on_time:,} ({on_time_rate:.2f}%)")
@@ -1009,12 +1387,8 @@ def create_delivery_performance_report(df, path = None):
     
     # --- Delivery Time Distribution ---
     print("\n### Delivery Time Distribution ###")
-    delivery_bins = [0, 7, 14, 21, 30, float('inf')]
-    delivery_labels = ['0-7 days', '8-14 days', '15-21 days', '22-30 days', '30+ days']
-    df['delivery_bracket'] = pd.cut(df['actual_delivery_days'], bins=delivery_bins, labels=delivery_labels, right=True)
-    
-    delivery_dist = df['delivery_bracket'].value_counts().sort_index()
-    for bracket in delivery_labels:
+    delivery_dist = stats['delivery_dist']
+    for bracket in DELIVERY_LABELS:
         count = delivery_dist.get(bracket, 0)
         pct = (count / total_orders * 100) if total_orders > 0 else 0
         print(f"{bracket:15s}: {count:7,} orders ({pct:5.2f}%)")
@@ -1022,27 +1396,23 @@ def create_delivery_performance_report(df, path = None):
     
     # --- Delay Analysis ---
     print("\n### Delay Analysis ###")
-    late_orders = df[~df['on_time_flag']].copy()
-    if len(late_orders) > 0:
-        avg_late_delay = float(late_orders['delay_vs_estimate'].mean())
-        max_delay = int(late_orders['delay_vs_estimate'].max())
-        min_delay = int(late_orders['delay_vs_estimate'].min())
+    late_orders = stats['late_orders']
+    if late_orders > 0:
+        avg_late_delay = stats['avg_late_delay']
+        max_delay = stats['max_delay']
+        min_delay = stats['min_delay']
         
-        print(f"Late Orders: {len(late_orders):,}")
+        print(f"Late Orders: {late_orders:,}")
         print(f"Average Delay (late orders only): {avg_late_delay:.2f} days")
         print(f"Maximum Delay: {max_delay} days")
         print(f"Minimum Delay: {min_delay} days")
         
         # Delay severity distribution
-        delay_bins = [1, 3, 7, 14, float('inf')]
-        delay_labels = ['1-3 days late', '4-7 days late', '8-14 days late', '14+ days late']
-        late_orders['delay_bracket'] = pd.cut(late_orders['delay_vs_estimate'], bins=delay_bins, labels=delay_labels, right=True)
-        
         print("\nDelay Severity Distribution:")
-        delay_dist = late_orders['delay_bracket'].value_counts().sort_index()
-        for bracket in delay_labels:
+        delay_dist = stats['delay_dist']
+        for bracket in DELAY_LABELS:
             count = delay_dist.get(bracket, 0)
-            pct = (count / len(late_orders) * 100) if len(late_orders) > 0 else 0
+            pct = (count / late_orders * 100) if late_orders > 0 else 0
             print(f"  {bracket:20s}: {count:6,} orders ({pct:5.2f}%)")
     else:
         print("No late orders found!")
@@ -1050,26 +1420,19 @@ def create_delivery_performance_report(df, path = None):
     
     # --- Top 10 Sellers by On-Time Performance ---
     print("\n### Top 10 Sellers by On-Time Performance (min 10 orders) ###")
-    seller_stats = df.groupby('seller_id').agg({
-        'order_id': 'count',
-        'on_time_flag': 'sum',
-        'actual_delivery_days': 'mean',
-        'delay_vs_estimate': 'mean'
-    }).reset_index()
-    seller_stats.columns = ['seller_id', 'total_orders', 'on_time_orders', 'avg_delivery_days', 'avg_delay']
+    seller_stats = stats['seller_stats']
     
     # Filter sellers with at least 10 orders
     seller_stats_filtered = seller_stats[seller_stats['total_orders'] >= 10].copy()
     
     if len(seller_stats_filtered) > 0:
         seller_stats_filtered['on_time_rate'] = (seller_stats_filtered['on_time_orders'] / seller_stats_filtered['total_orders'] * 100).round(2)
-        top_sellers = seller_stats_filtered.nlargest(10, 'on_time_rate').copy()
-        top_sellers_display = top_sellers[['seller_id', 'total_orders', 'on_time_orders', 'on_time_rate', 'avg_delivery_days', 'avg_delay']].copy()
-        top_sellers_display['on_time_rate'] = top_sellers_display['on_time_rate'].apply(lambda x: f"{x}%")
-        top_sellers_display['avg_delivery_days'] = top_sellers_display['avg_delivery_days'].apply(lambda x: f"{x:.2f}")
-        top_sellers_display['avg_delay'] = top_sellers_display['avg_delay'].apply(lambda x: f"{x:.2f}")
-        top_sellers_display.columns = ['Seller ID', 'Total Orders', 'On-Time', 'On-Time Rate', 'Avg Delivery', 'Avg Delay']
-        print(top_sellers_display.to_string(index=False))
+        rankings = select_rankings(seller_stats_filtered, {
+            "top_sellers": Ranking('on_time_rate', 10),
+            "bottom_sellers": Ranking('on_time_rate', 10, largest=False),
+        })
+        top_sellers = rankings['top_sellers']
+        print_table(top_sellers, DELIVERY_SELLER_TABLE_COLUMNS)
     else:
         print("No sellers with >= 10 orders found")
     print("-" * 80)
@@ -1077,25 +1440,16 @@ def create_delivery_performance_report(df, path = None):
     # --- Bottom 10 Sellers by On-Time Performance ---
     print("\n### Bottom 10 Sellers by On-Time Performance (min 10 orders) ###")
     if len(seller_stats_filtered) > 0:
-        bottom_sellers = seller_stats_filtered.nsmallest(10, 'on_time_rate').copy()
-        bottom_sellers_display = bottom_sellers[['seller_id', 'total_orders', 'on_time_orders', 'on_time_rate', 'avg_delivery_days', 'avg_delay']].copy()
-        bottom_sellers_display['on_time_rate'] = bottom_sellers_display['on_time_rate'].apply(lambda x: f"{x}%")
-        bottom_sellers_display['avg_delivery_days'] = bottom_sellers_display['avg_delivery_days'].apply(lambda x: f"{x:.2f}")
-        bottom_sellers_display['avg_delay'] = bottom_sellers_display['avg_delay'].apply(lambda x: f"{x:.2f}")
-        bottom_sellers_display.columns = ['Seller ID', 'Total Orders', 'On-Time', 'On-Time Rate', 'Avg Delivery', 'Avg Delay']
-        print(bottom_sellers_display.to_string(index=False))
+        bottom_sellers = rankings['bottom_sellers']
+        print_table(bottom_sellers, DELIVERY_SELLER_TABLE_COLUMNS)
     else:
         print("No sellers with >= 10 orders found")
     print("-" * 80)
     
     # --- Fulfillment Speed Analysis ---
     print("\n### Fulfillment Speed Analysis ###")
-    fulfillment_bins = [0, 1, 3, 7, float('inf')]
-    fulfillment_labels = ['Same day', '2-3 days', '4-7 days', '7+ days']
-    df['fulfillment_bracket'] = pd.cut(df['fulfillment_days'], bins=fulfillment_bins, labels=fulfillment_labels, right=True)
-    
-    fulfillment_dist = df['fulfillment_bracket'].value_counts().sort_index()
-    for bracket in fulfillment_labels:
+    fulfillment_dist = stats['fulfillment_dist']
+    for bracket in FULFILLMENT_LABELS:
         count = fulfillment_dist.get(bracket, 0)
         pct = (count / total_orders * 100) if total_orders > 0 else 0
         print(f"{bracket:15s}: {count:7,} orders ({pct:5.2f}%)")
@@ -1125,10 +1479,10 @@ def create_delivery_performance_report(df, path = None):
         
         "delay_analysis": {
             "description": "Analysis of late deliveries and delay patterns",
-            "late_orders_count": int(len(late_orders)),
-            "avg_delay_late_orders": round(float(avg_late_delay), 2) if len(late_orders) > 0 else 0,
-            "max_delay": int(max_delay) if len(late_orders) > 0 else 0,
-            "min_delay": int(min_delay) if len(late_orders) > 0 else 0,
+            "late_orders_count": int(late_orders),
+            "avg_delay_late_orders": round(float(avg_late_delay), 2) if late_orders > 0 else 0,
+            "max_delay": int(max_delay) if late_orders > 0 else 0,
+            "min_delay": int(min_delay) if late_orders > 0 else 0,
             "delay_severity_distribution": []
         },
         
@@ -1150,7 +1504,7 @@ def create_delivery_performance_report(df, path = None):
     }
     
     # Populate delivery time distribution
-    for bracket in delivery_labels:
+    for bracket in DELIVERY_LABELS:
         count = int(delivery_dist.get(bracket, 0))
         pct = (count / total_orders * 100) if total_orders > 0 else 0
         output['delivery_time_distribution']['data'].append({
@@ -1160,11 +1514,10 @@ def create_delivery_performance_report(df, path = None):
         })
     
     # Populate delay severity distribution
-    if len(late_orders) > 0:
-        delay_dist = late_orders['delay_bracket'].value_counts().sort_index()
-        for bracket in delay_labels:
+    if late_orders > 0:
+        for bracket in DELAY_LABELS:
             count = int(delay_dist.get(bracket, 0))
-            pct = (count / len(late_orders) * 100) if len(late_orders) > 0 else 0
+            pct = (count / late_orders * 100) if late_orders > 0 else 0
             output['delay_analysis']['delay_severity_distribution'].append({
                 "bracket": bracket,
                 "order_count": count,
@@ -1173,32 +1526,27 @@ def create_delivery_performance_report(df, path = None):
     
     # Populate top sellers
     if len(seller_stats_filtered) > 0:
-        top_sellers_reset = top_sellers.reset_index(drop=True)
-        for _, row in top_sellers_reset.iterrows():
-            output['seller_performance']['top_10_sellers']['data'].append({
-                "seller_id": str(row['seller_id']),
-                "total_orders": int(row['total_orders']),
-                "on_time_orders": int(row['on_time_orders']),
-                "on_time_rate_pct": float(row['on_time_rate']),
-                "avg_delivery_days": round(float(row['avg_delivery_days']), 2),
-                "avg_delay": round(float(row['avg_delay']), 2)
-            })
+        output['seller_performance']['top_10_sellers']['data'].extend(frame_to_records(top_sellers, [
+            Field("seller_id", "seller_id", "str"),
+            Field("total_orders", "total_orders", "int"),
+            Field("on_time_orders", "on_time_orders", "int"),
+            Field("on_time_rate_pct", "on_time_rate", "float"),
+            Field("avg_delivery_days", "avg_delivery_days", "float", 2),
+            Field("avg_delay", "avg_delay", "float", 2),
+        ]))
         
         # Populate bottom sellers
-        bottom_sellers_reset = bottom_sellers.reset_index(drop=True)
-        for _, row in bottom_sellers_reset.iterrows():
-            output['seller_performance']['bottom_10_sellers']['data'].append({
-                "seller_id": str(row['seller_id']),
-                "total_orders": int(row['total_orders']),
-                "on_time_orders": int(row['on_time_orders']),
-                "on_time_rate_pct": float(row['on_time_rate']),
-                "avg_delivery_days": round(float(row['avg_delivery_days']), 2),
-                "avg_delay": round(float(row['avg_delay']), 2)
-            })
+        output['seller_performance']['bottom_10_sellers']['data'].extend(frame_to_records(bottom_sellers, [
+            Field("seller_id", "seller_id", "str"),
+            Field("total_orders", "total_orders", "int"),
+            Field("on_time_orders", "on_time_orders", "int"),
+            Field("on_time_rate_pct", "on_time_rate", "float"),
+            Field("avg_delivery_days", "avg_delivery_days", "float", 2),
+            Field("avg_delay", "avg_delay", "float", 2),
+        ]))
     
     # Populate fulfillment speed distribution
-    fulfillment_dist = df['fulfillment_bracket'].value_counts().sort_index()
-    for bracket in fulfillment_labels:
+    for bracket in FULFILLMENT_LABELS:
         count = int(fulfillment_dist.get(bracket, 0))
         pct = (count / total_orders * 100) if total_orders > 0 else 0
         output['fulfillment_speed_distribution']['data'].append({
@@ -1221,7 +1569,103 @@ def create_delivery_performance_report(df, path = None):
 #### Region / Province Performance 
 ###################################################################################################################
 
-def create_region_performance_report(df, path=None):
+def _region_stats(df):
+    """Regional summary, top/bottom provinces and spending concentration, computed with pandas."""
+    df = as_pandas(df)
+
+    # Calculate excluded data (province = None)
+    excluded_data = df[df['province'].isna()].copy() if df['province'].isna().any() else None
+    stats = {
+        "excluded_orders": int(excluded_data['total_orders'].sum()) if excluded_data is not None and len(excluded_data) > 0 else 0,
+        "excluded_customers": int(excluded_data['total_customers'].sum()) if excluded_data is not None and len(excluded_data) > 0 else 0,
+        "excluded_spending": float(excluded_data['total_spending'].sum()) if excluded_data is not None and len(excluded_data) > 0 else 0,
+    }
+
+    # Filter to only valid provinces for analysis
+    df = df[df['province'].notna()].copy()
+
+    # Data type conversions
+    int_cols = ['total_customers', 'total_orders']
+    flt_cols = ['latitude', 'longitude', 'total_spending']
+    df[int_cols] = df[int_cols].astype(int)
+    df[flt_cols] = df[flt_cols].astype(float)
+
+    # Calculate additional metrics
+    df['avg_spending_per_customer'] = df['total_spending'] / df['total_customers']
+    df['avg_spending_per_order'] = df['total_spending'] / df['total_orders']
+
+    total_spending = float(df['total_spending'].sum())
+    df_sorted = df.sort_values('total_spending', ascending=False).copy()
+    df_sorted['cumulative_spending_pct'] = (df_sorted['total_spending'].cumsum() / total_spending * 100)
+    df_min_customers = df[df['total_customers'] >= 100]
+    rankings = select_rankings(df, {
+        "top_by_spending": Ranking('total_spending', 10),
+        "top_by_customers": Ranking('total_customers', 10),
+        "top_by_avg_spending": Ranking('avg_spending_per_customer', 10, where=df['total_customers'] >= 100),
+        "bottom_by_spending": Ranking('total_spending', 10, largest=False),
+    })
+
+    stats.update({
+        "total_provinces": len(df),
+        "total_customers": int(df['total_customers'].sum()),
+        "total_orders": int(df['total_orders'].sum()),
+        "total_spending": total_spending,
+        "provinces_min_customers": len(df_min_customers),
+        **rankings,
+        "provinces_for_80pct": (df_sorted['cumulative_spending_pct'] <= 80).sum(),
+    })
+    return stats
+
+def _region_stats_polars(df):
+    """Same as _region_stats, as Polars lazy queries collected together in one parallel run."""
+    import polars as pl
+
+    lf = _lazy_frame(df)
+    excluded = lf.filter(pl.col('province').is_null())
+    lf = lf.filter(pl.col('province').is_not_null()).with_columns(
+        pl.col(['total_customers', 'total_orders']).cast(pl.Int64),
+        pl.col(['latitude', 'longitude', 'total_spending']).cast(pl.Float64),
+    ).with_columns(
+        avg_spending_per_customer=pl.col('total_spending') / pl.col('total_customers'),
+        avg_spending_per_order=pl.col('total_spending') / pl.col('total_orders'),
+    )
+    min_customers = lf.filter(pl.col('total_customers') >= 100)
+    spending = pl.col('total_spending')
+
+    (excluded, summary, concentration, top_by_spending, top_by_customers, top_by_avg_spending,
+     bottom_by_spending) = pl.collect_all([
+        excluded.select(
+            excluded_orders=pl.col('total_orders').sum(),
+            excluded_customers=pl.col('total_customers').sum(),
+            excluded_spending=spending.sum(),
+        ),
+        lf.select(
+            total_provinces=pl.len(),
+            total_customers=pl.col('total_customers').sum(),
+            total_orders=pl.col('total_orders').sum(),
+            total_spending=spending.sum(),
+            provinces_min_customers=(pl.col('total_customers') >= 100).sum(),
+        ),
+        lf.sort('total_spending', descending=True, nulls_last=True, maintain_order=True).select(
+            provinces_for_80pct=(spending.cum_sum() / spending.sum() * 100 <= 80).sum()),
+        _top_rows(lf, 10, 'total_spending'),
+        _top_rows(lf, 10, 'total_customers'),
+        _top_rows(min_customers, 10, 'avg_spending_per_customer'),
+        _top_rows(lf, 10, 'total_spending', largest=False),
+    ])
+
+    stats = {**summary.row(0, named=True), **concentration.row(0, named=True)}
+    excluded = excluded.row(0, named=True)
+    stats["excluded_orders"] = int(excluded['excluded_orders'] or 0)
+    stats["excluded_customers"] = int(excluded['excluded_customers'] or 0)
+    stats["excluded_spending"] = float(excluded['excluded_spending'] or 0)
+    stats["top_by_spending"] = top_by_spending.to_pandas()
+    stats["top_by_customers"] = top_by_customers.to_pandas()
+    stats["top_by_avg_spending"] = top_by_avg_spending.to_pandas()
+    stats["bottom_by_spending"] = bottom_by_spending.to_pandas()
+    return stats
+
+def create_region_performance_report(df, path=None, engine="pandas"):
     """
     Analyze regional performance and create a comprehensive report.
     Parameters:
@@ -1230,39 +1674,26 @@ def create_region_performance_report(df, path=None):
         - province, latitude, longitude, total_customers, 
           total_orders, total_spending
     path : If provided, saves JSON to this path.
+    engine : 'pandas' or 'polars', the engine computing the aggregates (see ANALYSIS_ENGINES).
     """
+    stats = _run_engine(engine, _region_stats, _region_stats_polars, df)
     
     print("="*80)
     print("                *** Regional Performance Analysis Report ***")
     print("="*80)
     
-    # Calculate excluded data (province = None)
-    excluded_data = df[df['province'].isna()].copy() if df['province'].isna().any() else None
-    excluded_orders = int(excluded_data['total_orders'].sum()) if excluded_data is not None and len(excluded_data) > 0 else 0
-    excluded_customers = int(excluded_data['total_customers'].sum()) if excluded_data is not None and len(excluded_data) > 0 else 0
-    excluded_spending = float(excluded_data['total_spending'].sum()) if excluded_data is not None and len(excluded_data) > 0 else 0
-    
-    # Filter to only valid provinces for analysis
-    df = df[df['province'].notna()].copy()
-    
-    # Data type conversions
-    int_cols = ['total_customers', 'total_orders']
-    flt_cols = ['latitude', 'longitude', 'total_spending']
-    df[int_cols] = df[int_cols].astype(int)
-    df[flt_cols] = df[flt_cols].astype(float)
-    
-    # Calculate additional metrics
-    df['avg_spending_per_customer'] = df['total_spending'] / df['total_customers']
-    df['avg_spending_per_order'] = df['total_spending'] / df['total_orders']
+    excluded_orders = stats['excluded_orders']
+    excluded_customers = stats['excluded_customers']
+    excluded_spending = stats['excluded_spending']
 
     # --- Overall Summary ---
     print("\n### Overall Summary ###")
     if excluded_orders > 0:
         print(f"Note: Excludes {excluded_orders:,} orders ({excluded_customers:,} customers, ${excluded_spending:,.2f}) without valid region information")
-    total_provinces = len(df)
-    total_customers = int(df['total_customers'].sum())
-    total_orders = int(df['total_orders'].sum())
-    total_spending = float(df['total_spending'].sum())
+    total_provinces = stats['total_provinces']
+    total_customers = stats['total_customers']
+    total_orders = stats['total_orders']
+    total_spending = stats['total_spending']
     avg_spending_per_customer = total_spending / total_customers if total_customers > 0 else 0
     avg_spending_per_order = total_spending / total_orders if total_orders > 0 else 0
     
@@ -1276,73 +1707,68 @@ def create_region_performance_report(df, path=None):
     
     # --- Top 10 Provinces by Total Spending ---
     print("\n### Top 10 Provinces by Total Spending ###")
-    top_by_spending = df.nlargest(10, 'total_spending').copy()
+    top_by_spending = stats['top_by_spending']
     
     # Calculate spending percentage
     top_by_spending['spending_pct'] = (top_by_spending['total_spending'] / total_spending * 100).round(2)
     
-    top_spending_display = top_by_spending[['province', 'total_spending', 'spending_pct',
-                                             'total_customers', 'total_orders', 
-                                             'avg_spending_per_customer']].copy()
-    top_spending_display['total_spending'] = top_spending_display['total_spending'].apply(lambda x: f"${x:,.2f}")
-    top_spending_display['spending_pct'] = top_spending_display['spending_pct'].apply(lambda x: f"{x}%")
-    top_spending_display['avg_spending_per_customer'] = top_spending_display['avg_spending_per_customer'].apply(lambda x: f"${x:.2f}")
-    top_spending_display.columns = ['Province', 'Total Spending', 'Spending %', 'Customers', 'Orders', 'Avg per Customer']
-    
-    print(top_spending_display.to_string(index=False))
+    print_table(top_by_spending, [
+        Column('province', 'Province'),
+        Column('total_spending', 'Total Spending', 'currency'),
+        Column('spending_pct', 'Spending %', 'percent'),
+        Column('total_customers', 'Customers'),
+        Column('total_orders', 'Orders'),
+        Column('avg_spending_per_customer', 'Avg per Customer', 'currency_plain'),
+    ])
     print("-" * 80)
     
     # --- Top 10 Provinces by Customer Count ---
     print("\n### Top 10 Provinces by Customer Count ###")
-    top_by_customers = df.nlargest(10, 'total_customers').copy()
-    
-    top_customers_display = top_by_customers[['province', 'total_customers', 'total_orders',
-                                               'total_spending', 'avg_spending_per_customer']].copy()
-    top_customers_display['total_spending'] = top_customers_display['total_spending'].apply(lambda x: f"${x:,.2f}")
-    top_customers_display['avg_spending_per_customer'] = top_customers_display['avg_spending_per_customer'].apply(lambda x: f"${x:.2f}")
-    top_customers_display.columns = ['Province', 'Customers', 'Orders', 'Total Spending', 'Avg per Customer']
-    
-    print(top_customers_display.to_string(index=False))
+    top_by_customers = stats['top_by_customers']
+    
+    print_table(top_by_customers, [
+        Column('province', 'Province'),
+        Column('total_customers', 'Customers'),
+        Column('total_orders', 'Orders'),
+        Column('total_spending', 'Total Spending', 'currency'),
+        Column('avg_spending_per_customer', 'Avg per Customer', 'currency_plain'),
+    ])
     print("-" * 80)
     
     # --- Top 10 Provinces by Avg Spending per Customer ---
     print("\n### Top 10 Provinces by Avg Spending per Customer (min 100 customers) ###")
-    df_min_customers = df[df['total_customers'] >= 100].copy()
+    provinces_min_customers = stats['provinces_min_customers']
     
-    if len(df_min_customers) > 0:
-        top_by_avg_spending = df_min_customers.nlargest(10, 'avg_spending_per_customer').copy()
-        
-        top_avg_display = top_by_avg_spending[['province', 'avg_spending_per_customer',
-                                                'total_customers', 'total_orders', 
-                                                'total_spending']].copy()
-        top_avg_display['avg_spending_per_customer'] = top_avg_display['avg_spending_per_customer'].apply(lambda x: f"${x:.2f}")
-        top_avg_display['total_spending'] = top_avg_display['total_spending'].apply(lambda x: f"${x:,.2f}")
-        top_avg_display.columns = ['Province', 'Avg per Customer', 'Customers', 'Orders', 'Total Spending']
+    if provinces_min_customers > 0:
+        top_by_avg_spending = stats['top_by_avg_spending']
         
-        print(top_avg_display.to_string(index=False))
+        print_table(top_by_avg_spending, [
+            Column('province', 'Province'),
+            Column('avg_spending_per_customer', 'Avg per Customer', 'currency_plain'),
+            Column('total_customers', 'Customers'),
+            Column('total_orders', 'Orders'),
+            Column('total_spending', 'Total Spending', 'currency'),
+        ])
     else:
         print("No provinces with >= 100 customers found")
     print("-" * 80)
     
     # --- Bottom 10 Provinces by Total Spending ---
     print("\n### Bottom 10 Provinces by Total Spending ###")
-    bottom_by_spending = df.nsmallest(10, 'total_spending').copy()
-    
-    bottom_spending_display = bottom_by_spending[['province', 'total_spending', 
-                                                   'total_customers', 'total_orders']].copy()
-    bottom_spending_display['total_spending'] = bottom_spending_display['total_spending'].apply(lambda x: f"${x:,.2f}")
-    bottom_spending_display.columns = ['Province', 'Total Spending', 'Customers', 'Orders']
-    
-    print(bottom_spending_display.to_string(index=False))
+    bottom_by_spending = stats['bottom_by_spending']
+    
+    print_table(bottom_by_spending, [
+        Column('province', 'Province'),
+        Column('total_spending', 'Total Spending', 'currency'),
+        Column('total_customers', 'Customers'),
+        Column('total_orders', 'Orders'),
+    ])
     print("-" * 80)
     
     # --- Regional Concentration Analysis ---
     print("\n### Regional Concentration Analysis ###")
-    df_sorted = df.sort_values('total_spending', ascending=False).copy()
-    df_sorted['cumulative_spending_pct'] = (df_sorted['total_spending'].cumsum() / total_spending * 100)
-    
-    provinces_for_80pct = (df_sorted['cumulative_spending_pct'] <= 80).sum()
-    top_5_spending_share = (df.nlargest(5, 'total_spending')['total_spending'].sum() / total_spending * 100)
+    provinces_for_80pct = stats['provinces_for_80pct']
+    top_5_spending_share = (top_by_spending.head(5)['total_spending'].sum() / total_spending * 100)
     
     print(f"Top {provinces_for_80pct} provinces account for 80% of spending")
     print(f"  → Concentration ratio: {provinces_for_80pct}/{total_provinces} = {(provinces_for_80pct/total_provinces*100):.1f}%")
@@ -1400,57 +1826,49 @@ def create_region_performance_report(df, path=None):
     }
     
     # Populate top performers by total spending
-    top_by_spending_reset = top_by_spending.reset_index(drop=True)
-    for _, row in top_by_spending_reset.iterrows():
-        output['top_performers']['by_total_spending']['data'].append({
-            "province": str(row['province']),
-            "latitude": round(float(row['latitude']), 4),
-            "longitude": round(float(row['longitude']), 4),
-            "total_spending": round(float(row['total_spending']), 2),
-            "spending_percentage": float(row['spending_pct']),
-            "total_customers": int(row['total_customers']),
-            "total_orders": int(row['total_orders']),
-            "avg_spending_per_customer": round(float(row['avg_spending_per_customer']), 2)
-        })
+    output['top_performers']['by_total_spending']['data'].extend(frame_to_records(top_by_spending, [
+        Field("province", "province", "str"),
+        Field("latitude", "latitude", "float", 4),
+        Field("longitude", "longitude", "float", 4),
+        Field("total_spending", "total_spending", "float", 2),
+        Field("spending_percentage", "spending_pct", "float"),
+        Field("total_customers", "total_customers", "int"),
+        Field("total_orders", "total_orders", "int"),
+        Field("avg_spending_per_customer", "avg_spending_per_customer", "float", 2),
+    ]))
     
     # Populate top performers by customer count
-    top_by_customers_reset = top_by_customers.reset_index(drop=True)
-    for _, row in top_by_customers_reset.iterrows():
-        output['top_performers']['by_customer_count']['data'].append({
-            "province": str(row['province']),
-            "latitude": round(float(row['latitude']), 4),
-            "longitude": round(float(row['longitude']), 4),
-            "total_customers": int(row['total_customers']),
-            "total_orders": int(row['total_orders']),
-            "total_spending": round(float(row['total_spending']), 2),
-            "avg_spending_per_customer": round(float(row['avg_spending_per_customer']), 2)
-        })
+    output['top_performers']['by_customer_count']['data'].extend(frame_to_records(top_by_customers, [
+        Field("province", "province", "str"),
+        Field("latitude", "latitude", "float", 4),
+        Field("longitude", "longitude", "float", 4),
+        Field("total_customers", "total_customers", "int"),
+        Field("total_orders", "total_orders", "int"),
+        Field("total_spending", "total_spending", "float", 2),
+        Field("avg_spending_per_customer", "avg_spending_per_customer", "float", 2),
+    ]))
     
     # Populate top performers by avg spending per customer
-    if len(df_min_customers) > 0:
-        top_by_avg_spending_reset = top_by_avg_spending.reset_index(drop=True)
-        for _, row in top_by_avg_spending_reset.iterrows():
-            output['top_performers']['by_avg_spending_per_customer']['data'].append({
-                "province": str(row['province']),
-                "latitude": round(float(row['latitude']), 4),
-                "longitude": round(float(row['longitude']), 4),
-                "avg_spending_per_customer": round(float(row['avg_spending_per_customer']), 2),
-                "total_customers": int(row['total_customers']),
-                "total_orders": int(row['total_orders']),
-                "total_spending": round(float(row['total_spending']), 2)
-            })
+    if provinces_min_customers > 0:
+        output['top_performers']['by_avg_spending_per_customer']['data'].extend(frame_to_records(top_by_avg_spending, [
+            Field("province", "province", "str"),
+            Field("latitude", "latitude", "float", 4),
+            Field("longitude", "longitude", "float", 4),
+            Field("avg_spending_per_customer", "avg_spending_per_customer", "float", 2),
+            Field("total_customers", "total_customers", "int"),
+            Field("total_orders", "total_orders", "int"),
+            Field("total_spending", "total_spending", "float", 2),
+        ]))
     
     # Populate bottom performers
-    bottom_by_spending_reset = bottom_by_spending.reset_index(drop=True)
-    for _, row in bottom_by_spending_reset.iterrows():
-        output['bottom_performers']['data'].append({
-            "province": str(row['province']),
-            "latitude": round(float(row['latitude']), 4),
-            "longitude": round(float(row['longitude']), 4),
-            "total_spending": round(float(row['total_spending']), 2),
-            "total_customers": int(row['total_customers']),
-            "total_orders": int(row['total_orders'])
-        })
+    output['bottom_performers']['data'].extend(frame_to_records(bottom_by_spending, [
+        Field("province", "province", "str"),
+        Field("latitude", "latitude", "float", 4),
+        Field("longitude", "longitude", "float", 4),
+        Field("total_spending", "total_spending", "float", 2),
+        Field("total_customers", "total_customers", "int"),
+        Field("total_orders", "total_orders", "int"),
+    ]))
     
     # Save to file if path is provided
     if path:
@@ -1475,6 +1893,7 @@ def create_overall_business_metrics_report(df, path=None):
           total_revenue, avg_order_value, avg_basket_size
     path : If provided, saves JSON to this path.
     """
+    df = as_pandas(df)
     
     print("="*80)
     print("                 *** Overall Business Metrics Report ***")
@@ -1556,6 +1975,7 @@ def create_monthly_time_series_report(df, path=None):
           total_revenue, avg_order_value, avg_basket_size
     path : If provided, saves JSON to this path.
     """
+    df = as_pandas(df)
     
     print("="*80)
     print("                *** Monthly Business Metrics Report ***")
@@ -1595,36 +2015,27 @@ def create_monthly_time_series_report(df, path=None):
     
     # --- Monthly Performance ---
     print("\n### Monthly Performance ###")
-    display_monthly = df[['month', 'total_orders', 'total_customers', 'total_revenue', 
-                          'avg_order_value', 'avg_basket_size']].copy()
-    display_monthly['month'] = display_monthly['month'].dt.strftime('%Y-%m')
-    display_monthly['total_revenue'] = display_monthly['total_revenue'].apply(lambda x: f"${x:,.2f}")
-    display_monthly['avg_order_value'] = display_monthly['avg_order_value'].apply(lambda x: f"${x:.2f}")
-    display_monthly['avg_basket_size'] = display_monthly['avg_basket_size'].apply(lambda x: f"{x:.2f}")
-    display_monthly.columns = ['Month', 'Orders', 'Customers', 'Revenue', 'AOV', 'Basket Size']
-    
-    print(display_monthly.to_string(index=False))
+    print_table(df, [
+        Column('month', 'Month', 'month'),
+        Column('total_orders', 'Orders'),
+        Column('total_customers', 'Customers'),
+        Column('total_revenue', 'Revenue', 'currency'),
+        Column('avg_order_value', 'AOV', 'currency_plain'),
+        Column('avg_basket_size', 'Basket Size', 'decimal_2'),
+    ])
     print("-" * 80)
     
     # --- Month-over-Month Growth ---
     print("\n### Month-over-Month Growth ###")
-    growth_display = df[['month', 'total_orders', 'orders_mom_pct', 
-                         'total_customers', 'customers_mom_pct',
-                         'total_revenue', 'revenue_mom_pct']].copy()
-    growth_display['month'] = growth_display['month'].dt.strftime('%Y-%m')
-    growth_display['orders_mom_pct'] = growth_display['orders_mom_pct'].apply(
-        lambda x: f"{x:+.1f}%" if pd.notna(x) else "N/A"
-    )
-    growth_display['customers_mom_pct'] = growth_display['customers_mom_pct'].apply(
-        lambda x: f"{x:+.1f}%" if pd.notna(x) else "N/A"
-    )
-    growth_display['total_revenue'] = growth_display['total_revenue'].apply(lambda x: f"${x:,.2f}")
-    growth_display['revenue_mom_pct'] = growth_display['revenue_mom_pct'].apply(
-        lambda x: f"{x:+.1f}%" if pd.notna(x) else "N/A"
-    )
-    growth_display.columns = ['Month', 'Orders', 'MoM %', 'Customers', 'MoM %', 'Revenue', 'MoM %']
-    
-    print(growth_display.to_string(index=False))
+    print_table(df, [
+        Column('month', 'Month', 'month'),
+        Column('total_orders', 'Orders'),
+        Column('orders_mom_pct', 'MoM %', 'pct_change', na="N/A"),
+        Column('total_customers', 'Customers'),
+        Column('customers_mom_pct', 'MoM %', 'pct_change', na="N/A"),
+        Column('total_revenue', 'Revenue', 'currency'),
+        Column('revenue_mom_pct', 'MoM %', 'pct_change', na="N/A"),
+    ])
     print("-" * 80)
     
     print("\n" + "="*80)
@@ -1647,24 +2058,23 @@ def create_monthly_time_series_report(df, path=None):
     }
     
     # Populate monthly data
-    for _, row in df.iterrows():
-        output['monthly_data'].append({
-            "month": row['month'].strftime('%Y-%m'),
-            "year": int(row['year']),
-            "total_orders": int(row['total_orders']),
-            "total_customers": int(row['total_customers']),
-            "total_sellers": int(row['total_sellers']),
-            "total_items_ordered": int(row['total_items_ordered']),
-            "total_revenue": round(float(row['total_revenue']), 2),
-            "avg_order_value": round(float(row['avg_order_value']), 2),
-            "avg_basket_size": round(float(row['avg_basket_size']), 2),
-            "orders_mom_change": int(row['orders_mom_change']) if pd.notna(row['orders_mom_change']) else None,
-            "orders_mom_pct": round(float(row['orders_mom_pct']), 2) if pd.notna(row['orders_mom_pct']) else None,
-            "customers_mom_change": int(row['customers_mom_change']) if pd.notna(row['customers_mom_change']) else None,
-            "customers_mom_pct": round(float(row['customers_mom_pct']), 2) if pd.notna(row['customers_mom_pct']) else None,
-            "revenue_mom_change": round(float(row['revenue_mom_change']), 2) if pd.notna(row['revenue_mom_change']) else None,
-            "revenue_mom_pct": round(float(row['revenue_mom_pct']), 2) if pd.notna(row['revenue_mom_pct']) else None
-        })
+    output['monthly_data'].extend(frame_to_records(df, [
+        Field("month", "month", "month"),
+        Field("year", "year", "int"),
+        Field("total_orders", "total_orders", "int"),
+        Field("total_customers", "total_customers", "int"),
+        Field("total_sellers", "total_sellers", "int"),
+        Field("total_items_ordered", "total_items_ordered", "int"),
+        Field("total_revenue", "total_revenue", "float", 2),
+        Field("avg_order_value", "avg_order_value", "float", 2),
+        Field("avg_basket_size", "avg_basket_size", "float", 2),
+        Field("orders_mom_change", "orders_mom_change", "int", nullable=True),
+        Field("orders_mom_pct", "orders_mom_pct", "float", 2, nullable=True),
+        Field("customers_mom_change", "customers_mom_change", "int", nullable=True),
+        Field("customers_mom_pct", "customers_mom_pct", "float", 2, nullable=True),
+        Field("revenue_mom_change", "revenue_mom_change", "float", 2, nullable=True),
+        Field("revenue_mom_pct", "revenue_mom_pct", "float", 2, nullable=True),
+    ]))
     
     # Save to file if path is provided
     if path:
@@ -1676,47 +2086,152 @@ def create_monthly_time_series_report(df, path=None):
     return output
 
 
-def run_analysis():
+def _analysis_tasks(directory):
+    """
+    Defines every analysis step as: name -> (SQL query, report function, report kwargs).
+    """
+    return {
+        # Cohort Customer Retention Data
+        "cohort": (q.GET_BI_CUSTOMER_COHORTS, create_cohort_report,
+                   {"path": directory / "cohort_analysis_report.json"}),
+        # RFM Analysis Data 
+        "rfm": (q.GET_BI_CUSTOMER_RFM, create_rfm_report,
+                {"path": directory / "rfm_analysis_report.json",
+                 "further_notes": "The majority of customers (i.e. more than 95 percent of customers) only had only 1 order so the histogram of F (Frequency) is highly skewed"}),
+        # Product Performance Data 
+        "product": (q.GET_BI_PRODUCT_PERFORMANCE, create_product_performance_report,
+                    {"path": directory / "product_performance_report.json"}),
+        # Category Performance Data 
+        "category": (q.GET_product_category_performance, create_category_performance_report,
+                     {"path": directory / "category_performance_report.json"}),
+        # Seller Performance Data 
+        "seller": (q.GET_BI_SELLER_PERFORMANCE, create_seller_performance_report,
+                   {"path": directory / "seller_performance_report.json"}),
+        # Delivery Performance Data 
+        "delivery": (q.GET_delivery_performance, create_delivery_performance_report,
+                     {"path": directory / "delivery_performance_report.json"}),
+        # Region Performance Data 
+        "region": (q.GET_region_performance, create_region_performance_report,
+                   {"path": directory / "region_performance_report.json"}),
+        # Main Business Metrics & MoM Data
+        "overall_metrics": (q.GET_overal_business_metrics, create_overall_business_metrics_report,
+                            {"path": directory / "overall_business_metrics_report.json"}),
+        "monthly_time_series": (q.GET_monthly_time_series, create_monthly_time_series_report,
+                                {"path": directory / "monthly_time_series_report.json"}),
+    }
 
-    ### DEFINING THE OUTPUT DIRECTORY
-    directory = Path(__file__).resolve().parents[2] / "python" / "output" / "Analysis" 
-    
-    # Cohort Customer Retention Data
-    df1 = fetch_data_from_bq(q.GET_BI_CUSTOMER_COHORTS)
-    create_cohort_report(df=df1, path= directory / "cohort_analysis_report.json")
-    
-    # RFM Analysis Data 
-    df2 = fetch_data_from_bq(q.GET_BI_CUSTOMER_RFM)
-    create_rfm_report(df=df2, path= directory / "rfm_analysis_report.json", 
-                    further_notes="The majority of customers (i.e. more than 95 percent of customers) only had only 1 order so the histogram of F (Frequency) is highly skewed")
 
-    # Product Performance Data 
-    df3 = fetch_data_from_bq(q.GET_BI_PRODUCT_PERFORMANCE)
-    create_product_performance_report(df=df3, path= directory / "product_performance_report.json")
+# Warehouse queries read by run_analysis
+ANALYSIS_QUERIES = [task[0] for task in _analysis_tasks(Path(".")).values()]
 
-    # Category Performance Data 
-    df4 = fetch_data_from_bq(q.GET_product_category_performance)
-    create_category_performance_report(df=df4, path= directory / "category_performance_report.json")
-    
-    # Seller Performance Data 
-    df5 = fetch_data_from_bq(q.GET_BI_SELLER_PERFORMANCE)
-    create_seller_performance_report(df=df5, path= directory / "seller_performance_report.json")
+# Reports whose aggregates can be computed by either engine (see ANALYSIS_ENGINES)
+ENGINE_REPORTS = ("rfm", "seller", "delivery", "region")
 
-    # Delivery Performance Data 
-    df6 = fetch_data_from_bq(q.GET_delivery_performance)
-    create_delivery_performance_report(df=df6, path= directory / "delivery_performance_report.json")
+# Query modes of the delivery and seller reports:
+#   'rows'      : their row-level tables are downloaded and aggregated here (the default).
+#   'aggregate' : their bracket histograms, means, per-seller stats and rankings are computed
+#                 in the warehouse, so a few thousand rows are downloaded instead of ~110k
+#                 (see report_pushdown.py).
+# Select with run_analysis(query_mode=...) or OLIST_QUERY_MODE=aggregate.
+QUERY_MODES = ("rows", "aggregate")
 
-    # Region Performance Data 
-    df7 = fetch_data_from_bq(q.GET_region_performance)
-    create_region_performance_report(df=df7, path= directory / "region_performance_report.json")
+def query_mode_from_env():
+    mode = os.environ.get("OLIST_QUERY_MODE", "rows").strip().lower()
+    return mode if mode in QUERY_MODES else "rows"
 
-    # Main Business Metrics & MoM Data
-    
-    df8 = fetch_data_from_bq(q.GET_overal_business_metrics)
-    create_overall_business_metrics_report(df=df8, path= directory / "overall_business_metrics_report.json")
+# Reports that accept pre-aggregated frames: name -> ({part: SQL query}, frames namedtuple)
+AGGREGATE_REPORTS = {
+    "delivery": (delivery_aggregate_queries(q.GET_delivery_performance, DELIVERY_BINS, FULFILLMENT_BINS,
+                                            DELAY_BINS, min_seller_orders=10), DeliveryAggregates),
+    "seller": (seller_aggregate_queries(q.GET_BI_SELLER_PERFORMANCE, SELLER_REVIEW_BINS,
+                                        min_review_orders=10, top_n=10), SellerAggregates),
+}
+
+def _analysis_queries(tasks, query_mode):
+    """{query name: SQL} for the tasks; in 'aggregate' mode each part of an aggregate report is named 'report:part'."""
+    if query_mode not in QUERY_MODES:
+        raise ValueError(f"Invalid query mode '{query_mode}'. Must be one of {QUERY_MODES}.")
+    queries = {}
+    for name, task in tasks.items():
+        if query_mode == "aggregate" and name in AGGREGATE_REPORTS:
+            queries.update({f"{name}:{part}": sql for part, sql in AGGREGATE_REPORTS[name][0].items()})
+        else:
+            queries[name] = task[0]
+    return queries
+
+def _report_inputs(results):
+    """
+    Yields (report name, data) from (query name, result) pairs, combining the parts of an
+    aggregate report into its frames namedtuple once all of them have arrived (None if any
+    part could not be fetched).
+    """
+    parts = {}
+    for name, df in results:
+        if ":" not in name:
+            yield name, df
+            continue
+        name, part = name.split(":", 1)
+        parts.setdefault(name, {})[part] = df
+        queries, frames = AGGREGATE_REPORTS[name]
+        if len(parts[name]) == len(queries):
+            received = parts.pop(name)
+            yield name, None if any(frame is None for frame in received.values()) else frames(**received)
+
+def _input_rows(df):
+    return sum(len(frame) for frame in df) if isinstance(df, tuple) else len(df)
+
+
+def run_analysis(concurrent=True, max_workers=None, output="pandas", quiet=None, shared=None, engine=None,
+                 query_mode=None):
+    """
+    Fetches every analysis dataset and writes the JSON reports.
+
+    Parameters:
+    concurrent : If True, all queries are submitted to BigQuery up front and each report
+                 is built as soon as its data arrives. If False, queries run one after another.
+    max_workers : Number of download threads used in concurrent mode.
+    output : Result format fetched from the warehouse ('pandas', 'arrow' or 'polars').
+             Arrow/Polars results are handed to the reports with Arrow-backed dtypes.
+    quiet : If True, the reports skip their console output and log one timing record each
+            (see verbosity.py); None uses the pipeline-wide verbosity.
+    shared : If True, the category, region and business-metric datasets are computed from the
+             shared in-memory fact and dimension tables instead of being queried one by one
+             (see datasets.py); None uses OLIST_SHARED_DATASETS.
+    engine : 'pandas' or 'polars', the engine computing the RFM, seller, delivery and region
+             aggregates (see ANALYSIS_ENGINES); None uses OLIST_ANALYSIS_ENGINE (default 'pandas').
+    query_mode : 'rows' or 'aggregate', whether the delivery and seller reports download their
+                 rows or aggregates computed in the warehouse (see QUERY_MODES); None uses
+                 OLIST_QUERY_MODE (default 'rows').
+
+    Returns False if any report was skipped because its data could not be fetched.
+    """
+
+    ### DEFINING THE OUTPUT DIRECTORY
+    directory = Path(__file__).resolve().parents[2] / "python" / "output" / "Analysis" 
+    tasks = _analysis_tasks(directory)
+    engine = engine or analysis_engine_from_env()
+    queries = _analysis_queries(tasks, query_mode or query_mode_from_env())
+
+    complete = True
+    shared = shared_datasets_enabled(shared)
+    with quiet_reports(quiet), REGISTRY.use(*(SHARED_TABLES if shared else ())):
+        if concurrent:
+            results = fetch_many(queries, shared=shared, max_workers=max_workers, output=output)
+        else:
+            results = ((name, fetch_data(sql, shared=shared, output=output)) for name, sql in queries.items())
 
-    df9 = fetch_data_from_bq(q.GET_monthly_time_series)
-    create_monthly_time_series_report(df=df9, path= directory / "monthly_time_series_report.json")
+        for name, df in _report_inputs(results):
+            _, report_fn, kwargs = tasks[name]
+            if df is None:
+                print(f"🛑 Skipping {name} report: no data was fetched.")
+                log_event("report_skipped", report=name, reason="no data was fetched")
+                complete = False
+                continue
+            if name in ENGINE_REPORTS:
+                kwargs = {**kwargs, "engine": engine}
+            with instrument("report", name, rows=_input_rows(df)):
+                report_fn(df=df, **kwargs)
+    return complete
 
 
 if __name__ == "__main__":
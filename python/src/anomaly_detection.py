@@ -2,7 +2,11 @@ import pandas as pd
 import numpy as np
 from . import sql_queries as q
 from .utils import fetch_data_from_bq
+from .datasets import fetch_data, shared_datasets_enabled, REGISTRY
+from .verbosity import is_quiet, quiet_reports
+from .metrics import instrument
 import json
+import warnings
 from pathlib import Path
 from typing import List, Optional, Dict, Union
 
@@ -41,6 +45,94 @@ def detect_zscore_outliers(df: pd.DataFrame, col_name: str, threshold: float = 3
     outliers['anomaly_type'] = np.where(outliers['z_score'] > 0, 'Peak (High)', 'Valley (Low)')
     return outliers
 
+# --- 1b. Sequential Detectors (local baselines, linear time) ---
+#
+# Unlike the global IQR/Z-Score above, these compare each point with a baseline built from
+# the points before it, so a seasonal or growing series is judged against its recent level.
+# Rolling quantiles use pandas' skip-list window (O(n log w)), rolling and exponentially
+# weighted moments use running sums (O(n)).
+
+ROLLING_WINDOW = 28        # points in the trailing baseline window
+ROLLING_MIN_PERIODS = 7    # points needed before a baseline is trusted
+EWMA_SPAN = 28
+SEASONAL_TREND_WINDOW = 7  # centered window for the trend in Seasonal-DOW
+
+# Methods that read the points in time order: they need the 'date' column of a time-based mode
+SEQUENTIAL_METHODS = ('ROLLING-IQR', 'ROLLING-Z-SCORE', 'EWMA', 'SEASONAL-DOW')
+
+def _flag_zscores(df: pd.DataFrame, z_scores: pd.Series, method: str, threshold: float) -> pd.DataFrame:
+    mask = np.abs(z_scores) > threshold
+    outliers = df[mask].copy()
+    outliers['method'] = method
+    outliers['z_score'] = z_scores[mask]
+    outliers['anomaly_type'] = np.where(outliers['z_score'] > 0, 'Peak (High)', 'Valley (Low)')
+    return outliers
+
+def detect_rolling_iqr_outliers(df: pd.DataFrame, col_name: str, window: int = ROLLING_WINDOW,
+                                factor: float = 1.5) -> pd.DataFrame:
+    """IQR limits from the previous `window` points (the current point is not part of its own baseline)."""
+    if df.empty or col_name not in df.columns:
+        return pd.DataFrame()
+    data = df[col_name]
+    rolling = data.rolling(window, min_periods=ROLLING_MIN_PERIODS, closed='left')
+    q1 = rolling.quantile(0.25)
+    q3 = rolling.quantile(0.75)
+    iqr = q3 - q1
+    lower_bound = q1 - (factor * iqr)
+    upper_bound = q3 + (factor * iqr)
+    mask = (data < lower_bound) | (data > upper_bound)
+    outliers = df[mask].copy()
+    outliers['method'] = 'Rolling-IQR'
+    outliers['lower_limit'] = lower_bound[mask]
+    outliers['upper_limit'] = upper_bound[mask]
+    outliers['anomaly_type'] = np.where(outliers[col_name] > outliers['upper_limit'], 'Peak (High)', 'Valley (Low)')
+    return outliers
+
+def detect_rolling_zscore_outliers(df: pd.DataFrame, col_name: str, window: int = ROLLING_WINDOW,
+                                   threshold: float = 3.0) -> pd.DataFrame:
+    """Z-Score against the mean/std of the previous `window` points."""
+    if df.empty or col_name not in df.columns:
+        return pd.DataFrame()
+    data = df[col_name]
+    rolling = data.rolling(window, min_periods=ROLLING_MIN_PERIODS, closed='left')
+    std = rolling.std().replace(0, np.nan)
+    z_scores = (data - rolling.mean()) / std
+    return _flag_zscores(df, z_scores, 'Rolling-Z-Score', threshold)
+
+def detect_ewma_outliers(df: pd.DataFrame, col_name: str, span: int = EWMA_SPAN,
+                         threshold: float = 3.0) -> pd.DataFrame:
+    """Z-Score against the exponentially weighted mean/std up to the previous point."""
+    if df.empty or col_name not in df.columns:
+        return pd.DataFrame()
+    data = df[col_name]
+    ewm = data.ewm(span=span, min_periods=ROLLING_MIN_PERIODS)
+    mean = ewm.mean().shift(1)
+    std = ewm.std().shift(1).replace(0, np.nan)
+    z_scores = (data - mean) / std
+    return _flag_zscores(df, z_scores, 'EWMA', threshold)
+
+def detect_seasonal_outliers(df: pd.DataFrame, col_name: str, date_col: str = 'date',
+                             threshold: float = 3.0) -> pd.DataFrame:
+    """
+    STL-style check: removes a centered rolling-median trend and the median day-of-week
+    effect, then flags residuals beyond `threshold` robust standard deviations (1.4826 x MAD).
+    """
+    if df.empty or col_name not in df.columns:
+        return pd.DataFrame()
+    if date_col not in df.columns:
+        raise ValueError(f"Seasonal detection needs a '{date_col}' column (time-based modes only).")
+    data = df[col_name]
+    trend = data.rolling(SEASONAL_TREND_WINDOW, center=True, min_periods=1).median()
+    detrended = data - trend
+    day_of_week = pd.to_datetime(df[date_col]).dt.dayofweek
+    seasonal = detrended.groupby(day_of_week).transform('median')
+    residual = detrended - seasonal
+    centered = residual - residual.median()
+    robust_std = 1.4826 * centered.abs().median()
+    if not robust_std:
+        return pd.DataFrame()
+    return _flag_zscores(df, centered / robust_std, 'Seasonal-DOW', threshold)
+
 # --- 2. Data Preparation and Mode Manager (metric_desc update) ---
 
 def get_mode_name(mode: str) -> str:
@@ -111,28 +203,24 @@ def anomaly_detection_core(
 ) -> Dict:
     """
     Internal function to run detection and compile results using standardized data.
+
+    method is one of 'IQR', 'Z-Score' (global thresholds) or 'Rolling-IQR', 'Rolling-Z-Score',
+    'EWMA', 'Seasonal-DOW' (thresholds from each point's preceding history). The sequential
+    methods need a time-based mode; their points are put in date order first.
     """
     value_col = 'value'
+    if method.upper() in SEQUENTIAL_METHODS:
+        if 'date' not in ts_data.columns:
+            raise ValueError(f"Method '{method}' needs a time index (TIME_AGGREGATED or TIME_RAW mode).")
+        ts_data = ts_data.sort_values('date', kind='stable').reset_index(drop=True)
     
     # ------------------ PRINT START ------------------
-    print("-" * 50)
-    print(f"Investigated Parameter: {metric_desc}")
-    print(f"| Mode: {mode_name} | Frequency: {freq_name} | Method: {method}")
-    print("-" * 50)
+    _print_section_header(metric_desc, mode_name, freq_name, method)
 
     # Handle empty/filtered data
     if ts_data.empty:
         print("-> Data is empty after preparation. Skipping detection.")
-        return {
-            "analysis_mode": mode_name,
-            "frequency": freq_name,
-            "metric_desc": metric_desc,
-            "method": method,
-            "total_points": 0,
-            "anomaly_count": 0,
-            "anomalies": [],
-            "limit_description": "N/A - Empty Data"
-        }
+        return _empty_report_section(method, mode_name, freq_name, metric_desc)
 
     # 1. Detect
     if method.upper() == 'IQR':
@@ -143,11 +231,69 @@ def anomaly_detection_core(
         lower_limit = q1 - (1.5 * iqr)
         upper_limit = q3 + (1.5 * iqr)
         limit_text = f"IQR Limits: {lower_limit:,.2f} to {upper_limit:,.2f}"
+    elif method.upper() == 'ROLLING-IQR':
+        outliers = detect_rolling_iqr_outliers(ts_data, value_col)
+        limit_text = f"Rolling IQR Limits: Q1/Q3 of the previous {ROLLING_WINDOW} points +/- 1.5 IQR"
+    elif method.upper() == 'ROLLING-Z-SCORE':
+        outliers = detect_rolling_zscore_outliers(ts_data, value_col)
+        limit_text = f"Rolling Z-Score Limit: > +/- 3.0 Standard Deviations of the previous {ROLLING_WINDOW} points"
+    elif method.upper() == 'EWMA':
+        outliers = detect_ewma_outliers(ts_data, value_col)
+        limit_text = f"EWMA Limit: > +/- 3.0 Exponentially Weighted Standard Deviations (span {EWMA_SPAN})"
+    elif method.upper() == 'SEASONAL-DOW':
+        outliers = detect_seasonal_outliers(ts_data, value_col)
+        limit_text = "Seasonal Residual Limit: > +/- 3.0 Robust Standard Deviations (trend and day-of-week removed)"
     else:
         outliers = detect_zscore_outliers(ts_data, value_col)
         limit_text = "Z-Score Limit: > +/- 3.0 Standard Deviations"
+
+    return _compile_report_section(outliers, len(ts_data), method, mode_name, freq_name, metric_desc, limit_text)
+
+def format_index_id(index_id_val, freq_name: str) -> str:
+    """Formats an anomaly's index for the report (Timestamps by frequency, anything else as str)."""
+    # FIXED: Conditional formatting for Timestamp-based indices
+    if isinstance(index_id_val, pd.Timestamp):
+        if freq_name == 'Monthly':
+            return index_id_val.strftime('%Y-%m')  # e.g., 2023-11
+        elif freq_name == 'Weekly':
+            return index_id_val.strftime('%Y-W%W')  # e.g., 2023-W48
+        return index_id_val.strftime('%Y-%m-%d')  # default
+    return str(index_id_val)
+
+def _print_section_header(metric_desc: str, mode_name: str, freq_name: str, method: str):
+    print("-" * 50)
+    print(f"Investigated Parameter: {metric_desc}")
+    print(f"| Mode: {mode_name} | Frequency: {freq_name} | Method: {method}")
+    print("-" * 50)
+
+def _empty_report_section(method: str, mode_name: str, freq_name: str, metric_desc: str) -> Dict:
+    return {
+        "analysis_mode": mode_name,
+        "frequency": freq_name,
+        "metric_desc": metric_desc,
+        "method": method,
+        "total_points": 0,
+        "anomaly_count": 0,
+        "anomalies": [],
+        "limit_description": "N/A - Empty Data"
+    }
+
+def _compile_report_section(
+    outliers: pd.DataFrame,
+    total_points: int,
+    method: str,
+    mode_name: str,
+    freq_name: str,
+    metric_desc: str,
+    limit_text: str
+) -> Dict:
+    """
+    Prints the detection summary and builds the report section from the detected outliers
+    (columns: index_id, value, anomaly_type, plus z_score for the Z-Score method).
+    """
+    value_col = 'value'
     num_outliers = len(outliers)
-    print(f"-> Total Data Points: {len(ts_data)}")
+    print(f"-> Total Data Points: {total_points}")
     print(f"-> **Anomalies Found**: {num_outliers}")
     print(f"-> **Threshold**: {limit_text}")
 
@@ -157,7 +303,7 @@ def anomaly_detection_core(
         "metric_desc": metric_desc,
         "method": method,
         "limit_description": limit_text,
-        "total_points": int(len(ts_data)),
+        "total_points": int(total_points),
         "anomaly_count": int(num_outliers),
         "anomalies": []
     }
@@ -167,17 +313,7 @@ def anomaly_detection_core(
         print("\n--- ANOMALY DETAILS ---")
         outliers_to_report = outliers.sort_values(by=value_col, ascending=False)
         for _, row in outliers_to_report.iterrows():
-            index_id_val = row['index_id']
-            # FIXED: Conditional formatting for Timestamp-based indices
-            if isinstance(index_id_val, pd.Timestamp):
-                if freq_name == 'Monthly':
-                    index_id_str = index_id_val.strftime('%Y-%m')  # e.g., 2023-11
-                elif freq_name == 'Weekly':
-                    index_id_str = index_id_val.strftime('%Y-W%W')  # e.g., 2023-W48
-                else:
-                    index_id_str = index_id_val.strftime('%Y-%m-%d')  # default
-            else:
-                index_id_str = str(index_id_val)
+            index_id_str = format_index_id(row['index_id'], freq_name)
 
             val = row[value_col]
 
@@ -186,12 +322,16 @@ def anomaly_detection_core(
                     info = "Breached Upper IQR Limit"
                 else:
                     info = "Breached Lower IQR Limit"
+            elif method.upper() == 'ROLLING-IQR':
+                side = "Upper" if row['anomaly_type'] == 'Peak (High)' else "Lower"
+                info = f"Breached {side} Rolling IQR Limit ({row['lower_limit']:,.2f} to {row['upper_limit']:,.2f})"
             else:
                 info = f"Z-Score: {row['z_score']:.2f}"
 
             # --- IMPROVED OUTPUT FORMAT ---
-            print(f"[{index_id_str:<15}] | {row['anomaly_type']:<15} | "
-                  f"Value: {val:,.2f} | Reason: {info}")
+            if not is_quiet():
+                print(f"[{index_id_str:<15}] | {row['anomaly_type']:<15} | "
+                      f"Value: {val:,.2f} | Reason: {info}")
 
             report_section['anomalies'].append({
                 "index_id": index_id_str,
@@ -249,70 +389,254 @@ def perform_anomaly_detection(
     
     # Robust Saving Logic (metric_desc update)
     if output_path:
-        try:
-            path = Path(output_path)
-            path.parent.mkdir(parents=True, exist_ok=True)
-            with open(path, "w") as f:
-                final_output = {
-                    "pipeline_run_details": {
-                        "metric_desc": metric_desc, 
-                        "method": method,
-                        "analysis_mode": mode_name,
-                        "checks_run": [f"{r['frequency']} ({r['analysis_mode']})" for r in full_report]
-                    },
-                    "anomaly_checks": full_report
-                }
-                json.dump(final_output, f, indent=4)
-            print(f"[Anomalies] Successfully saved report to -> {path}")
-        except Exception as e:
-            print(f"[ERROR] Could not save anomaly report to {output_path}. Error: {e}")
+        save_anomaly_report(full_report, metric_desc, method, mode_name, output_path)
             
     return full_report
 
+def save_anomaly_report(
+    full_report: List[Dict],
+    metric_desc: str,
+    method: str,
+    mode_name: str,
+    output_path: Union[str, Path]
+):
+    """Saves the report sections of one metric as JSON (prints an error instead of raising)."""
+    try:
+        path = Path(output_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            final_output = {
+                "pipeline_run_details": {
+                    "metric_desc": metric_desc, 
+                    "method": method,
+                    "analysis_mode": mode_name,
+                    "checks_run": [f"{r['frequency']} ({r['analysis_mode']})" for r in full_report]
+                },
+                "anomaly_checks": full_report
+            }
+            json.dump(final_output, f, indent=4)
+        print(f"[Anomalies] Successfully saved report to -> {path}")
+    except Exception as e:
+        print(f"[ERROR] Could not save anomaly report to {output_path}. Error: {e}")
+
+# --- 5. Batched Engine (many metrics x many frequencies in one pass) ---
+
+def _detect_matrix(values: np.ndarray, included: np.ndarray, method: str) -> Dict[str, np.ndarray]:
+    """
+    Runs IQR or Z-Score detection on every column of a (points x metrics) matrix at once.
+    Rows not `included` for a metric are ignored for that metric, like the rows that
+    prepare_data_for_detection filters out.
+    """
+    masked = np.where(included, values, np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)  # metrics with no/one point
+        if method.upper() == 'IQR':
+            q1, q3 = np.nanquantile(masked, [0.25, 0.75], axis=0)
+            iqr = q3 - q1
+            lower, upper = q1 - (1.5 * iqr), q3 + (1.5 * iqr)
+            flags = (masked < lower) | (masked > upper)
+            return {"flags": flags, "lower": lower, "upper": upper}
+
+        mean = np.nanmean(masked, axis=0)
+        std = np.nanstd(masked, axis=0, ddof=1)
+        z_scores = (masked - mean) / np.where(std == 0, np.nan, std)
+        return {"flags": np.abs(z_scores) > 3.0, "z_scores": z_scores}
+
+def _resample_metrics(df: pd.DataFrame, value_cols: List[str], index_col: str, mode: str, freq: str | None):
+    """Returns (index_id values, dates, points x metrics float matrix, included mask) for one frequency."""
+    values = df[value_cols].astype(float)
+
+    if mode == 'DISTRIBUTIONAL':
+        matrix = values.to_numpy()
+        return df[index_col].reset_index(drop=True), None, matrix, np.ones(matrix.shape, dtype=bool)
+
+    if index_col not in df.columns:
+        raise ValueError(f"Time/Index column '{index_col}' not found for Time-based analysis.")
+    values['date'] = pd.to_datetime(df[index_col])
+
+    if mode == 'TIME_AGGREGATED' and freq:
+        # One resample for all metrics
+        grouped = values.groupby(pd.Grouper(key='date', freq=freq))[value_cols].sum()
+        matrix = grouped.to_numpy()
+        index_ids = grouped.index.to_series().reset_index(drop=True)
+        dates = index_ids
+    else:
+        matrix = values[value_cols].to_numpy()
+        index_ids = df[index_col].reset_index(drop=True)
+        dates = values['date'].reset_index(drop=True)
+    return index_ids, dates, matrix, matrix > 0
+
+def detect_anomalies_batched(
+    df: pd.DataFrame,
+    metrics: Dict[str, str],
+    index_col: str,
+    analysis_mode: str,
+    frequencies: List[str] = ['D', 'W'],
+    method: str = 'IQR'
+) -> Dict[str, List[Dict]]:
+    """
+    Anomaly detection for many metrics of the same DataFrame in one call. Each frequency is
+    resampled once for all metrics, and quantiles/means/stds are computed column-wise on the
+    resulting matrix. Produces, per metric, the same report sections as perform_anomaly_detection.
+
+    Parameters:
+    df : Input DataFrame.
+    metrics : Dict mapping each value column to its metric_desc.
+    index_col : Time/index column.
+    analysis_mode : TIME_AGGREGATED, TIME_RAW or DISTRIBUTIONAL.
+    frequencies : Frequencies for TIME_AGGREGATED mode.
+    method : 'IQR' or 'Z-Score' (computed on the whole matrix), or one of the sequential
+             methods 'Rolling-IQR', 'Rolling-Z-Score', 'EWMA', 'Seasonal-DOW' (run per metric).
+
+    Returns a dict mapping each value column to its list of report sections.
+    """
+    mode = analysis_mode.upper()
+    mode_name = get_mode_name(mode)
+    if mode not in ['TIME_AGGREGATED', 'TIME_RAW', 'DISTRIBUTIONAL']:
+        raise ValueError(f"Invalid analysis_mode specified: '{analysis_mode}'. Must be TIME_AGGREGATED, TIME_RAW, or DISTRIBUTIONAL.")
+    if mode == 'TIME_AGGREGATED' and not frequencies:
+        raise ValueError("frequencies list cannot be empty for TIME_AGGREGATED mode.")
+
+    value_cols = list(metrics)
+    missing = [col for col in value_cols if col not in df.columns]
+    if missing:
+        raise ValueError(f"Value column(s) {missing} not found in DataFrame.")
+
+    # Global methods run on the whole matrix; sequential ones (rolling, EWMA, seasonal) per metric
+    matrix_method = method.upper() in ('IQR', 'Z-SCORE')
+    if method.upper() in SEQUENTIAL_METHODS and mode == 'DISTRIBUTIONAL':
+        raise ValueError(f"Method '{method}' needs a time index (TIME_AGGREGATED or TIME_RAW mode).")
+
+    freqs = frequencies if mode == 'TIME_AGGREGATED' else [None]
+    detections = {}
+    for freq in freqs:
+        index_ids, dates, matrix, included = _resample_metrics(df, value_cols, index_col, mode, freq)
+        result = _detect_matrix(matrix, included, method) if matrix_method else None
+        detections[freq] = (index_ids, dates, matrix, included, result)
+
+    # Emit the sections metric by metric, in the same order perform_anomaly_detection prints them
+    reports = {}
+    for j, (value_col, metric_desc) in enumerate(metrics.items()):
+        print("="*80)
+        print(f"*** Anomaly Detection Analysis ***")
+        reports[value_col] = []
+        for freq in freqs:
+            index_ids, dates, matrix, included, result = detections[freq]
+            freq_name = get_freq_name(freq)
+            rows = np.flatnonzero(included[:, j])
+
+            if not matrix_method:
+                ts_data = pd.DataFrame({'index_id': index_ids.iloc[rows].reset_index(drop=True),
+                                        'value': matrix[rows, j]})
+                if dates is not None:
+                    ts_data['date'] = dates.iloc[rows].reset_index(drop=True)
+                reports[value_col].append(anomaly_detection_core(ts_data, method, mode_name, freq_name, metric_desc))
+                continue
+
+            _print_section_header(metric_desc, mode_name, freq_name, method)
+            if len(rows) == 0:
+                print("-> Data is empty after preparation. Skipping detection.")
+                reports[value_col].append(_empty_report_section(method, mode_name, freq_name, metric_desc))
+                continue
+
+            hits = rows[result["flags"][rows, j]]
+            outliers = pd.DataFrame({
+                'index_id': index_ids.iloc[hits].reset_index(drop=True),
+                'value': matrix[hits, j]
+            })
+            if method.upper() == 'IQR':
+                lower_limit, upper_limit = result["lower"][j], result["upper"][j]
+                limit_text = f"IQR Limits: {lower_limit:,.2f} to {upper_limit:,.2f}"
+                outliers['anomaly_type'] = np.where(outliers['value'] > upper_limit, 'Peak (High)', 'Valley (Low)')
+            else:
+                limit_text = "Z-Score Limit: > +/- 3.0 Standard Deviations"
+                outliers['z_score'] = result["z_scores"][hits, j]
+                outliers['anomaly_type'] = np.where(outliers['z_score'] > 0, 'Peak (High)', 'Valley (Low)')
 
+            reports[value_col].append(_compile_report_section(
+                outliers, len(rows), method, mode_name, freq_name, metric_desc, limit_text
+            ))
+        print("\n" + "="*80)
 
+    return reports
+
+def perform_batched_anomaly_detection(
+    df: pd.DataFrame,
+    metrics: Dict[str, str],
+    index_col: str,
+    analysis_mode: str,
+    frequencies: List[str] = ['D', 'W'],
+    method: str = 'IQR',
+    output_paths: Optional[Dict[str, Union[str, Path]]] = None) -> Dict[str, List[Dict]]:
+    """
+    Batched counterpart of perform_anomaly_detection: runs detect_anomalies_batched and saves
+    one JSON report per metric (output_paths maps value column -> path), in the same format.
+    """
+    reports = detect_anomalies_batched(df, metrics, index_col, analysis_mode, frequencies, method)
+    mode_name = get_mode_name(analysis_mode.upper())
+    for value_col, full_report in reports.items():
+        if output_paths and value_col in output_paths:
+            save_anomaly_report(full_report, metrics[value_col], method, mode_name, output_paths[value_col])
+    return reports
 
-def run_anomaly_detection():
-    # IMPORT DATA & RUN ANOMALY DETECTION 
 
-    PROJECT_ROOT = Path(__file__).resolve().parents[2] / "python" / "output" /"Anomaly_Detection"
 
-    ###### Sales/Revenue Anomaly Detection for Successful Orders
 
-    df1 = fetch_data_from_bq(q.GET_completed_daily_orders)  # only successful orders ('delivered', 'approved', 'shipped') (agg daily)
+# Warehouse queries read by run_anomaly_detection
+ANOMALY_QUERIES = [q.GET_completed_daily_orders, q.GET_canceled_daily_orders, q.GET_delivery_duration_time_series]
+
+def run_anomaly_detection(online=False, quiet=None, shared=None):
+    # IMPORT DATA & RUN ANOMALY DETECTION 
+    # quiet=True skips the console output and logs one timing record per check (see verbosity.py);
+    # None uses the pipeline-wide verbosity.
+    # shared=True computes the daily order series from the shared in-memory FACT_orders table
+    # (see datasets.py); None uses OLIST_SHARED_DATASETS.
+
+    shared = shared_datasets_enabled(shared)
+    with quiet_reports(quiet), REGISTRY.use(*(("FACT_orders",) if shared else ())):
+        if online:
+            # Score only the days added since the last run (see online_anomaly.py)
+            from .online_anomaly import run_online_anomaly_detection
+            with instrument("anomaly_check", "online"):
+                return run_online_anomaly_detection()
+
+        PROJECT_ROOT = Path(__file__).resolve().parents[2] / "python" / "output" /"Anomaly_Detection"
 
-    perform_anomaly_detection(df=df1, value_col= 'total_daily_revenue', index_col= 'order_purchase_date',
-                            analysis_mode= 'TIME_AGGREGATED',
-                            metric_desc= 'Total Sales', frequencies= ['D', 'W'], method= 'IQR',
-                            output_path= PROJECT_ROOT / "sales.json")
+        ###### Sales/Revenue and Successful Orders Anomaly Detection (both metrics in one batched pass over df1)
 
-    ###### Anomaly Detection for Successful Orders
+        with instrument("anomaly_check", "sales_and_successful_orders"):
+            df1 = fetch_data(q.GET_completed_daily_orders, shared=shared)  # only successful orders ('delivered', 'approved', 'shipped') (agg daily)
 
-    perform_anomaly_detection(df=df1, value_col= 'total_daily_orders', index_col= 'order_purchase_date',
-                            analysis_mode= 'TIME_AGGREGATED',
-                            metric_desc= 'Total Successful Orders', frequencies= ['D', 'W'], method= 'IQR',
-                            output_path= PROJECT_ROOT / "successful_orders.json")
+            perform_batched_anomaly_detection(df=df1,
+                                    metrics= {'total_daily_revenue': 'Total Sales',
+                                              'total_daily_orders': 'Total Successful Orders'},
+                                    index_col= 'order_purchase_date',
+                                    analysis_mode= 'TIME_AGGREGATED', frequencies= ['D', 'W'], method= 'IQR',
+                                    output_paths= {'total_daily_revenue': PROJECT_ROOT / "sales.json",
+                                                   'total_daily_orders': PROJECT_ROOT / "successful_orders.json"})
 
 
-    ###### Anomaly Detection for Canceled Orders
+        ###### Anomaly Detection for Canceled Orders
 
-    df2 = fetch_data_from_bq(q.GET_canceled_daily_orders)  # only canceled orders
+        with instrument("anomaly_check", "order_cancellations"):
+            df2 = fetch_data(q.GET_canceled_daily_orders, shared=shared)  # only canceled orders
 
-    perform_anomaly_detection(df=df2, value_col= 'total_daily_orders', index_col= 'order_purchase_date',
-                            analysis_mode= 'TIME_AGGREGATED',
-                            metric_desc= 'Total Order Cancellations', frequencies= ['D', 'W'], method= 'IQR',
-                            output_path= PROJECT_ROOT / "order_cancellations.json")
+            perform_anomaly_detection(df=df2, value_col= 'total_daily_orders', index_col= 'order_purchase_date',
+                                    analysis_mode= 'TIME_AGGREGATED',
+                                    metric_desc= 'Total Order Cancellations', frequencies= ['D', 'W'], method= 'IQR',
+                                    output_path= PROJECT_ROOT / "order_cancellations.json")
 
 
-    ###### Anomaly Detection for delivery times (number of days between purchase and delivery)
+        ###### Anomaly Detection for delivery times (number of days between purchase and delivery)
 
-    df3 = fetch_data_from_bq(q.GET_delivery_duration_time_series)  # delivery duration with time (only delivered orders)
+        with instrument("anomaly_check", "delivery_duration"):
+            df3 = fetch_data_from_bq(q.GET_delivery_duration_time_series)  # delivery duration with time (only delivered orders)
 
 
-    perform_anomaly_detection(df=df3, value_col= 'days_to_delivery', index_col= 'order_purchase_date',
-                            analysis_mode= 'DISTRIBUTIONAL',
-                            metric_desc= 'Delivery Duration in days', frequencies= ['D', 'W'], method= 'Z-Score',
-                            output_path= PROJECT_ROOT / "delivery_duration.json")
+            perform_anomaly_detection(df=df3, value_col= 'days_to_delivery', index_col= 'order_purchase_date',
+                                    analysis_mode= 'DISTRIBUTIONAL',
+                                    metric_desc= 'Delivery Duration in days', frequencies= ['D', 'W'], method= 'Z-Score',
+                                    output_path= PROJECT_ROOT / "delivery_duration.json")
 
 
 
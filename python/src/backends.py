@@ -0,0 +1,211 @@
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Fully-qualified BigQuery table names as written in sql_queries.py, e.g.
+# `olist-ecommerce-1234321.mart.FACT_orders` -> dataset "mart", table "FACT_orders"
+_TABLE_REF_PATTERN = re.compile(r"`[\w-]+\.([\w-]+)\.([\w-]+)`")
+
+# BigQuery DATE_TRUNC(expr, MONTH) -> DuckDB date_trunc('month', expr)
+_DATE_TRUNC_PATTERN = re.compile(
+    r"DATE_TRUNC\(\s*([^,()]+?)\s*,\s*(YEAR|QUARTER|MONTH|WEEK|DAY)\s*\)", re.IGNORECASE
+)
+
+# Default location of the local Parquet snapshot: <dir>/<dataset>/<table>.parquet
+DEFAULT_PARQUET_DIR = Path(__file__).resolve().parents[1] / "data" / "parquet"
+
+
+def bigquery_like_types(arrow_type):
+    """
+    Arrow -> pandas dtype mapping matching what BigQuery's to_dataframe() returns
+    (nullable Int64 / boolean), so local results produce the same dtypes and QC reports.
+    """
+    if pa.types.is_integer(arrow_type):
+        return pd.Int64Dtype()
+    if pa.types.is_boolean(arrow_type):
+        return pd.BooleanDtype()
+    return None
+
+
+class WarehouseBackend:
+    """
+    Interface behind fetch_data_from_bq. A backend runs SQL written for BigQuery
+    (as in sql_queries.py) and returns pandas DataFrames or Arrow tables.
+
+    submit() must not block on the query, so several jobs can be in flight at once;
+    collect() waits for a job and downloads its result.
+    """
+    name = "base"
+    dialect = "bigquery"  # SQL dialect for generated queries (see qc_pushdown.py)
+
+    def submit(self, sql_query):
+        """Starts a query and returns a job handle."""
+        raise NotImplementedError
+
+    def collect(self, job, as_arrow=False):
+        """
+        Waits for a job and returns (result, bytes_processed). The result is a pandas
+        DataFrame, or a pyarrow.Table when as_arrow is True.
+        """
+        raise NotImplementedError
+
+    def iter_batches(self, job):
+        """
+        Waits for a job and yields its result as pyarrow.RecordBatch objects, so callers
+        can process a large result without holding all of it in memory.
+        """
+        raise NotImplementedError
+
+    def table_last_modified(self, table_ref):
+        """Returns the last-modified time of a fully-qualified table as an ISO string."""
+        raise NotImplementedError
+
+    def query(self, sql_query, as_arrow=False):
+        """Runs a query and returns (result, bytes_processed)."""
+        return self.collect(self.submit(sql_query), as_arrow=as_arrow)
+
+
+class BigQueryBackend(WarehouseBackend):
+    """Runs queries on BigQuery and downloads results through the Storage Read API."""
+    name = "bigquery"
+
+    def __init__(self, client, storage_client):
+        self.client = client
+        self.storage_client = storage_client
+
+    def submit(self, sql_query):
+        return self.client.query(sql_query)
+
+    def collect(self, job, as_arrow=False):
+        if as_arrow:
+            result = job.to_arrow(bqstorage_client=self.storage_client)
+        else:
+            result = job.to_dataframe(bqstorage_client=self.storage_client)
+        return result, job.total_bytes_processed or 0
+
+    def iter_batches(self, job):
+        # Storage Read API streams arrive as Arrow record batches, one page at a time
+        for batch_table in job.result().to_arrow_iterable(bqstorage_client=self.storage_client):
+            if isinstance(batch_table, pa.Table):
+                yield from batch_table.to_batches()
+            else:
+                yield batch_table
+
+    def table_last_modified(self, table_ref):
+        return self.client.get_table(table_ref).modified.isoformat()
+
+
+class DuckDBBackend(WarehouseBackend):
+    """
+    Offline engine: runs the same queries with DuckDB over a local Parquet snapshot.
+
+    Every <data_dir>/<dataset>/<table>.parquet file (or <table>/ folder of Parquet files)
+    is exposed as the view <dataset>.<table>, and BigQuery table names in the SQL are
+    rewritten to point at those views.
+    """
+    name = "duckdb"
+    dialect = "duckdb"
+
+    def __init__(self, data_dir=DEFAULT_PARQUET_DIR):
+        import duckdb  # optional dependency, only needed for offline runs
+
+        self.data_dir = Path(data_dir)
+        if not self.data_dir.exists():
+            raise FileNotFoundError(f"Parquet snapshot directory not found: {self.data_dir}")
+
+        self.connection = duckdb.connect(database=":memory:")
+        self.connection.execute("SET TimeZone = 'UTC'")
+        self._lock = threading.Lock()
+        self._tables = {}
+        self._register_tables()
+
+    def _register_tables(self):
+        for dataset_dir in sorted(p for p in self.data_dir.iterdir() if p.is_dir()):
+            dataset = dataset_dir.name
+            self.connection.execute(f'CREATE SCHEMA IF NOT EXISTS "{dataset}"')
+            for entry in sorted(dataset_dir.iterdir()):
+                if entry.is_dir():
+                    files = sorted(entry.glob("*.parquet"))
+                    source = str(entry / "*.parquet")
+                elif entry.suffix == ".parquet":
+                    files = [entry]
+                    source = str(entry)
+                else:
+                    continue
+                if not files:
+                    continue
+                table = entry.stem if entry.is_file() else entry.name
+                self.connection.execute(
+                    f'CREATE VIEW "{dataset}"."{table}" AS SELECT * FROM read_parquet(\'{source}\')'
+                )
+                self._tables[(dataset, table)] = files
+
+    def translate_sql(self, sql_query):
+        """Rewrites BigQuery table names and the few BigQuery-only constructs used in sql_queries.py."""
+        sql = _TABLE_REF_PATTERN.sub(lambda m: f'"{m.group(1)}"."{m.group(2)}"', sql_query)
+        sql = _DATE_TRUNC_PATTERN.sub(lambda m: f"date_trunc('{m.group(2).lower()}', {m.group(1)})", sql)
+        return sql
+
+    def submit(self, sql_query):
+        # DuckDB runs in-process, so the job is simply the translated SQL;
+        # it is executed by collect() (one cursor per call keeps it thread-safe).
+        return self.translate_sql(sql_query)
+
+    def collect(self, job, as_arrow=False):
+        with self._lock:
+            cursor = self.connection.cursor()
+        try:
+            table = cursor.execute(job).fetch_arrow_table()
+        finally:
+            cursor.close()
+        if as_arrow:
+            return table, 0
+        return table.to_pandas(types_mapper=bigquery_like_types), 0
+
+    def iter_batches(self, job, batch_size=100_000):
+        with self._lock:
+            cursor = self.connection.cursor()
+        try:
+            reader = cursor.execute(job).fetch_record_batch(batch_size)
+            yield from reader
+        finally:
+            cursor.close()
+
+    def table_last_modified(self, table_ref):
+        _, dataset, table = table_ref.split(".")
+        files = self._tables.get((dataset, table))
+        if not files:
+            raise KeyError(f"No Parquet files registered for {table_ref}")
+        mtime = max(f.stat().st_mtime for f in files)
+        return datetime.fromtimestamp(mtime, tz=timezone.utc).isoformat()
+
+
+def snapshot_tables_to_parquet(source_backend, table_refs, data_dir=DEFAULT_PARQUET_DIR):
+    """
+    Copies whole tables from a backend (normally BigQuery) into the local Parquet layout
+    used by DuckDBBackend, so the pipeline can then run offline.
+
+    Parameters:
+    source_backend : Backend to read from.
+    table_refs : Fully-qualified table names, e.g. 'olist-ecommerce-1234321.mart.FACT_orders'.
+    data_dir : Root of the Parquet snapshot.
+    """
+    data_dir = Path(data_dir)
+    for table_ref in table_refs:
+        _, dataset, table = table_ref.split(".")
+        table_data, _ = source_backend.query(f"SELECT * FROM `{table_ref}`", as_arrow=True)
+        path = data_dir / dataset / f"{table}.parquet"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table_data, path)
+        print(f"[Snapshot] {table_ref} → {path} ({table_data.num_rows:,} rows)")
+
+
+def backend_name_from_env():
+    """Backend selected through the OLIST_WAREHOUSE environment variable (default: bigquery)."""
+    return os.environ.get("OLIST_WAREHOUSE", "bigquery").strip().lower()
@@ -1,7 +1,10 @@
 import json
+import os
 from pathlib import Path
 from typing import Dict, Any, List
 from datetime import datetime
+from .llm_providers import estimate_tokens
+from .ai_generator import AI_REPORTS
 
 def intro_text():
     return f"""
@@ -126,6 +129,44 @@ def ending_text():
 """
 
 
+# Context sections in output order, with their priority when the context has to be
+# compacted to fit a token budget (1 = most important, compacted last and never omitted).
+CONTEXT_SECTIONS = [
+    ("executive_summary", "build_executive_summary", 1),
+    ("data_quality", "build_data_quality_section", 10),
+    ("time_series", "build_time_series_section", 2),
+    ("product", "build_product_section", 7),
+    ("category", "build_category_section", 5),
+    ("regional", "build_regional_section", 6),
+    ("delivery", "build_delivery_section", 4),
+    ("customer", "build_customer_section", 8),
+    ("seller", "build_seller_section", 9),
+    ("anomaly", "build_anomaly_section", 3),
+]
+
+DATA_QUALITY_NOTE = "NOTE THAT DATA QC REPORT REFLECTS PROBLEMS IN DATA SOURCES. THE DATA IS CLEANED (DEDUPLICATED,ETC.) FOR ANALYTICS."
+
+# Maximum context size (estimated tokens) per target model. The context is built for the
+# smallest budget among the models of ai_generator.AI_REPORTS; OLIST_CONTEXT_TOKEN_BUDGET
+# overrides it ('none' disables compaction).
+CONTEXT_TOKEN_BUDGETS = {
+    "gpt-4o-mini": 16_000,
+    "gemini-2.5-flash": 16_000,
+}
+
+# List lengths tried, in order, when a section's lists are shortened to fit the budget
+COMPACT_LIST_LIMITS = (5, 3)
+
+
+def context_token_budget():
+    """Token budget for business_context.txt (None = no limit), see CONTEXT_TOKEN_BUDGETS."""
+    override = os.environ.get("OLIST_CONTEXT_TOKEN_BUDGET", "").strip().lower()
+    if override:
+        return None if override in ("none", "0") else int(override)
+    budgets = [CONTEXT_TOKEN_BUDGETS[r.model] for r in AI_REPORTS if r.model in CONTEXT_TOKEN_BUDGETS]
+    return min(budgets) if budgets else None
+
+
 class BusinessContextBuilder:
     """
     Builds comprehensive business context from multiple JSON report files
@@ -144,6 +185,11 @@ class BusinessContextBuilder:
         self.reports = {}
         self.anomaly_reports = {}
         self.qc_reports = {}
+
+        # Compaction settings of the section being built (see build_section)
+        self.list_limit = None
+        self.qc_detail = "full"
+        self._lists_trimmed = False
         
         # Define subdirectories for input files
         self.analysis_subdir = "Analysis"
@@ -218,6 +264,19 @@ class BusinessContextBuilder:
             report_name = filename.replace('.json', '')
             self.qc_reports[report_name] = self.load_report(filename, self.qc_subdir)
     
+    def _top(self, items: List, default: int = None, from_end: bool = False) -> List:
+        """
+        The entries a section lists: the first `default` ones (all if None), or the last ones
+        with from_end=True. In a compacted section at most `list_limit` entries are listed.
+        """
+        limit = default
+        if self.list_limit is not None and (limit is None or self.list_limit < limit):
+            limit = self.list_limit
+            self._lists_trimmed = self._lists_trimmed or len(items) > limit
+        if limit is None:
+            return items
+        return items[-limit:] if from_end else items[:limit]
+    
     def format_currency(self, value: float) -> str:
         """Format currency values."""
         return f"${value:,.2f}"
@@ -296,7 +355,7 @@ class BusinessContextBuilder:
             section += "\n"
             
             section += "Last 12 Months Monthly Performance:\n"
-            for month_data in last_12_months:
+            for month_data in self._top(last_12_months, from_end=True):
                 mom_revenue = month_data.get('revenue_mom_pct')
                 mom_orders = month_data.get('orders_mom_pct')
                 section += f"\n{month_data.get('month')}:\n"
@@ -313,7 +372,7 @@ class BusinessContextBuilder:
             section += "\n"
         elif monthly_data:
             section += f"Monthly Performance (Last {len(monthly_data)} months):\n"
-            for month_data in monthly_data:
+            for month_data in self._top(monthly_data, from_end=True):
                 mom_revenue = month_data.get('revenue_mom_pct')
                 mom_orders = month_data.get('orders_mom_pct')
                 section += f"\n{month_data.get('month')}:\n"
@@ -356,7 +415,7 @@ class BusinessContextBuilder:
         
         if top_by_revenue:
             section += "Top 10 Categories by Revenue:\n"
-            for i, cat in enumerate(top_by_revenue[:10], 1):
+            for i, cat in enumerate(self._top(top_by_revenue, 10), 1):
                 section += f"{i}. {cat.get('product_category_name')}: "
                 section += f"{self.format_currency(cat.get('total_revenue', 0))} "
                 section += f"({self.format_percentage(cat.get('revenue_percentage', 0))} of total, "
@@ -365,7 +424,7 @@ class BusinessContextBuilder:
         
         if bottom:
             section += "Bottom 5 Categories (Underperformers):\n"
-            for i, cat in enumerate(bottom[:5], 1):
+            for i, cat in enumerate(self._top(bottom, 5), 1):
                 section += f"{i}. {cat.get('product_category_name')}: "
                 section += f"{self.format_currency(cat.get('total_revenue', 0))} "
                 section += f"({cat.get('total_items_sold', 0)} items)\n"
@@ -399,7 +458,7 @@ class BusinessContextBuilder:
         
         if top_by_spending:
             section += "Top 10 Provinces by Total Spending:\n"
-            for i, prov in enumerate(top_by_spending[:10], 1):
+            for i, prov in enumerate(self._top(top_by_spending, 10), 1):
                 section += f"{i}. {prov.get('province')}: "
                 section += f"{self.format_currency(prov.get('total_spending', 0))} "
                 section += f"({self.format_percentage(prov.get('spending_percentage', 0))} of total, "
@@ -408,7 +467,7 @@ class BusinessContextBuilder:
         
         if top_by_avg:
             section += "Top 5 Provinces by Avg Customer Value:\n"
-            for i, prov in enumerate(top_by_avg[:5], 1):
+            for i, prov in enumerate(self._top(top_by_avg, 5), 1):
                 section += f"{i}. {prov.get('province')}: "
                 section += f"{self.format_currency(prov.get('avg_spending_per_customer', 0))} per customer "
                 section += f"({prov.get('total_customers', 0):,} customers)\n"
@@ -444,7 +503,7 @@ class BusinessContextBuilder:
         
         if top_revenue:
             section += "Top 5 Sellers by Revenue:\n"
-            for i, s in enumerate(top_revenue[:5], 1):
+            for i, s in enumerate(self._top(top_revenue, 5), 1):
                 section += f"{i}. Seller {s.get('seller_id')[:8]}...: "
                 section += f"{self.format_currency(s.get('total_revenue', 0))} "
                 section += f"({s.get('total_orders', 0):,} orders, "
@@ -453,7 +512,7 @@ class BusinessContextBuilder:
         
         if bottom_reviews:
             section += "Bottom 5 Sellers by Review Score (min 10 orders):\n"
-            for i, s in enumerate(bottom_reviews[:5], 1):
+            for i, s in enumerate(self._top(bottom_reviews, 5), 1):
                 section += f"{i}. Seller {s.get('seller_id')[:8]}...: "
                 section += f"{s.get('avg_review_score', 0):.2f}/5.0 rating "
                 section += f"({s.get('total_orders', 0)} orders, "
@@ -532,7 +591,7 @@ class BusinessContextBuilder:
         
         if rfm_segments:
             section += "Customer Segmentation (RFM):\n"
-            for seg in rfm_segments:
+            for seg in self._top(rfm_segments):
                 section += f"\n{seg.get('segment')}:\n"
                 section += f"  - Customers: {seg.get('customer_count', 0):,} "
                 section += f"({self.format_percentage(seg.get('percentage_of_customers', 0))})\n"
@@ -551,7 +610,7 @@ class BusinessContextBuilder:
         
         if cohort_data:
             section += "Average Retention and Revenue by Period (months since first purchase):\n"
-            for period in cohort_data:
+            for period in self._top(cohort_data):
                 section += f"Month {period.get('period_index')}: "
                 section += f"{self.format_percentage(period.get('retention_rate', 0))} retention, "
                 section += f"{self.format_currency(period.get('avg_revenue_per_cohort', 0))} avg revenue, "
@@ -581,7 +640,7 @@ class BusinessContextBuilder:
         
         if top_revenue:
             section += "Top 10 Products by Revenue:\n"
-            for i, prod in enumerate(top_revenue[:10], 1):
+            for i, prod in enumerate(self._top(top_revenue, 10), 1):
                 section += f"{i}. Product {prod.get('product_id')[:8]}... ({prod.get('product_category_name')}): "
                 section += f"{self.format_currency(prod.get('total_revenue', 0))} "
                 section += f"({prod.get('total_items_sold', 0):,} items, "
@@ -629,7 +688,7 @@ class BusinessContextBuilder:
                 anomalies = check.get('anomalies', [])
                 if anomalies:
                     section += f"  - Top Anomalies:\n"
-                    for i, anom in enumerate(anomalies[:5], 1):
+                    for i, anom in enumerate(self._top(anomalies, 5), 1):
                         val = anom.get('value', 0)
                         section += f"    {i}. {anom.get('index_id')}: {self.format_currency(val)} ({anom.get('type')})\n"
             section += "\n" + "-" * 80 + "\n"
@@ -656,7 +715,7 @@ class BusinessContextBuilder:
                 anomalies = check.get('anomalies', [])
                 if anomalies:
                     section += f"  - Top Anomalies:\n"
-                    for i, anom in enumerate(anomalies[:5], 1):
+                    for i, anom in enumerate(self._top(anomalies, 5), 1):
                         section += f"    {i}. {anom.get('index_id')}: {anom.get('value')} cancellations ({anom.get('type')})\n"
             section += "\n" + "-" * 80 + "\n"
         
@@ -682,7 +741,7 @@ class BusinessContextBuilder:
                 anomalies = check.get('anomalies', [])
                 if anomalies:
                     section += f"  - Top Anomalies:\n"
-                    for i, anom in enumerate(anomalies[:5], 1):
+                    for i, anom in enumerate(self._top(anomalies, 5), 1):
                         section += f"    {i}. {anom.get('index_id')}: {anom.get('value')} orders ({anom.get('type')})\n"
             section += "\n" + "-" * 80 + "\n"
         
@@ -708,7 +767,7 @@ class BusinessContextBuilder:
                 anomalies = check.get('anomalies', [])
                 if anomalies:
                     section += f"  - Notable Anomalies:\n"
-                    for i, anom in enumerate(anomalies[:5], 1):
+                    for i, anom in enumerate(self._top(anomalies, 5), 1):
                         section += f"    {i}. {anom.get('index_id')}: {anom.get('value'):.2f} days ({anom.get('type')})\n"
                 section += "\n"
         
@@ -755,6 +814,14 @@ class BusinessContextBuilder:
             total_columns = report.get('total_columns', 0)
             total_duplicated = report.get('total_duplicated_rows', 0)
             
+            if self.qc_detail == "summary":
+                # Compacted context: one line per table instead of the column-level metrics
+                columns_with_nulls = sum(1 for col_info in report.get('column_qc', {}).values()
+                                         if col_info.get('null_count', 0) > 0)
+                section += f"- {df_name}: {total_rows:,} rows, {total_columns} columns, "
+                section += f"{total_duplicated:,} duplicated rows, {columns_with_nulls} columns with nulls\n"
+                continue
+            
             section += f"- {df_name}:\n"
             section += f"   • Rows: {total_rows:,}\n"
             section += f"   • Columns: {total_columns}\n"
@@ -798,7 +865,7 @@ class BusinessContextBuilder:
                     low_cardinality = [(name, count) for name, count in unique_counts if count < 10]
                     if low_cardinality:
                         section += f"   • Low Cardinality Columns (<10 unique values): {len(low_cardinality)}\n"
-                        for name, count in low_cardinality[:3]:  # Show first 3
+                        for name, count in self._top(low_cardinality, 3):  # Show first 3
                             section += f"     - {name}: {count} unique values\n"
                 
                 # Show data type distribution
@@ -813,6 +880,9 @@ class BusinessContextBuilder:
             
             section += "\n"
         
+        if self.qc_detail == "summary":
+            section += "\n"
+        
         # Data quality issues summary
         section += "DATA QUALITY ISSUES SUMMARY:\n"
         section += "-" * 40 + "\n\n"
@@ -844,7 +914,7 @@ class BusinessContextBuilder:
             # Sort by null percentage descending
             issues_found.sort(key=lambda x: x['null_percent'], reverse=True)
             
-            for issue in issues_found[:5]:  # Show top 5
+            for issue in self._top(issues_found, 5):  # Show top 5
                 section += f"• {issue['table']}.{issue['column']}: "
                 section += f"{issue['null_percent']:.3f}% null ({issue['null_count']:,} null values)\n"
         else:
@@ -883,58 +953,124 @@ class BusinessContextBuilder:
         section += "\n"
         return section
     
-    def build_full_context(self) -> str:
-        """Build the complete business context."""
+    def build_section(self, name: str, list_limit: int = None, qc_detail: str = "full") -> str:
+        """
+        Builds one section of CONTEXT_SECTIONS.
+        
+        Args:
+            name: Section name
+            list_limit: Maximum number of entries per list (None keeps the section's own lengths)
+            qc_detail: 'summary' reduces the data quality tables to one line per table
+        """
+        builder = {section: method for section, method, _ in CONTEXT_SECTIONS}[name]
+        self.list_limit, self.qc_detail, self._lists_trimmed = list_limit, qc_detail, False
+        try:
+            section = getattr(self, builder)()
+            if self._lists_trimmed:
+                section += f"(Lists in this section are shortened to their top {list_limit} entries.)\n\n"
+        finally:
+            self.list_limit, self.qc_detail = None, "full"
+        if name == "data_quality":
+            section += DATA_QUALITY_NOTE
+        return section
+    
+    def assemble_context(self, sections: Dict[str, str], generated: str) -> str:
+        """Joins the fixed intro/ending prompts and the sections into the full context."""
         context = "\n"
         context += intro_text()
         context += "\n"
         context += "=" * 80 + "\n"
         context += "COMPREHENSIVE BUSINESS INTELLIGENCE REPORT\n"
-        context += f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+        context += f"Generated: {generated}\n"
         context += "NOTE: The following report represents analyst-generated outputs and metrics."
         context += "\n      It has NOT been independently validated and is subject to review.\n"
 
-        # Main Analytics Reports
-        context += self.build_executive_summary()
-        # Data Quality section
-        context += self.build_data_quality_section()
-        context += "NOTE THAT DATA QC REPORT REFLECTS PROBLEMS IN DATA SOURCES. THE DATA IS CLEANED (DEDUPLICATED,ETC.) FOR ANALYTICS."
-        # Other Analytics
-        context += self.build_time_series_section()
-        context += self.build_product_section()
-        context += self.build_category_section()
-        context += self.build_regional_section()
-        context += self.build_delivery_section()
-        context += self.build_customer_section()
-        context += self.build_seller_section()
-        
-        # Anomaly Detection
-        context += self.build_anomaly_section()
+        # Executive summary, data quality, other analytics and anomaly detection
+        for name, _, _ in CONTEXT_SECTIONS:
+            context += sections[name]
 
         context += "=" * 80 + "\n"
         context += "END OF REPORT\n"
         context += "=" * 80
         context += ending_text()
+        return context
     
+    def compact_sections(self, sections: Dict[str, str], token_budget: int, generated: str):
+        """
+        Shrinks the sections until the context fits token_budget (estimated tokens). Lowest
+        priority sections are compacted first, one step at a time:
+        1. the data quality tables are reduced to one line per table,
+        2. each section's lists are shortened (COMPACT_LIST_LIMITS),
+        3. whole sections are replaced by a one-line note (except priority 1).
+        Returns the compacted sections and the list of steps taken.
+        """
+        sections = dict(sections)
+        low_priority_first = [name for name, _, _ in sorted(CONTEXT_SECTIONS, key=lambda s: -s[2])]
+        keep = {name for name, _, priority in CONTEXT_SECTIONS if priority == 1}
+
+        def qc_detail(name):
+            return "summary" if name == "data_quality" else "full"
+
+        def candidates():
+            yield "data_quality", "tables summarized", lambda: self.build_section("data_quality", qc_detail="summary")
+            for limit in COMPACT_LIST_LIMITS:
+                for name in low_priority_first:
+                    yield name, f"lists cut to {limit}", lambda: self.build_section(name, limit, qc_detail(name))
+            for name in low_priority_first:
+                if name not in keep:
+                    title = name.replace("_", " ").upper()
+                    yield name, "omitted", lambda: f"[{title} section omitted to fit the context size budget.]\n\n"
+
+        steps = {}  # section -> last compaction step applied to it
+        for name, step, build in candidates():
+            if estimate_tokens(self.assemble_context(sections, generated)) <= token_budget:
+                break
+            compacted = build()
+            if compacted != sections[name]:
+                sections[name] = compacted
+                steps[name] = step
+        return sections, [f"{name} {step}" for name, step in steps.items()]
+    
+    def build_full_context(self, token_budget: int = None) -> str:
+        """
+        Build the complete business context.
+        
+        Args:
+            token_budget: Maximum estimated tokens; if the context is larger, the low-priority
+                          sections are compacted (see compact_sections). None builds it in full.
+        """
+        generated = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        sections = {name: self.build_section(name) for name, _, _ in CONTEXT_SECTIONS}
+        context = self.assemble_context(sections, generated)
+
+        if token_budget is not None and estimate_tokens(context) > token_budget:
+            full_tokens = estimate_tokens(context)
+            sections, steps = self.compact_sections(sections, token_budget, generated)
+            context = self.assemble_context(sections, generated)
+            print(f"✂️ Context compacted from ~{full_tokens:,} to ~{estimate_tokens(context):,} tokens "
+                  f"(budget {token_budget:,}): {'; '.join(steps)}")
+            if estimate_tokens(context) > token_budget:
+                print("⚠️ The context is still over budget after compaction (the fixed prompts and key sections are kept).")
         
         return context
     
-    def save_context(self, output_file: str = "business_context.txt"):
+    def save_context(self, output_file: str = "business_context.txt", token_budget: int = None):
         """Save the built context to a file."""
-        context = self.build_full_context()
+        context = self.build_full_context(token_budget)
         output_path = self.reports_dir / output_file
         
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(context)
         
         print(f"Business context saved to: {output_path}")
-        print(f"Total length: {len(context):,} characters")
+        print(f"Total length: {len(context):,} characters (~{estimate_tokens(context):,} tokens)")
         return output_path
     
 
-def run_context_builder():
+def run_context_builder(token_budget=None):
     """
     Main execution function called by the Orchestrator (run_all.py).
+    token_budget: Maximum estimated tokens of the context (defaults to context_token_budget()).
     """
     # 1. Dynamically find the output directory relative to this file
     # Path: src/context_builder.py -> src/ -> python/ -> OLIST/
@@ -950,7 +1086,8 @@ def run_context_builder():
     
     # 4. Build and save the aggregated .txt file
     # This creates: .../python/output/business_context.txt
-    output_path = builder.save_context("business_context.txt")
+    output_path = builder.save_context("business_context.txt",
+                                       token_budget if token_budget is not None else context_token_budget())
     
     return output_path
 
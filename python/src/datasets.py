@@ -0,0 +1,328 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from . import sql_queries as q
+from .utils import fetch_data_from_bq, fetch_many_from_bq, convert_result, decode_dictionaries, normalize_sql
+from .metrics import record_query
+
+# --- Shared in-memory datasets ---
+#
+# Several analysis and anomaly queries scan the same star-schema tables (FACT_orders,
+# FACT_order_items, DIM_customers, DIM_products) with the same delivered-status filters.
+# With shared datasets on, those tables are fetched once per run as Arrow tables (only the
+# columns the queries use) and the queries in DERIVED_QUERIES are computed locally from them
+# instead of being sent to the warehouse. The other queries are fetched as usual.
+#
+# Tables are reference-counted: a consumer holds the tables it needs with REGISTRY.use(...),
+# a table is loaded the first time it is read and dropped from memory when its last holder
+# lets go. `run_all --shared-datasets` holds them for the whole run, so the analysis and
+# anomaly detection stages share one copy.
+#
+# Turn on with OLIST_SHARED_DATASETS=1, set_shared_datasets(True), `run_all --shared-datasets`
+# or the shared= argument of run_analysis / run_anomaly_detection. The JSON outputs are the same.
+
+# Shared tables: name -> query loading them
+SHARED_TABLES = {
+    "FACT_orders": q.GET_shared_orders,
+    "FACT_order_items": q.GET_shared_order_items,
+    "DIM_customers": q.GET_shared_customers,
+    "DIM_products": q.GET_shared_products,
+}
+
+_enabled = None
+
+
+def set_shared_datasets(enabled):
+    """Turns shared datasets on or off for the whole process (None defers to OLIST_SHARED_DATASETS)."""
+    global _enabled
+    _enabled = enabled
+
+
+def shared_datasets_enabled(shared=None):
+    """Resolves a shared= argument: an explicit value wins, then set_shared_datasets, then the environment."""
+    if shared is not None:
+        return shared
+    if _enabled is not None:
+        return _enabled
+    return os.environ.get("OLIST_SHARED_DATASETS", "").strip().lower() in ("1", "true", "yes")
+
+
+class DatasetRegistry:
+    """
+    Keeps the shared tables in memory while they are in use.
+
+    use() / acquire() take a reference to tables without loading them. get() loads a table
+    on first use (once, even if several threads ask for it at the same time) and release()
+    drops it from memory when its last reference is given back.
+    """
+
+    def __init__(self, tables=None):
+        self.queries = dict(SHARED_TABLES if tables is None else tables)
+        self._lock = threading.Lock()
+        self._load_locks = {name: threading.Lock() for name in self.queries}
+        self._refs = {}
+        self._tables = {}
+
+    def acquire(self, *names):
+        with self._lock:
+            for name in names:
+                if name not in self.queries:
+                    raise KeyError(f"Unknown shared table '{name}'. Use one of {', '.join(self.queries)}.")
+            for name in names:
+                self._refs[name] = self._refs.get(name, 0) + 1
+
+    def release(self, *names):
+        with self._lock:
+            for name in names:
+                count = self._refs.get(name, 0) - 1
+                if count > 0:
+                    self._refs[name] = count
+                else:
+                    self._refs.pop(name, None)
+                    self._tables.pop(name, None)
+
+    @contextmanager
+    def use(self, *names):
+        """Holds references to the tables for the duration of the block."""
+        self.acquire(*names)
+        try:
+            yield self
+        finally:
+            self.release(*names)
+
+    def get(self, name):
+        """Returns the table as a pyarrow.Table, loading it on first use; None if it could not be fetched."""
+        with self._lock:
+            if not self._refs.get(name):
+                raise RuntimeError(f"Shared table '{name}' must be acquired before it is read.")
+            if name in self._tables:
+                return self._tables[name]
+
+        with self._load_locks[name]:
+            with self._lock:
+                if name in self._tables:  # loaded by another thread meanwhile
+                    return self._tables[name]
+            table = fetch_data_from_bq(self.queries[name], output="arrow")
+            if table is not None:
+                # Plain strings: the joins and distinct counts below do not take dictionary columns
+                table = decode_dictionaries(table)
+            with self._lock:
+                if table is not None and self._refs.get(name):
+                    self._tables[name] = table
+            return table
+
+    def loaded(self):
+        """Names of the tables currently in memory."""
+        with self._lock:
+            return sorted(self._tables)
+
+
+# Registry shared by every stage of the run
+REGISTRY = DatasetRegistry()
+
+
+# -------------------------
+# Queries computed from the shared tables
+# -------------------------
+# Each function reproduces the result of its SQL query in sql_queries.py (same columns,
+# types and join semantics). Aggregations run single-threaded so sums do not depend on
+# thread scheduling, and grouped results are sorted by their group key (pyarrow group_by
+# returns groups in hash order), so the reports are the same from run to run, ties in
+# their rankings included.
+
+def _delivered(orders):
+    return orders.filter(pc.equal(orders["order_status"], "delivered"))
+
+
+def _join(left, right, keys, join_type="inner"):
+    return left.join(right, keys, join_type=join_type, use_threads=False)
+
+
+def _group(table, keys, aggregations):
+    return table.group_by(keys, use_threads=False).aggregate(aggregations)
+
+
+def _by_key(table, key):
+    """Rows sorted by the group key (missing key last: sort_by's default null placement)."""
+    return table.sort_by([(key, "ascending")])
+
+
+def _daily_orders(orders, statuses):
+    orders = orders.filter(pc.is_in(orders["order_status"], value_set=pa.array(statuses)))
+    daily = pa.table({
+        "order_purchase_date": pc.cast(orders["order_purchase_timestamp"], pa.date32()),
+        "order_id": orders["order_id"],
+        "payment_value": orders["payment_value"],
+    })
+    daily = _by_key(_group(daily, "order_purchase_date", [("order_id", "count_distinct"), ("payment_value", "sum")]),
+                    "order_purchase_date")
+    return daily.rename_columns(["order_purchase_date", "total_daily_orders", "total_daily_revenue"]) \
+                .select(["order_purchase_date", "total_daily_orders", "total_daily_revenue"])
+
+
+def completed_daily_orders(orders):
+    """GET_completed_daily_orders"""
+    return _daily_orders(orders, ["delivered", "shipped"])
+
+
+def canceled_daily_orders(orders):
+    """GET_canceled_daily_orders"""
+    return _daily_orders(orders, ["canceled"])
+
+
+def product_category_performance(orders, items, products):
+    """GET_product_category_performance (the join to delivered orders keeps every item, as in the SQL)"""
+    items = _join(items, _delivered(orders).select(["order_id"]), "order_id", "left outer")
+    rows = _join(products.select(["product_id", "product_category_name"]), items, "product_id", "left outer")
+    rows = rows.append_column("_revenue", pc.add(rows["price"], rows["freight_value"]))
+    result = _by_key(_group(rows, "product_category_name",
+                            [("order_id", "count_distinct"), ("order_item_id", "count"), ("_revenue", "sum")]),
+                     "product_category_name")
+    return pa.table({
+        "product_category_name": result["product_category_name"],
+        "total_orders": result["order_id_count_distinct"],
+        "total_items_sold": result["order_item_id_count"],
+        "total_revenue": pc.fill_null(result["_revenue_sum"], 0.0),
+    })
+
+
+def region_performance(orders, customers):
+    """GET_region_performance"""
+    customers = customers.filter(pc.is_valid(customers["province"]))
+    rows = _join(customers, _delivered(orders).select(["order_id", "customer_id", "payment_value"]), "customer_id")
+    result = _by_key(_group(rows, "province", [("latitude", "mean"), ("longitude", "mean"),
+                                               ("customer_unique_id", "count_distinct"),
+                                               ("order_id", "count_distinct"), ("payment_value", "sum")]),
+                     "province")
+    return pa.table({
+        "province": result["province"],
+        "latitude": result["latitude_mean"],
+        "longitude": result["longitude_mean"],
+        "total_customers": result["customer_unique_id_count_distinct"],
+        "total_orders": result["order_id_count_distinct"],
+        "total_spending": result["payment_value_sum"],
+    })
+
+
+def overall_business_metrics(orders, items, customers):
+    """GET_overal_business_metrics"""
+    delivered = _delivered(orders).select(["order_id", "customer_id", "payment_value"])
+    delivered_items = _join(items.select(["order_id", "seller_id"]), delivered.select(["order_id"]), "order_id")
+    delivered_customers = _join(customers.select(["customer_id", "customer_unique_id"]),
+                                delivered.select(["customer_id"]), "customer_id")
+    total_orders = delivered.num_rows
+    total_items = delivered_items.num_rows
+    return pa.table({
+        "total_customers": pa.array([pc.count_distinct(delivered_customers["customer_unique_id"]).as_py()], pa.int64()),
+        "total_sellers": pa.array([pc.count_distinct(delivered_items["seller_id"]).as_py()], pa.int64()),
+        "total_orders": pa.array([total_orders], pa.int64()),
+        "total_items_ordered": pa.array([total_items], pa.int64()),
+        "total_revenue": pa.array([pc.sum(delivered["payment_value"]).as_py()], pa.float64()),
+        "avg_order_value": pa.array([pc.mean(delivered["payment_value"]).as_py()], pa.float64()),
+        "avg_basket_size": pa.array([total_items * 1.0 / total_orders if total_orders > 0 else 0.0], pa.float64()),
+    })
+
+
+def monthly_time_series(orders, items):
+    """GET_monthly_time_series"""
+    delivered = _delivered(orders)
+    delivered = pa.table({
+        "order_id": delivered["order_id"],
+        "customer_id": delivered["customer_id"],
+        "month": pc.floor_temporal(delivered["order_purchase_timestamp"], unit="month"),
+        "payment_value": delivered["payment_value"],
+    })
+    quantities = _group(items.select(["order_id"]), "order_id", [([], "count_all")]) \
+        .rename_columns(["order_id", "total_items_ordered"])
+    sellers = _group(_join(delivered.select(["order_id", "month"]), items.select(["order_id", "seller_id"]), "order_id"),
+                     "month", [("seller_id", "count_distinct")]).rename_columns(["month", "total_sellers"])
+
+    rows = _join(_join(delivered, quantities, "order_id"), sellers, "month")
+    result = _group(rows, ["month", "total_sellers"],
+                    [("order_id", "count_distinct"), ("customer_id", "count_distinct"),
+                     ("total_items_ordered", "sum"), ("payment_value", "sum")]).sort_by("month")
+    orders_count = result["order_id_count_distinct"]
+    round_half_up = lambda values: pc.round(values, 2, round_mode="half_towards_infinity")
+    return pa.table({
+        "month": result["month"],
+        "total_orders": orders_count,
+        "total_customers": result["customer_id_count_distinct"],
+        "total_sellers": result["total_sellers"],
+        "total_items_ordered": result["total_items_ordered_sum"],
+        "total_revenue": result["payment_value_sum"],
+        "avg_order_value": round_half_up(pc.divide(result["payment_value_sum"], pc.cast(orders_count, pa.float64()))),
+        "avg_basket_size": round_half_up(pc.divide(pc.cast(result["total_items_ordered_sum"], pa.float64()),
+                                                   pc.cast(orders_count, pa.float64()))),
+    })
+
+
+DerivedQuery = namedtuple("DerivedQuery", ["tables", "compute"])
+
+# Queries computed from the shared tables (normalized SQL -> tables passed to compute, in order)
+DERIVED_QUERIES = {
+    normalize_sql(q.GET_completed_daily_orders): DerivedQuery(("FACT_orders",), completed_daily_orders),
+    normalize_sql(q.GET_canceled_daily_orders): DerivedQuery(("FACT_orders",), canceled_daily_orders),
+    normalize_sql(q.GET_product_category_performance): DerivedQuery(
+        ("FACT_orders", "FACT_order_items", "DIM_products"), product_category_performance),
+    normalize_sql(q.GET_region_performance): DerivedQuery(("FACT_orders", "DIM_customers"), region_performance),
+    normalize_sql(q.GET_overal_business_metrics): DerivedQuery(
+        ("FACT_orders", "FACT_order_items", "DIM_customers"), overall_business_metrics),
+    normalize_sql(q.GET_monthly_time_series): DerivedQuery(("FACT_orders", "FACT_order_items"), monthly_time_series),
+}
+
+
+def is_derived(sql_query):
+    """True if the query can be computed from the shared tables."""
+    return normalize_sql(sql_query) in DERIVED_QUERIES
+
+
+def derive(sql_query, output="pandas", registry=None):
+    """
+    Computes a query listed in DERIVED_QUERIES from the shared tables and returns it in the
+    requested output format (as fetch_data_from_bq would). Returns None if a shared table
+    could not be fetched.
+    """
+    registry = registry or REGISTRY
+    derived = DERIVED_QUERIES[normalize_sql(sql_query)]
+    with registry.use(*derived.tables):
+        tables = [registry.get(name) for name in derived.tables]
+        if any(table is None for table in tables):
+            print("🛑 Could not compute the query locally: a shared table was not fetched.")
+            return None
+        start = time.perf_counter()
+        result = derived.compute(*tables)
+        seconds = time.perf_counter() - start
+
+    print(f"🧮 Computed locally from the shared tables ({', '.join(derived.tables)}). Returned {result.num_rows} rows.")
+    record_query("ok", rows=result.num_rows, seconds=seconds, derived=True)
+    return convert_result(result, output)
+
+
+def fetch_data(sql_query, shared=None, output="pandas"):
+    """fetch_data_from_bq, computing the query from the shared tables when shared datasets are on and it can be."""
+    if shared_datasets_enabled(shared) and is_derived(sql_query):
+        return derive(sql_query, output=output)
+    return fetch_data_from_bq(sql_query, output=output)
+
+
+def fetch_many(queries, shared=None, max_workers=None, output="pandas"):
+    """
+    fetch_many_from_bq, computing the queries that can be from the shared tables when shared
+    datasets are on. Yields (name, result) pairs: the warehouse results first, as they arrive.
+    """
+    if not shared_datasets_enabled(shared):
+        yield from fetch_many_from_bq(queries, max_workers=max_workers, output=output)
+        return
+
+    remote = {name: sql for name, sql in queries.items() if not is_derived(sql)}
+    if remote:
+        yield from fetch_many_from_bq(remote, max_workers=max_workers, output=output)
+    for name, sql_query in queries.items():
+        if name not in remote:
+            yield name, derive(sql_query, output=output)
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import sys
+import threading
+from pathlib import Path
+from types import ModuleType
+
+# --- Stage input fingerprints (skip-if-unchanged) ---
+#
+# A pipeline stage can describe its inputs as a small JSON-able dictionary: last-modified
+# times of the warehouse tables it reads, hashes of the files it reads, a hash of the prompt
+# it sends and a hash of its own source code. The scheduler hashes that dictionary before
+# running the stage; if it matches the fingerprint saved after the stage last succeeded and
+# the stage's outputs are still there, the stage is not run and its outputs are reused.
+#
+# Fingerprints are saved in python/.cache/stage_fingerprints.json. Delete the file (or run
+# with `run_all --force`) to rerun everything.
+
+FINGERPRINTS_PATH = Path(__file__).resolve().parents[1] / ".cache" / "stage_fingerprints.json"
+
+_lock = threading.Lock()
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def hash_files(*paths, pattern="*") -> str:
+    """
+    Hashes the names and contents of the given files. Directories contribute every file
+    matching `pattern` inside them (recursively); missing paths contribute their name only.
+    """
+    digest = hashlib.sha256()
+    for path in map(Path, paths):
+        files = sorted(path.rglob(pattern)) if path.is_dir() else [path]
+        for file in files:
+            if not file.is_file():
+                digest.update(f"missing:{file}".encode("utf-8"))
+                continue
+            digest.update(str(file.relative_to(path.parent)).encode("utf-8"))
+            digest.update(file.read_bytes())
+    return digest.hexdigest()
+
+
+def _local_modules(module, found):
+    """Adds the module and every module of its own package it imports from, recursively."""
+    if module.__name__ in found:
+        return
+    found[module.__name__] = module
+    package = module.__name__.rpartition(".")[0]
+    for value in vars(module).values():
+        name = value.__name__ if isinstance(value, ModuleType) else getattr(value, "__module__", None)
+        if isinstance(name, str) and package and name.startswith(package + ".") and name in sys.modules:
+            _local_modules(sys.modules[name], found)
+
+
+def code_version(*modules) -> str:
+    """
+    Hash of the source files of the given modules and of the package modules they import
+    from (e.g. analysis -> utils, sql_queries, formatting, ...), so any code change reruns the stage.
+    """
+    found = {}
+    for module in modules:
+        _local_modules(module, found)
+    return hash_files(*(Path(found[name].__file__) for name in sorted(found)))
+
+
+def fingerprint_digest(inputs):
+    """Hashes an input description; None (inputs unknown) gives None, which never matches."""
+    if inputs is None:
+        return None
+    return hash_text(json.dumps(inputs, sort_keys=True, default=str))
+
+
+def load_fingerprints(path=None) -> dict:
+    path = Path(path) if path else FINGERPRINTS_PATH
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def outputs_exist(outputs) -> bool:
+    """True if every output file exists and every output directory is non-empty."""
+    for path in map(Path, outputs):
+        if path.is_dir():
+            if not any(path.iterdir()):
+                return False
+        elif not path.is_file():
+            return False
+    return True
+
+
+def is_unchanged(stage_name, digest, outputs=(), path=None) -> bool:
+    """True if the stage last succeeded with the same input fingerprint and its outputs still exist."""
+    if digest is None:
+        return False
+    return load_fingerprints(path).get(stage_name) == digest and outputs_exist(outputs)
+
+
+def save_fingerprint(stage_name, digest, path=None) -> None:
+    """Stores the stage's input fingerprint (digest=None forgets it, e.g. after a failure)."""
+    path = Path(path) if path else FINGERPRINTS_PATH
+    with _lock:
+        fingerprints = load_fingerprints(path)
+        if digest is None:
+            if fingerprints.pop(stage_name, None) is None:
+                return
+        else:
+            fingerprints[stage_name] = digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(fingerprints, f, indent=2, sort_keys=True)
@@ -0,0 +1,117 @@
+from collections import namedtuple
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from .verbosity import is_quiet
+
+# --- Console display formatting for the analysis reports ---
+#
+# The report tables are printed from declarative column specs instead of building a copy of
+# each table and formatting it with a `.apply(lambda ...)` per column. Every formatter works
+# on a whole column at once and produces the same text as the f-string it replaces:
+#
+#   'currency'        f"${x:,.2f}"
+#   'currency_plain'  f"${x:.2f}"
+#   'percent'         f"{x}%"
+#   'pct_change'      f"{x:+.1f}%"
+#   'decimal_1'       f"{x:.1f}"
+#   'decimal_2'       f"{x:.2f}"
+#   'round_2'         column rounded to 2 decimals, left numeric for pandas to print
+#   'month'           x.strftime('%Y-%m')
+#   'short_id'        x[:16] + '...'
+#
+# A Column with na="N/A" prints missing values as "N/A" instead of formatting them.
+# In quiet mode (see verbosity.py) the tables are neither built nor printed.
+
+Column = namedtuple("Column", ["column", "header", "fmt", "na"], defaults=(None, None))
+
+def _as_float_array(values: pd.Series) -> np.ndarray:
+    return values.to_numpy(dtype=float, na_value=np.nan)
+
+
+def _add_thousands_separators(text: np.ndarray) -> np.ndarray:
+    """Inserts ',' every three digits in the integer part of formatted numbers."""
+    parts = pd.Series(text, dtype=object).str.partition('.')
+    integer = parts[0].str.replace(r"(\d)(?=(?:\d{3})+$)", r"\1,", regex=True)
+    return (integer + parts[1] + parts[2]).to_numpy(dtype=object)
+
+
+def format_fixed(values: pd.Series, decimals: int = 2, sign: bool = False, suffix: str = "") -> np.ndarray:
+    """f"{x:.<decimals>f}" for a whole column (f"{x:+.<decimals>f}" with sign=True)."""
+    spec = f"%{'+' if sign else ''}.{decimals}f"
+    text = np.char.mod(spec, _as_float_array(values))
+    return np.char.add(text, suffix) if suffix else text
+
+
+def format_currency(values: pd.Series, decimals: int = 2, thousands: bool = True) -> np.ndarray:
+    """f"${x:,.2f}" (or f"${x:.2f}" with thousands=False) for a whole column."""
+    text = format_fixed(values, decimals)
+    if thousands:
+        text = _add_thousands_separators(text)
+    return np.char.add("$", text.astype(str))
+
+
+def format_percent(values: pd.Series) -> np.ndarray:
+    """f"{x}%" for a whole column; the value is printed as Python would print it."""
+    if pd.api.types.is_integer_dtype(values.dtype):
+        text = values.to_numpy(dtype=np.int64).astype(str)
+    else:
+        text = _as_float_array(values).astype(str)  # shortest repr, same as str(float)
+    return np.char.add(text, "%")
+
+
+def format_month(values: pd.Series) -> pd.Series:
+    return values.dt.strftime('%Y-%m')
+
+
+def format_short_id(values: pd.Series, width: int = 16) -> pd.Series:
+    return values.str[:width] + '...'
+
+
+DISPLAY_FORMATS = {
+    'currency': format_currency,
+    'currency_plain': partial(format_currency, thousands=False),
+    'percent': format_percent,
+    'pct_change': partial(format_fixed, decimals=1, sign=True, suffix="%"),
+    'decimal_1': partial(format_fixed, decimals=1),
+    'decimal_2': partial(format_fixed, decimals=2),
+    'round_2': lambda values: values.round(2),
+    'month': format_month,
+    'short_id': format_short_id,
+}
+
+
+def format_column(values: pd.Series, fmt=None, na=None):
+    """Formats one column with a DISPLAY_FORMATS name (None keeps the values as they are)."""
+    if fmt is None:
+        return values.reset_index(drop=True)
+    formatted = DISPLAY_FORMATS[fmt](values)
+    if isinstance(formatted, pd.Series):
+        formatted = formatted.reset_index(drop=True)
+    if na is not None:
+        formatted = np.where(values.notna().to_numpy(), np.asarray(formatted, dtype=object), na)
+    return formatted
+
+
+def render_table(df: pd.DataFrame, columns) -> str:
+    """
+    Builds the display table for df and returns it as text (no index).
+
+    Parameters:
+    df : Source rows, in display order.
+    columns : List of Column specs, in display order.
+    """
+    display = pd.DataFrame({
+        i: format_column(df[spec.column], spec.fmt, spec.na) for i, spec in enumerate(columns)
+    })
+    display.columns = [spec.header for spec in columns]
+    return display.to_string(index=False)
+
+
+def print_table(df: pd.DataFrame, columns) -> None:
+    """Prints render_table(df, columns); does nothing in quiet mode."""
+    if is_quiet():
+        return
+    print(render_table(df, columns))
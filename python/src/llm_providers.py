@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import os
+
+
+class LLMProvider:
+    """
+    Interface behind ai_generator. A provider sends one prompt to a model and returns the
+    generated text.
+
+    generate() is a coroutine so the reports of several providers can be requested at the
+    same time. A provider owns one client (and its connection pool) for all of its calls;
+    aclose() releases it once the run is finished.
+
+    stream() yields the response as it is generated, as (text, completion_tokens) pairs:
+    completion_tokens is the provider's token count when it reports one (usually with the
+    last chunk), otherwise None. Texts are always strings ("" when the model returned none).
+
+    is_retryable() tells ai_generator which failed calls are worth another attempt.
+    """
+    name = "base"
+
+    async def generate(self, prompt, model, temperature=None):
+        """Returns the model's full response to the prompt."""
+        raise NotImplementedError
+
+    def is_retryable(self, error):
+        """
+        True for transient errors: timeouts, connection errors, rate limits (429) and server
+        errors (5xx). Anything else (authentication, bad request, unknown model...) is final.
+        """
+        if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+            return True
+        status = _status_code(error)
+        return status is not None and (status == 429 or status >= 500)
+
+    async def stream(self, prompt, model, temperature=None):
+        """Yields the response in chunks (providers without a streaming API yield it whole)."""
+        yield await self.generate(prompt, model, temperature), None
+
+    async def aclose(self):
+        """Closes the provider's client."""
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI chat completions through the async client (uses OPENAI_API_KEY)."""
+    name = "openai"
+
+    def __init__(self):
+        from openai import AsyncOpenAI
+
+        self.client = AsyncOpenAI(max_retries=0)  # ai_generator retries (see is_retryable)
+
+    async def generate(self, prompt, model, temperature=None):
+        kwargs = {} if temperature is None else {"temperature": temperature}
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            **kwargs
+        )
+        return response.choices[0].message.content or ""
+
+    async def stream(self, prompt, model, temperature=None):
+        kwargs = {} if temperature is None else {"temperature": temperature}
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True,
+            stream_options={"include_usage": True},  # token usage arrives with the last chunk
+            **kwargs
+        )
+        async for chunk in response:
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            usage = getattr(chunk, "usage", None)
+            yield text or "", usage.completion_tokens if usage else None
+
+    def is_retryable(self, error):
+        from openai import APIConnectionError  # includes APITimeoutError
+
+        return isinstance(error, APIConnectionError) or super().is_retryable(error)
+
+    async def aclose(self):
+        await self.client.close()
+
+
+class GeminiProvider(LLMProvider):
+    """Gemini through the async interface of the google-genai client (uses GOOGLE_API_KEY)."""
+    name = "gemini"
+
+    def __init__(self):
+        from google import genai
+
+        self.client = genai.Client(api_key=os.environ.get("GOOGLE_API_KEY"))
+
+    async def generate(self, prompt, model, temperature=None):
+        config = None if temperature is None else {"temperature": temperature}
+        response = await self.client.aio.models.generate_content(
+            model=model,
+            contents=prompt,
+            config=config
+        )
+        return response.text or ""
+
+    async def stream(self, prompt, model, temperature=None):
+        config = None if temperature is None else {"temperature": temperature}
+        response = await self.client.aio.models.generate_content_stream(
+            model=model,
+            contents=prompt,
+            config=config
+        )
+        async for chunk in response:
+            usage = getattr(chunk, "usage_metadata", None)
+            yield chunk.text or "", getattr(usage, "candidates_token_count", None) if usage else None
+
+    def is_retryable(self, error):
+        import httpx  # the transport of google-genai
+
+        return isinstance(error, httpx.TransportError) or super().is_retryable(error)
+
+
+class StubProvider(LLMProvider):
+    """
+    Offline provider for tests and benchmarks: returns a short deterministic report after
+    `delay` seconds (OLIST_LLM_STUB_DELAY, default 0), without any network access. In
+    streaming mode the report arrives word by word, spread over the same delay.
+    """
+    name = "stub"
+
+    def __init__(self, delay=None):
+        self.delay = float(os.environ.get("OLIST_LLM_STUB_DELAY", 0)) if delay is None else delay
+
+    def _report(self, prompt, model):
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        return (f"[stub report from {model}]\n"
+                f"Prompt: {len(prompt):,} characters, {len(prompt.split()):,} words (sha256 {digest}).\n")
+
+    async def generate(self, prompt, model, temperature=None):
+        await asyncio.sleep(self.delay)
+        return self._report(prompt, model)
+
+    async def stream(self, prompt, model, temperature=None):
+        words = self._report(prompt, model).split(" ")
+        for i, word in enumerate(words):
+            await asyncio.sleep(self.delay / len(words))
+            yield word if i == 0 else " " + word, len(words) if i == len(words) - 1 else None
+
+
+def _status_code(error):
+    """HTTP status of an API error (openai: status_code, google-genai: code), or None."""
+    for attribute in ("status_code", "code"):
+        status = getattr(error, attribute, None)
+        if isinstance(status, int):
+            return status
+    return None
+
+
+PROVIDERS = {
+    "openai": OpenAIProvider,
+    "gemini": GeminiProvider,
+    "stub": StubProvider,
+}
+
+
+def estimate_tokens(text):
+    """
+    Rough token count for English text (~4 characters per token), for when a provider
+    reports none. `text` can also be a character count.
+    """
+    chars = text if isinstance(text, int) else len(text or "")
+    return max(1, round(chars / 4)) if chars else 0
+
+
+def create_provider(name):
+    """Creates the provider registered under `name` in PROVIDERS."""
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider '{name}'. Use one of {', '.join(PROVIDERS)}.")
+    return PROVIDERS[name]()
+
+
+def provider_override_from_env():
+    """
+    Provider used for every report when OLIST_LLM_PROVIDER is set (e.g. 'stub' for offline
+    runs); None keeps each report's own provider.
+    """
+    name = os.environ.get("OLIST_LLM_PROVIDER", "").strip().lower()
+    return name or None
@@ -0,0 +1,282 @@
+import contextlib
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .verbosity import log_event
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+# --- Run instrumentation ---
+#
+# Every pipeline step, analysis report, QC table and anomaly check runs inside instrument(),
+# and every warehouse query is recorded by record_query(). Each stage records:
+# wall and CPU seconds, the process peak RSS at the end of the stage and, if memory
+# tracing is on, the tracemalloc peak during the stage. Each query records rows, bytes
+# processed, slot-ms (BigQuery only), cache hits and download time. Each LLM call
+# (record_llm_call) records its duration, time to first token and tokens/sec.
+#
+# write_run_metrics() saves everything as run_metrics.json, plus an OpenMetrics text file
+# if asked, so runs can be compared over time. CPU time and peak RSS cover the whole
+# process, so with concurrent fetches they include work done by other threads.
+
+METRICS_DIR = Path(__file__).resolve().parents[1] / "output"
+
+_lock = threading.Lock()
+_local = threading.local()
+_run = {"started": None, "trace_memory": False, "stages": [], "queries": [], "llm_calls": []}
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+def _peak_rss_mb():
+    """Peak resident set size of the process so far, in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes on Linux
+    return round(peak / (1024**2 if sys.platform == "darwin" else 1024), 1)
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def start_run(trace_memory=False):
+    """
+    Clears the recorded metrics and starts a new run.
+
+    Parameters:
+    trace_memory : If True, tracemalloc is started so every stage also records its Python
+                   allocation peak (this slows allocation-heavy code noticeably).
+    """
+    with _lock:
+        _run.update(started=_now(), trace_memory=trace_memory, stages=[], queries=[], llm_calls=[])
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def current_stage_path():
+    """Path of the innermost stage running on this thread (None outside any stage)."""
+    stack = _stack()
+    return stack[-1]["path"] if stack else None
+
+
+@contextlib.contextmanager
+def instrument(kind, name, parent_path=None, **labels):
+    """
+    Measures the block as one stage and records it (and logs it in quiet mode).
+    Exceptions are recorded with status 'error' and re-raised.
+
+    Parameters:
+    kind : Stage type, e.g. 'step', 'report', 'qc_table', 'anomaly_check'.
+    name : Stage name, e.g. 'analysis' or 'rfm'.
+    parent_path : Path of the enclosing stage when it runs on another thread (see current_stage_path).
+    labels : Extra fields stored with the record (rows, mode, ...).
+    """
+    stack = _stack()
+    parent = stack[-1] if stack else None
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        # Nested stages share one tracemalloc peak: fold the parent's peak so far into its
+        # running maximum before resetting the counter for this stage
+        if parent is not None:
+            parent["_traced_peak"] = max(parent["_traced_peak"], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+    prefix = parent["path"] if parent else parent_path
+    frame = {"path": f"{prefix}/{kind}:{name}" if prefix else f"{kind}:{name}", "_traced_peak": 0}
+    stack.append(frame)
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    status, error = "ok", None
+    try:
+        yield
+    except BaseException as e:
+        status, error = "error", repr(e)
+        raise
+    finally:
+        stack.pop()
+        record = {
+            "kind": kind,
+            "name": name,
+            "path": frame["path"],
+            **labels,
+            "status": status,
+            "wall_seconds": round(time.perf_counter() - wall_start, 4),
+            "cpu_seconds": round(time.process_time() - cpu_start, 4),
+            "peak_rss_mb": _peak_rss_mb(),
+        }
+        if tracing:
+            traced_peak = max(frame["_traced_peak"], tracemalloc.get_traced_memory()[1])
+            record["traced_peak_mb"] = round(traced_peak / 1024**2, 2)
+            if parent is not None:
+                parent["_traced_peak"] = max(parent["_traced_peak"], traced_peak)
+            tracemalloc.reset_peak()
+        if error is not None:
+            record["error"] = error
+        with _lock:
+            _run["stages"].append(record)
+        log_event(kind, **{k: v for k, v in record.items() if k != "kind"})
+
+
+def record_query(status, rows=0, bytes_processed=0, seconds=None, cache_hit=False, slot_ms=None, stage=None,
+                 **extra):
+    """
+    Records one warehouse query (and logs it in quiet mode).
+    stage is the path of the stage that ran it when it was downloaded on another thread
+    (see current_stage_path); by default the innermost stage on this thread.
+    """
+    record = {
+        "stage": stage if stage is not None else current_stage_path(),
+        "status": status,
+        "rows": int(rows),
+        "bytes_processed": int(bytes_processed),
+        "slot_ms": slot_ms,
+        "cache_hit": cache_hit,
+        "seconds": None if seconds is None else round(seconds, 4),
+        **extra,
+    }
+    with _lock:
+        _run["queries"].append(record)
+    log_event("query", **record)
+
+
+def record_llm_call(provider, model, status, seconds=None, ttft_seconds=None, tokens=None,
+                    tokens_estimated=False, streamed=False, cache_hit=False, **extra):
+    """
+    Records one LLM call (and logs it in quiet mode).
+
+    Parameters:
+    seconds : Total duration of the call.
+    ttft_seconds : Time to first token (streaming calls only).
+    tokens : Completion tokens; tokens_estimated=True if counted from the text, not by the provider.
+    """
+    stack = _stack()
+    generation_seconds = None if seconds is None else seconds - (ttft_seconds or 0)
+    record = {
+        "stage": stack[-1]["path"] if stack else None,
+        "provider": provider,
+        "model": model,
+        "status": status,
+        "streamed": streamed,
+        "cache_hit": cache_hit,
+        "seconds": None if seconds is None else round(seconds, 4),
+        "ttft_seconds": None if ttft_seconds is None else round(ttft_seconds, 4),
+        "tokens": tokens,
+        "tokens_estimated": tokens_estimated,
+        "tokens_per_second": (round(tokens / generation_seconds, 2)
+                              if tokens and generation_seconds and not cache_hit else None),
+        **extra,
+    }
+    with _lock:
+        _run["llm_calls"].append(record)
+    log_event("llm_call", **record)
+
+
+def run_summary():
+    """Returns the recorded run as a dictionary (the content of run_metrics.json)."""
+    with _lock:
+        stages, queries, llm_calls = list(_run["stages"]), list(_run["queries"]), list(_run["llm_calls"])
+    slot_ms = [q["slot_ms"] for q in queries if q["slot_ms"] is not None]
+    return {
+        "run_started": _run["started"],
+        "run_finished": _now(),
+        "trace_memory": _run["trace_memory"],
+        "totals": {
+            "queries": len(queries),
+            "failed_queries": sum(q["status"] == "error" for q in queries),
+            "cache_hits": sum(q["cache_hit"] for q in queries),
+            "rows_fetched": sum(q["rows"] for q in queries),
+            "bytes_processed": sum(q["bytes_processed"] for q in queries),
+            "slot_ms": sum(slot_ms) if slot_ms else None,
+            "llm_calls": len(llm_calls),
+            "llm_tokens": sum(c["tokens"] or 0 for c in llm_calls if not c["cache_hit"]),
+            "peak_rss_mb": _peak_rss_mb(),
+        },
+        "stages": stages,
+        "queries": queries,
+        "llm_calls": llm_calls,
+    }
+
+
+def _label_text(labels):
+    escaped = {k: str(v).replace("\\", "\\\\").replace('"', '\\"') for k, v in labels.items()}
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped.items()) + "}"
+
+
+def to_openmetrics(summary):
+    """Renders a run_summary() dictionary in the OpenMetrics text format."""
+    lines = []
+
+    def family(metric, help_text, samples):
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"# HELP {metric} {help_text}")
+        for labels, value in samples:
+            if value is not None:
+                lines.append(f"{metric}{_label_text(labels)} {value}")
+
+    stage_labels = [({"kind": s["kind"], "name": s["name"], "path": s["path"]}, s) for s in summary["stages"]]
+    family("olist_stage_wall_seconds", "Wall time of a pipeline stage.",
+           [(labels, s["wall_seconds"]) for labels, s in stage_labels])
+    family("olist_stage_cpu_seconds", "Process CPU time during a pipeline stage.",
+           [(labels, s["cpu_seconds"]) for labels, s in stage_labels])
+    family("olist_stage_peak_rss_megabytes", "Process peak RSS at the end of a pipeline stage.",
+           [(labels, s["peak_rss_mb"]) for labels, s in stage_labels])
+    family("olist_stage_traced_peak_megabytes", "tracemalloc peak during a pipeline stage.",
+           [(labels, s.get("traced_peak_mb")) for labels, s in stage_labels])
+
+    call_labels = [({"provider": c["provider"], "model": c["model"], "call": str(i)}, c)
+                   for i, c in enumerate(summary["llm_calls"]) if not c["cache_hit"]]
+    family("olist_llm_seconds", "Duration of an LLM call.",
+           [(labels, c["seconds"]) for labels, c in call_labels])
+    family("olist_llm_ttft_seconds", "Time to first token of a streamed LLM call.",
+           [(labels, c["ttft_seconds"]) for labels, c in call_labels])
+    family("olist_llm_tokens_per_second", "Generation speed of an LLM call.",
+           [(labels, c["tokens_per_second"]) for labels, c in call_labels])
+
+    totals = summary["totals"]
+    for key, help_text in [("queries", "Warehouse queries run."),
+                           ("failed_queries", "Warehouse queries that failed."),
+                           ("cache_hits", "Queries served from the local cache."),
+                           ("rows_fetched", "Rows fetched from the warehouse or cache."),
+                           ("bytes_processed", "Bytes processed by the warehouse."),
+                           ("slot_ms", "BigQuery slot milliseconds."),
+                           ("llm_calls", "LLM calls made or served from the response cache."),
+                           ("llm_tokens", "Completion tokens generated by LLM calls.")]:
+        family(f"olist_run_{key}", help_text, [({}, totals[key])])
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def write_run_metrics(path=None, openmetrics_path=None):
+    """
+    Writes the recorded run to run_metrics.json (and optionally an OpenMetrics text file).
+
+    Parameters:
+    path : JSON output path (defaults to python/output/run_metrics.json).
+    openmetrics_path : If provided, the same metrics are also written there in OpenMetrics format.
+    """
+    summary = run_summary()
+    path = Path(path) if path else METRICS_DIR / "run_metrics.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(summary, f, indent=2, default=str)
+    print(f"[Metrics] Saved run metrics → {path}")
+
+    if openmetrics_path:
+        openmetrics_path = Path(openmetrics_path)
+        openmetrics_path.parent.mkdir(parents=True, exist_ok=True)
+        openmetrics_path.write_text(to_openmetrics(summary))
+        print(f"[Metrics] Saved OpenMetrics text → {openmetrics_path}")
+    return summary
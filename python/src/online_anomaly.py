@@ -0,0 +1,345 @@
+import os
+import json
+import pickle
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import sql_queries as q
+from .utils import fetch_data_from_bq
+from .qc_profile import QuantileSketch
+from .anomaly_detection import (
+    perform_anomaly_detection, get_freq_name, format_index_id,
+    ROLLING_WINDOW, ROLLING_MIN_PERIODS, EWMA_SPAN
+)
+
+# --- Online Anomaly Detection ---
+#
+# Keeps per-metric detector state (quantile sketch, running moments, rolling window,
+# EWMA and per-weekday baselines) in a small pickle next to the query cache. Each run
+# fetches only the days after the last checkpoint, scores them one by one against the
+# state and appends the results to the existing Anomaly_Detection/*.json reports.
+# Points already in a report are not re-judged against the updated baseline.
+
+ANOMALY_STATE_DIR = Path(__file__).resolve().parents[1] / ".cache" / "anomaly_state"
+ANOMALY_OUTPUT_DIR = Path(__file__).resolve().parents[2] / "python" / "output" / "Anomaly_Detection"
+
+# Same checks as run_anomaly_detection, one entry per output file
+ONLINE_ANOMALY_CHECKS = {
+    "sales": {
+        "query": q.GET_completed_daily_orders, "value_col": "total_daily_revenue",
+        "index_col": "order_purchase_date", "analysis_mode": "TIME_AGGREGATED",
+        "metric_desc": "Total Sales", "frequencies": ['D', 'W'], "method": "IQR"
+    },
+    "successful_orders": {
+        "query": q.GET_completed_daily_orders, "value_col": "total_daily_orders",
+        "index_col": "order_purchase_date", "analysis_mode": "TIME_AGGREGATED",
+        "metric_desc": "Total Successful Orders", "frequencies": ['D', 'W'], "method": "IQR"
+    },
+    "order_cancellations": {
+        "query": q.GET_canceled_daily_orders, "value_col": "total_daily_orders",
+        "index_col": "order_purchase_date", "analysis_mode": "TIME_AGGREGATED",
+        "metric_desc": "Total Order Cancellations", "frequencies": ['D', 'W'], "method": "IQR"
+    },
+    "delivery_duration": {
+        "query": q.GET_delivery_duration_time_series, "value_col": "days_to_delivery",
+        "index_col": "order_purchase_date", "analysis_mode": "DISTRIBUTIONAL",
+        "metric_desc": "Delivery Duration in days", "frequencies": ['D', 'W'], "method": "Z-Score"
+    },
+}
+
+_PERIOD_FREQS = {'W': 'W-SUN', 'M': 'M', 'ME': 'M'}
+
+
+class OnlineDetector:
+    """
+    Detector state for one metric at one frequency. score() judges a new point against
+    the history seen so far, update() adds it; both cost O(1) (O(window) for the rolling
+    methods, O(sketch size) for IQR) no matter how long the history is.
+    """
+
+    def __init__(self, method: str):
+        self.method = method
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sketch = QuantileSketch() if method.upper() == 'IQR' else None
+        self.window = deque(maxlen=ROLLING_WINDOW)
+        self.ew_mean = None
+        self.ew_var = 0.0
+        self.weekdays = {}  # weekday -> [count, mean, m2]
+
+    @staticmethod
+    def _welford(count, mean, m2, value):
+        count += 1
+        delta = value - mean
+        mean += delta / count
+        m2 += delta * (value - mean)
+        return count, mean, m2
+
+    def update(self, value: float, when: pd.Timestamp):
+        self.count, self.mean, self.m2 = self._welford(self.count, self.mean, self.m2, value)
+        if self.sketch is not None:
+            self.sketch.update([value])
+        self.window.append(value)
+
+        alpha = 2.0 / (EWMA_SPAN + 1)
+        if self.ew_mean is None:
+            self.ew_mean = value
+        else:
+            diff = value - self.ew_mean
+            increment = alpha * diff
+            self.ew_mean += increment
+            self.ew_var = (1 - alpha) * (self.ew_var + diff * increment)
+
+        day = when.dayofweek
+        self.weekdays[day] = list(self._welford(*self.weekdays.get(day, [0, 0.0, 0.0]), value))
+
+    def _baseline(self, when: pd.Timestamp):
+        """Returns ('iqr', lower, upper) or ('z', mean, std) for the current state, or None."""
+        method = self.method.upper()
+        if method == 'IQR':
+            if self.count < 2:
+                return None
+            q1, q3 = self.sketch.quantile(0.25), self.sketch.quantile(0.75)
+            return 'iqr', q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        if method == 'ROLLING-IQR':
+            if len(self.window) < ROLLING_MIN_PERIODS:
+                return None
+            q1, q3 = np.quantile(np.fromiter(self.window, float), [0.25, 0.75])
+            return 'iqr', q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        if method == 'ROLLING-Z-SCORE':
+            if len(self.window) < ROLLING_MIN_PERIODS:
+                return None
+            values = np.fromiter(self.window, float)
+            return 'z', values.mean(), values.std(ddof=1)
+        if method == 'EWMA':
+            if self.count < ROLLING_MIN_PERIODS:
+                return None
+            return 'z', self.ew_mean, np.sqrt(self.ew_var)
+        if method == 'SEASONAL-DOW':
+            count, mean, m2 = self.weekdays.get(when.dayofweek, [0, 0.0, 0.0])
+            if count < 3:
+                return None
+            return 'z', mean, np.sqrt(m2 / (count - 1))
+        # Z-Score
+        if self.count < 2:
+            return None
+        return 'z', self.mean, np.sqrt(self.m2 / (self.count - 1))
+
+    def score(self, value: float, when: pd.Timestamp) -> Optional[Dict]:
+        """Returns {'type', 'method_details'} if value is anomalous given the history, else None."""
+        baseline = self._baseline(when)
+        if baseline is None:
+            return None
+        kind, a, b = baseline
+        if kind == 'iqr':
+            if a <= value <= b:
+                return None
+            side = "Upper" if value > b else "Lower"
+            label = "Rolling IQR" if self.method.upper() == 'ROLLING-IQR' else "IQR"
+            details = f"Breached {side} {label} Limit"
+            if label == "Rolling IQR":
+                details += f" ({a:,.2f} to {b:,.2f})"
+            return {"type": 'Peak (High)' if value > b else 'Valley (Low)', "method_details": details}
+
+        if not b or np.isnan(b):
+            return None
+        z_score = (value - a) / b
+        if abs(z_score) <= 3.0:
+            return None
+        return {"type": 'Peak (High)' if z_score > 0 else 'Valley (Low)', "method_details": f"Z-Score: {z_score:.2f}"}
+
+    def limit_text(self) -> Optional[str]:
+        """Current IQR limits for the report (the other methods keep their fixed description)."""
+        if self.method.upper() == 'IQR' and self.count >= 2:
+            _, lower, upper = self._baseline(None)
+            return f"IQR Limits: {lower:,.2f} to {upper:,.2f}"
+        return None
+
+
+def _bucket_label(day: pd.Timestamp, freq: Optional[str]) -> pd.Timestamp:
+    """The label pd.Grouper(freq=freq) gives the bucket containing `day`."""
+    if freq is None or freq.upper() == 'D':
+        return day
+    return pd.Period(day, freq=_PERIOD_FREQS.get(freq.upper(), freq)).end_time.normalize()
+
+
+def _new_series_state(method: str) -> Dict:
+    # pending: the open (not yet complete) bucket as [label, total, already_in_report]
+    return {"detector": OnlineDetector(method), "pending": None}
+
+
+def _process_rows(check: Dict, state: Dict, df: pd.DataFrame, score: bool) -> Dict[str, list]:
+    """
+    Feeds new rows (sorted by date) into every frequency's detector. Returns, per frequency
+    name, (completed points, detector); points are (index_id, value, anomaly or None, already_in_report).
+    """
+    mode = check["analysis_mode"].upper()
+    freqs = check["frequencies"] if mode == 'TIME_AGGREGATED' else [None]
+    results = {}
+
+    for freq in freqs:
+        key = freq or "N/A"
+        series = state["series"].setdefault(key, _new_series_state(check["method"]))
+        detector = series["detector"]
+        completed = []
+
+        def finalize(label, total, in_report, index_id):
+            # Time-based modes ignore non-positive points, like prepare_data_for_detection
+            if mode != 'DISTRIBUTIONAL' and not total > 0:
+                return
+            if np.isnan(total):
+                completed.append((index_id, total, None, in_report))  # counted, never scored
+                return
+            anomaly = detector.score(total, label) if score else None
+            detector.update(total, label)
+            completed.append((index_id, total, anomaly, in_report))
+
+        for raw_index, value in zip(df[check["index_col"]], df[check["value_col"]].astype(float)):
+            day = pd.Timestamp(raw_index)
+            if mode != 'TIME_AGGREGATED':
+                finalize(day, value, not score, str(raw_index))
+                continue
+
+            label = _bucket_label(day, freq)
+            pending = series["pending"]
+            if pending is not None and pending[0] != label:
+                finalize(pending[0], pending[1], pending[2], format_index_id(pending[0], get_freq_name(freq)))
+                pending = None
+            if pending is None:
+                pending = [label, 0.0, not score]
+            pending[1] += 0.0 if np.isnan(value) else value
+            series["pending"] = pending
+
+            # New days are complete, so a daily bucket is final as soon as it arrives
+            if freq is None or freq.upper() == 'D':
+                finalize(label, pending[1], pending[2], format_index_id(label, get_freq_name(freq)))
+                series["pending"] = None
+
+        # The open bucket was counted by the full run that built this state
+        if not score and series["pending"] is not None:
+            series["pending"][2] = True
+        results[get_freq_name(freq)] = (completed, detector)
+
+    return results
+
+
+def _update_report(path: Path, results: Dict[str, tuple]) -> int:
+    """Appends newly scored points to an existing report file. Returns the number of new anomalies."""
+    with open(path) as f:
+        report = json.load(f)
+
+    new_anomalies = 0
+    for section in report["anomaly_checks"]:
+        if section["frequency"] not in results:
+            continue
+        completed, detector = results[section["frequency"]]
+
+        for index_id, value, anomaly, in_report in completed:
+            if not in_report:
+                section["total_points"] += 1
+            # A bucket first reported while still open is replaced by its final value
+            section["anomalies"] = [a for a in section["anomalies"] if a["index_id"] != index_id]
+            if anomaly is not None:
+                section["anomalies"].append({"index_id": index_id, "value": float(value), **anomaly})
+                new_anomalies += 1
+
+        section["anomalies"].sort(key=lambda a: -a["value"])
+        section["anomaly_count"] = len(section["anomalies"])
+        if section["total_points"] and detector.limit_text():
+            section["limit_description"] = detector.limit_text()
+
+    with open(path, "w") as f:
+        json.dump(report, f, indent=4)
+    return new_anomalies
+
+
+def _state_path(name: str, state_dir: Path) -> Path:
+    return Path(state_dir) / f"{name}.pkl"
+
+
+def _save_state(name: str, state: Dict, state_dir: Path):
+    path = _state_path(name, state_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def _filtered_query(sql_query: str, conditions: List[str]) -> str:
+    return f"SELECT * FROM (\n{sql_query.strip()}\n) AS t\nWHERE " + " AND ".join(conditions)
+
+
+def run_online_check(name: str, check: Dict, output_dir=ANOMALY_OUTPUT_DIR, state_dir=ANOMALY_STATE_DIR):
+    """
+    Runs one check in online mode. Without saved state (or report), the full history is
+    fetched once: the usual report is written and the detector state is built from it.
+    Afterwards only days after the checkpoint are fetched and scored. Either way, only days
+    before today (UTC) are read, since today's data is still partial.
+    Returns False if a query fails, True otherwise.
+    """
+    output_path = Path(output_dir) / f"{name}.json"
+    state_path = _state_path(name, state_dir)
+    index_col = check["index_col"]
+    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    conditions = [f"t.{index_col} < DATE '{today}'"]
+
+    if not state_path.exists() or not output_path.exists():
+        print(f"[Anomalies] {name}: no online state yet, building it from the full history.")
+        df = fetch_data_from_bq(_filtered_query(check["query"], conditions))
+        if df is None:
+            return False
+        df = df.sort_values(index_col)
+        perform_anomaly_detection(df=df, value_col=check["value_col"], index_col=index_col,
+                                  analysis_mode=check["analysis_mode"], metric_desc=check["metric_desc"],
+                                  frequencies=check["frequencies"], method=check["method"],
+                                  output_path=output_path)
+        state = {"checkpoint": None, "series": {}}
+        _process_rows(check, state, df, score=False)
+        if len(df):
+            state["checkpoint"] = pd.Timestamp(df[index_col].max()).strftime('%Y-%m-%d')
+        _save_state(name, state, state_dir)
+        return True
+
+    with open(state_path, "rb") as f:
+        state = pickle.load(f)
+
+    if state["checkpoint"]:
+        conditions.append(f"t.{index_col} > DATE '{state['checkpoint']}'")
+
+    df = fetch_data_from_bq(_filtered_query(check["query"], conditions), use_cache=False)
+    if df is None:
+        return False
+    if df.empty:
+        print(f"[Anomalies] {name}: no new days since {state['checkpoint']}.")
+        return True
+
+    df = df.sort_values(index_col)
+    results = _process_rows(check, state, df, score=True)
+    new_anomalies = _update_report(output_path, results)
+    state["checkpoint"] = pd.Timestamp(df[index_col].max()).strftime('%Y-%m-%d')
+    _save_state(name, state, state_dir)
+    print(f"[Anomalies] {name}: scored {len(df)} new day(s) up to {state['checkpoint']}, "
+          f"{new_anomalies} new anomalies -> {output_path}")
+    return True
+
+
+def run_online_anomaly_detection(checks=None):
+    """
+    Online counterpart of run_anomaly_detection (see run_online_check).
+    Returns False if any check failed; the other checks still run.
+    """
+    succeeded = True
+    for name, check in (checks or ONLINE_ANOMALY_CHECKS).items():
+        succeeded = run_online_check(name, check) and succeeded
+    return succeeded
+
+
+if __name__ == "__main__":
+    run_online_anomaly_detection()
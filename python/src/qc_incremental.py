@@ -0,0 +1,195 @@
+import os
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pyarrow.compute as pc
+
+from .qc_profile import TableProfile
+from .utils import fetch_data_from_bq, decode_dictionaries
+
+# --- Incremental Raw Data QC ---
+#
+# Each raw table is split into partitions (one per day for tables with an event date,
+# hash buckets of a key column otherwise). A cheap GROUP BY query returns a row count and
+# a fingerprint per partition; only partitions whose fingerprint changed are downloaded and
+# profiled, and the stored per-partition TableProfile states are merged into the report.
+
+QC_STATE_DIR = Path(__file__).resolve().parents[1] / ".cache" / "qc_partitions"
+
+# Table name -> ("day", timestamp/date column) or ("bucket", key column)
+RAW_QC_PARTITIONS = {
+    "CUSTOMERS": ("bucket", "customer_id"),
+    "GEOLOCATION": ("bucket", "geolocation_zip_code_prefix"),
+    "ORDER_ITEMS": ("day", "shipping_limit_date"),
+    "ORDER_PAYMENTS": ("bucket", "order_id"),
+    "ORDER_REVIEWS": ("day", "review_creation_date"),
+    "ORDERS": ("day", "order_purchase_timestamp"),
+    "PRODUCTS": ("bucket", "product_id"),
+    "SELLERS": ("bucket", "seller_id"),
+}
+HASH_BUCKETS = 64
+
+# Prime modulus of the row-hash sum in the partition fingerprint (2**31 - 1): the sum of
+# any realistic number of rows stays within INT64
+FINGERPRINT_MODULUS = 2_147_483_647
+
+# Sketch bounds large enough that merged partition states stay exact for the Olist tables,
+# so every count and statistic matches perform_data_qc. Only the order of equal counts in
+# top_3_values can differ: partitions are merged in partition id order, not in row order,
+# so ties are not broken by first appearance in the table as value_counts does
+INCREMENTAL_SKETCH_OPTIONS = {"topk_capacity": 2_000_000, "quantile_capacity": 5_000_000}
+
+PARTITION_COLUMN = "__qc_partition"
+
+
+def partition_expression(partitioning, dialect="bigquery"):
+    """SQL expression giving each row's partition id as a string."""
+    kind, column = partitioning
+    bq = dialect == "bigquery"
+    string_type = "STRING" if bq else "VARCHAR"
+    col = f"`{column}`" if bq else f'"{column}"'
+
+    if kind == "day":
+        # Works for DATE/TIMESTAMP columns and for ISO-formatted strings alike
+        expr = f"SUBSTR(CAST({col} AS {string_type}), 1, 10)"
+    elif bq:
+        expr = f"CAST(MOD(FARM_FINGERPRINT(CAST({col} AS STRING)), {HASH_BUCKETS}) AS STRING)"
+    else:
+        expr = f"CAST(hash(CAST({col} AS VARCHAR)) % {HASH_BUCKETS} AS VARCHAR)"
+    return f"COALESCE({expr}, 'null')"
+
+
+def build_fingerprint_sql(sql_query, partitioning, dialect="bigquery"):
+    """
+    One row per partition: partition_id, n_rows and an order-independent content fingerprint.
+    The XOR of the row hashes cancels rows that appear twice, so the sum of the hashes
+    (mod FINGERPRINT_MODULUS) is returned next to it as fingerprint_sum.
+    """
+    if dialect == "bigquery":
+        row_hash = "FARM_FINGERPRINT(TO_JSON_STRING(t))"
+        row_hash_mod = f"MOD({row_hash}, {FINGERPRINT_MODULUS})"
+    else:
+        row_hash = "hash(t)"
+        row_hash_mod = f"CAST({row_hash} % {FINGERPRINT_MODULUS} AS BIGINT)"
+    return (
+        f"SELECT {partition_expression(partitioning, dialect)} AS partition_id,\n"
+        f"    COUNT(*) AS n_rows,\n"
+        f"    BIT_XOR({row_hash}) AS fingerprint,\n"
+        f"    SUM({row_hash_mod}) AS fingerprint_sum\n"
+        f"FROM (\n{sql_query.strip()}\n) AS t\n"
+        f"GROUP BY partition_id"
+    )
+
+
+def build_partition_data_sql(sql_query, partitioning, partition_ids=None, dialect="bigquery"):
+    """The rows of the given partitions (all partitions if None), tagged with their partition id."""
+    expr = partition_expression(partitioning, dialect)
+    sql = f"SELECT t.*, {expr} AS {PARTITION_COLUMN}\nFROM (\n{sql_query.strip()}\n) AS t"
+    if partition_ids is not None:
+        id_list = ", ".join("'" + pid.replace("'", "''") + "'" for pid in sorted(partition_ids))
+        sql += f"\nWHERE {expr} IN ({id_list})"
+    return sql
+
+
+def split_partitions(table):
+    """Yields (partition_id, rows) for a table tagged with PARTITION_COLUMN, keeping row order within each."""
+    if table.num_rows == 0:
+        return
+    table = table.take(pc.sort_indices(table, sort_keys=[(PARTITION_COLUMN, "ascending")]))  # stable sort
+    ids = table.column(PARTITION_COLUMN).to_numpy(zero_copy_only=False)
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    ends = np.r_[starts[1:], len(ids)]
+    data = table.drop_columns([PARTITION_COLUMN])
+    for start, end in zip(starts, ends):
+        yield ids[start], data.slice(start, end - start)
+
+
+def load_partition_state(df_name, state_dir=QC_STATE_DIR):
+    path = Path(state_dir) / f"{df_name}.pkl"
+    if not path.exists():
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def save_partition_state(df_name, state, state_dir=QC_STATE_DIR):
+    path = Path(state_dir) / f"{df_name}.pkl"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def _new_state(partitioning):
+    return {"partitioning": partitioning, "schema": None, "partitions": {}}
+
+
+def profile_table_incremental(sql_query, df_name, dialect="bigquery", state_dir=QC_STATE_DIR):
+    """
+    Returns the perform_data_qc dictionary for sql_query, reprofiling only the partitions
+    whose fingerprint changed since the last run. Returns None if a query fails.
+
+    Parameters:
+    sql_query : Query for the raw table (e.g. q.GET_ORDERS).
+    df_name : Table name; selects the partitioning in RAW_QC_PARTITIONS.
+    dialect : SQL dialect of the active backend.
+    state_dir : Folder holding one pickled state file per table.
+    """
+    partitioning = RAW_QC_PARTITIONS[df_name]
+
+    fingerprints = fetch_data_from_bq(
+        build_fingerprint_sql(sql_query, partitioning, dialect), use_cache=False, output="arrow"
+    )
+    if fingerprints is None:
+        return None
+    current = {
+        row["partition_id"]: (int(row["n_rows"]), int(row["fingerprint"]), int(row["fingerprint_sum"]))
+        for row in decode_dictionaries(fingerprints).to_pylist()
+    }
+
+    state = load_partition_state(df_name, state_dir)
+    if state is None or state["partitioning"] != partitioning:
+        state = _new_state(partitioning)
+    stored = state["partitions"]
+
+    changed = [pid for pid, fingerprint in current.items() if stored.get(pid, {}).get("fingerprint") != fingerprint]
+    removed = [pid for pid in stored if pid not in current]
+    print(f"[QC] {df_name}: {len(changed)} of {len(current)} partitions new or changed, {len(removed)} removed.")
+    for pid in removed:
+        del stored[pid]
+
+    while changed:
+        partition_ids = None if len(changed) == len(current) else changed
+        data = fetch_data_from_bq(
+            build_partition_data_sql(sql_query, partitioning, partition_ids, dialect), use_cache=False, output="arrow"
+        )
+        if data is None:
+            return None
+        data = decode_dictionaries(data)
+        schema = str(data.schema.remove(data.schema.get_field_index(PARTITION_COLUMN)).remove_metadata())
+
+        # A schema change makes every stored partition stale: start over with all partitions
+        if state["schema"] not in (None, schema) and partition_ids is not None:
+            print(f"[QC] {df_name}: schema changed, reprofiling all partitions.")
+            state = _new_state(partitioning)
+            stored = state["partitions"]
+            changed = list(current)
+            continue
+        state["schema"] = schema
+
+        for pid, rows in split_partitions(data):
+            profile = TableProfile(df_name, **INCREMENTAL_SKETCH_OPTIONS)
+            for batch in rows.to_batches():
+                profile.update(batch)
+            stored[pid] = {"fingerprint": current[pid], "profile": profile}
+        break
+
+    if changed or removed:
+        save_partition_state(df_name, state, state_dir)
+
+    merged = TableProfile(df_name, **INCREMENTAL_SKETCH_OPTIONS)
+    for pid in sorted(stored):
+        merged.merge(stored[pid]["profile"])
+    return merged.to_report()
@@ -0,0 +1,345 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .backends import bigquery_like_types
+
+# --- Mergeable accumulators for streaming Raw Data QC ---
+#
+# Every accumulator is exact until it reaches its size bound and only then falls back
+# to an approximation, so small tables give exactly the numbers perform_data_qc gives,
+# while memory stays bounded for tables of any size. All of them support merge(), so
+# profiles built from separate batches (or partitions) can be combined.
+
+
+def _bit_length(values):
+    """Exact bit length of uint64 values (0 -> 0), computed on the two 32-bit halves."""
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+
+class DistinctSketch:
+    """HyperLogLog distinct-value estimator over 64-bit hashes (~0.8% error with p=14)."""
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes):
+        if len(hashes) == 0:
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        shift = np.uint64(64 - self.precision)
+        index = (hashes >> shift).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        rank = ((64 - self.precision) - _bit_length(rest) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros > 0:
+            return int(round(m * np.log(m / zeros)))  # linear counting for small cardinalities
+        return int(round(raw))
+
+
+class QuantileSketch:
+    """
+    KLL-style mergeable quantile sketch. Values are kept exactly until a level holds more
+    than `capacity` items; the level is then sorted and every other item is promoted with
+    double weight. Rank error is roughly 1/capacity per compaction level.
+    """
+
+    def __init__(self, capacity=200_000, seed=0):
+        self.capacity = capacity
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def is_exact(self):
+        return len(self.levels) == 1
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values):
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0, dtype=np.float64))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.capacity:
+                items = np.sort(items)
+                # An odd leftover stays at this level so total weight is preserved exactly
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                paired = items[:-1] if len(items) % 2 else items
+                promoted = paired[int(self._rng.integers(2))::2]
+                self.levels[level] = keep
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantile(self, q):
+        if self.is_exact:
+            items = self.levels[0]
+            return float(np.quantile(items, q)) if len(items) else float("nan")
+
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        position = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        return float(values[order][min(position, len(values) - 1)])
+
+
+class TopKSketch:
+    """
+    Misra-Gries heavy-hitters counter. Counts are exact while the number of distinct values
+    stays within `capacity`; beyond that, counts are undercounted by at most n / (capacity + 1).
+    Ties keep first-seen order, like pandas value_counts.
+    """
+
+    def __init__(self, capacity=10_000):
+        self.capacity = capacity
+        self.counts = {}
+        self.overflowed = False
+
+    def update(self, values, counts):
+        for value, count in zip(values, counts):
+            self.counts[value] = self.counts.get(value, 0) + count
+        self._trim()
+
+    def merge(self, other):
+        self.overflowed = self.overflowed or other.overflowed
+        self.update(other.counts.keys(), other.counts.values())
+
+    def _trim(self):
+        if len(self.counts) <= self.capacity:
+            return
+        self.overflowed = True
+        threshold = sorted(self.counts.values(), reverse=True)[self.capacity]
+        self.counts = {v: c - threshold for v, c in self.counts.items() if c > threshold}
+
+    def top(self, k):
+        return sorted(self.counts.items(), key=lambda item: -item[1])[:k]
+
+
+class RowHashSet:
+    """
+    Distinct row hashes for duplicate counting. Exact (sorted unique uint64 array) up to
+    `max_exact` distinct rows, then switches to a DistinctSketch.
+    """
+
+    def __init__(self, max_exact=10_000_000):
+        self.max_exact = max_exact
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.sketch = None
+
+    def update(self, hashes):
+        if self.sketch is not None:
+            self.sketch.update(hashes)
+            return
+        self.hashes = np.unique(np.concatenate([self.hashes, np.asarray(hashes, dtype=np.uint64)]))
+        if len(self.hashes) > self.max_exact:
+            self.sketch = DistinctSketch()
+            self.sketch.update(self.hashes)
+            self.hashes = np.empty(0, dtype=np.uint64)
+
+    def merge(self, other):
+        if other.sketch is not None:
+            if self.sketch is None:
+                self.sketch = DistinctSketch()
+                self.sketch.update(self.hashes)
+                self.hashes = np.empty(0, dtype=np.uint64)
+            self.sketch.merge(other.sketch)
+        else:
+            self.update(other.hashes)
+
+    def distinct(self):
+        return self.sketch.estimate() if self.sketch is not None else len(self.hashes)
+
+
+# --- Column and table profiles ---
+
+def pandas_dtype_name(arrow_type):
+    """pandas dtype name BigQuery's to_dataframe() would give a column of this Arrow type."""
+    if pa.types.is_dictionary(arrow_type):
+        arrow_type = arrow_type.value_type
+    if pa.types.is_date32(arrow_type):
+        return "dbdate"
+    empty = pa.table({"column": pa.array([], type=arrow_type)})
+    return str(empty.to_pandas(types_mapper=bigquery_like_types)["column"].dtype)
+
+
+def column_kind(dtype_name):
+    """Mirrors perform_data_qc: numeric -> min/median/max, object/category -> value counts."""
+    if dtype_name in ("object", "category", "str", "string"):
+        return "categorical"
+    if dtype_name in ("Int64", "float64", "int64", "Float64"):
+        return "numeric"
+    return "other"
+
+
+def _hash_values(values):
+    """64-bit hashes of the non-null values (nulls are counted separately)."""
+    non_null = pd.Series([v for v in values if v is not None], dtype=object)
+    return pd.util.hash_array(non_null.to_numpy())
+
+
+def _exact_distinct(column_profile):
+    sketch = DistinctSketch()
+    sketch.update(_hash_values(column_profile.top_values.counts.keys()))
+    return sketch
+
+
+class ColumnProfile:
+    """Null count plus either numeric stats or value counts for one column."""
+
+    def __init__(self, name, arrow_type, topk_capacity=10_000, quantile_capacity=200_000):
+        self.name = name
+        self.dtype = pandas_dtype_name(arrow_type)
+        self.kind = column_kind(self.dtype)
+        self.null_count = 0
+        self.min = None
+        self.max = None
+        self.quantiles = QuantileSketch(quantile_capacity) if self.kind == "numeric" else None
+        self.top_values = TopKSketch(topk_capacity) if self.kind == "categorical" else None
+        # Created only once the top-k counter is about to overflow; until then its keys are exact
+        self.distinct = None
+
+    def update(self, column):
+        if isinstance(column, pa.ChunkedArray):
+            column = column.combine_chunks()
+        if pa.types.is_dictionary(column.type):
+            column = column.dictionary_decode()
+
+        self.null_count += int(pc.sum(pc.is_null(column, nan_is_null=True)).as_py() or 0)
+
+        if self.kind == "numeric":
+            values = column.to_numpy(zero_copy_only=False).astype(np.float64)
+            values = values[~np.isnan(values)]
+            if len(values):
+                self.min = values.min() if self.min is None else min(self.min, values.min())
+                self.max = values.max() if self.max is None else max(self.max, values.max())
+                self.quantiles.update(values)
+
+        elif self.kind == "categorical":
+            counts = pc.value_counts(column)
+            values = counts.field("values").to_pylist()
+            if self.distinct is None and len(self.top_values.counts) + len(values) > self.top_values.capacity:
+                self._start_distinct()
+            self.top_values.update(values, counts.field("counts").to_pylist())
+            if self.distinct is not None:
+                self.distinct.update(_hash_values(values))
+
+    def _start_distinct(self):
+        self.distinct = _exact_distinct(self)
+
+    def merge(self, other):
+        self.null_count += other.null_count
+        if self.kind == "numeric":
+            for attr, pick in (("min", min), ("max", max)):
+                mine, theirs = getattr(self, attr), getattr(other, attr)
+                setattr(self, attr, theirs if mine is None else mine if theirs is None else pick(mine, theirs))
+            self.quantiles.merge(other.quantiles)
+        elif self.kind == "categorical":
+            if self.distinct is not None or other.distinct is not None or (
+                len(self.top_values.counts) + len(other.top_values.counts) > self.top_values.capacity
+            ):
+                if self.distinct is None:
+                    self._start_distinct()
+                self.distinct.merge(other.distinct if other.distinct is not None else _exact_distinct(other))
+            self.top_values.merge(other.top_values)
+
+    def to_report(self, total_rows):
+        null_percent = (self.null_count / total_rows) * 100 if total_rows else float("nan")
+        report = {
+            'dtype': self.dtype,
+            'null_count': int(self.null_count),
+            'null_percent': round(float(null_percent), 3) if pd.notna(null_percent) else 0.0
+        }
+        if self.kind == "numeric":
+            report.update({
+                'min': float(self.min) if self.min is not None else float("nan"),
+                'median': self.quantiles.quantile(0.5),
+                'max': float(self.max) if self.max is not None else float("nan")
+            })
+        elif self.kind == "categorical":
+            if self.top_values.overflowed:
+                unique_count = self.distinct.estimate() + (1 if self.null_count else 0)
+            else:
+                unique_count = len(self.top_values.counts)
+            report['unique_count'] = int(unique_count)
+            # value_counts(dropna=False) labels nulls NaN on pandas string columns, None on object ones
+            null_key = float("nan") if self.dtype in ("str", "string") else None
+            report['top_3_values'] = {
+                null_key if value is None else value: int(count) for value, count in self.top_values.top(3)
+            }
+        return report
+
+
+class TableProfile:
+    """
+    Streaming equivalent of perform_data_qc: feed it Arrow record batches one at a time,
+    then call to_report() for the same dictionary perform_data_qc returns.
+    """
+
+    def __init__(self, df_name, schema=None, **column_options):
+        self.df_name = df_name
+        self.total_rows = 0
+        self.columns = {}
+        self.row_hashes = RowHashSet()
+        self._column_options = column_options
+        if schema is not None:
+            self._init_columns(schema)
+
+    def _init_columns(self, schema):
+        self.columns = {
+            field.name: ColumnProfile(field.name, field.type, **self._column_options) for field in schema
+        }
+
+    def update(self, batch):
+        if not self.columns:
+            self._init_columns(batch.schema)
+        self.total_rows += batch.num_rows
+        for name, column in zip(batch.schema.names, batch.columns):
+            self.columns[name].update(column)
+        # Row hashes for duplicate detection (hashing needs pandas, but only one batch at a time)
+        batch_df = batch.to_pandas(types_mapper=bigquery_like_types)
+        self.row_hashes.update(pd.util.hash_pandas_object(batch_df, index=False).to_numpy())
+
+    def merge(self, other):
+        if not self.columns:
+            self.columns = copy.deepcopy(other.columns)
+        else:
+            for name, column in other.columns.items():
+                self.columns[name].merge(column)
+        self.total_rows += other.total_rows
+        self.row_hashes.merge(other.row_hashes)
+
+    def to_report(self):
+        return {
+            'df_name': self.df_name,
+            'total_rows': int(self.total_rows),
+            'total_columns': int(len(self.columns)),
+            'total_duplicated_rows': int(self.total_rows - self.row_hashes.distinct()),
+            'column_qc': {name: column.to_report(self.total_rows) for name, column in self.columns.items()}
+        }
@@ -0,0 +1,118 @@
+import pyarrow as pa
+
+from .qc_profile import pandas_dtype_name, column_kind
+
+# --- Pushdown Raw Data QC ---
+#
+# Instead of downloading a whole table, one aggregate query per table computes every
+# number perform_data_qc needs, and only that single profile row is fetched back.
+# Queries are generated per SQL dialect: 'bigquery' (the warehouse) and 'duckdb'
+# (the offline backend). On BigQuery, medians come from APPROX_QUANTILES and the top
+# values from APPROX_TOP_COUNT, so they can differ slightly from the pandas numbers.
+
+TOP_VALUES = 3
+
+
+def _quote(column, dialect):
+    return f"`{column}`" if dialect == "bigquery" else f'"{column}"'
+
+
+def _column_aggregates(i, column, arrow_type, dialect):
+    """SELECT expressions for one column, aliased c<i>_<metric>."""
+    col = _quote(column, dialect)
+    is_float = pa.types.is_floating(arrow_type)
+    kind = column_kind(pandas_dtype_name(arrow_type))
+    bq = dialect == "bigquery"
+
+    # pandas treats NaN as missing, SQL does not
+    is_nan = f"IS_NAN({col})" if bq else f"isnan({col})"
+    null_test = f"{col} IS NULL OR {is_nan}" if is_float else f"{col} IS NULL"
+    value = f"CASE WHEN {is_nan} THEN NULL ELSE {col} END" if is_float else col
+
+    exprs = [f"{'COUNTIF' if bq else 'count_if'}({null_test}) AS c{i}_nulls"]
+
+    if kind == "numeric":
+        exprs.append(f"MIN({value}) AS c{i}_min")
+        exprs.append(f"MAX({value}) AS c{i}_max")
+        if bq:
+            exprs.append(f"APPROX_QUANTILES({value}, 2)[OFFSET(1)] AS c{i}_median")
+        else:
+            exprs.append(f"quantile_cont({value}, 0.5) AS c{i}_median")
+
+    elif kind == "categorical":
+        exprs.append(f"COUNT(DISTINCT {col}) AS c{i}_distinct")
+        if bq:
+            exprs.append(f"APPROX_TOP_COUNT({col}, {TOP_VALUES + 1}) AS c{i}_top")
+        else:
+            # histogram() is exact; sort its entries by count and keep the head
+            exprs.append(
+                f"list_sort(list_transform(map_entries(histogram({col})), "
+                f"e -> struct_pack(count := e.value, value := e.key)), 'DESC')[1:{TOP_VALUES + 1}] AS c{i}_top"
+            )
+    return exprs
+
+
+def build_profile_sql(sql_query, schema, dialect="bigquery"):
+    """
+    Builds the single aggregate query that profiles the result of sql_query.
+
+    Parameters:
+    sql_query : The query whose result is profiled (e.g. q.GET_CUSTOMERS).
+    schema : pyarrow.Schema of that result.
+    dialect : 'bigquery' or 'duckdb'.
+    """
+    if dialect == "bigquery":
+        row_hash = "FARM_FINGERPRINT(TO_JSON_STRING(t))"
+    else:
+        row_hash = "hash(t)"
+
+    exprs = ["COUNT(*) AS total_rows", f"COUNT(DISTINCT {row_hash}) AS distinct_rows"]
+    for i, field in enumerate(schema):
+        exprs.extend(_column_aggregates(i, field.name, field.type, dialect))
+
+    select_list = ",\n    ".join(exprs)
+    return f"SELECT\n    {select_list}\nFROM (\n{sql_query.strip()}\n) AS t"
+
+
+def _top_values(entries, null_count, dtype):
+    """Top values as value_counts(dropna=False).head(3) would report them, nulls included."""
+    counts = [(entry["value"], int(entry["count"])) for entry in entries or [] if entry["value"] is not None]
+    if null_count:
+        counts.append((None, int(null_count)))
+    counts.sort(key=lambda item: -item[1])
+
+    # value_counts(dropna=False) labels nulls NaN on pandas string columns, None on object ones
+    null_key = float("nan") if dtype in ("str", "string") else None
+    return {null_key if value is None else value: count for value, count in counts[:TOP_VALUES]}
+
+
+def profile_row_to_report(row, schema, df_name):
+    """Turns the profile row returned by build_profile_sql into the perform_data_qc dictionary."""
+    total_rows = int(row["total_rows"])
+    report = {
+        'df_name': df_name,
+        'total_rows': total_rows,
+        'total_columns': len(schema),
+        'total_duplicated_rows': total_rows - int(row["distinct_rows"]),
+        'column_qc': {}
+    }
+
+    for i, field in enumerate(schema):
+        dtype = pandas_dtype_name(field.type)
+        kind = column_kind(dtype)
+        null_count = int(row[f"c{i}_nulls"] or 0)
+        null_percent = round(float(null_count / total_rows * 100), 3) if total_rows else 0.0
+
+        column_report = {'dtype': dtype, 'null_count': null_count, 'null_percent': null_percent}
+        if kind == "numeric":
+            column_report.update({
+                metric: float(row[f"c{i}_{metric}"]) if row[f"c{i}_{metric}"] is not None else float("nan")
+                for metric in ('min', 'median', 'max')
+            })
+        elif kind == "categorical":
+            column_report['unique_count'] = int(row[f"c{i}_distinct"]) + (1 if null_count else 0)
+            column_report['top_3_values'] = _top_values(row[f"c{i}_top"], null_count, dtype)
+
+        report['column_qc'][field.name] = column_report
+
+    return report
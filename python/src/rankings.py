@@ -0,0 +1,72 @@
+from collections import namedtuple
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# --- Top-N rankings for the analysis reports ---
+#
+# The product, category, seller, delivery and region reports each pick several top/bottom
+# lists from the same frame. select_rankings() computes all of them in one call: each
+# column is converted to a float64 array once, and every ranking selects its rows with
+# np.partition (O(n)), so only the n selected rows get sorted. A full sort of the frame
+# is never done.
+#
+# The result of each ranking is the same frame df.nlargest / df.nsmallest (keep='first')
+# would return: rows ordered by value, ties in the frame's row order, and rows with a
+# missing value only used (last, in row order) when there are fewer than n others.
+#
+#   Ranking(column, n)                   n largest values of column
+#   Ranking(column, n, largest=False)    n smallest values
+#   Ranking(column, n, where=mask)       only among the rows where the boolean mask is True
+
+Ranking = namedtuple("Ranking", ["column", "n", "largest", "where"], defaults=(True, None))
+
+
+def top_k_positions(values: np.ndarray, n: int, largest: bool = True, where=None) -> np.ndarray:
+    """
+    Positions of the n largest (or smallest) values in ranking order, ties in position
+    order, NaN positions last. `where` (a boolean array) restricts the candidates.
+    """
+    valid = ~np.isnan(values)
+    if where is not None:
+        where = np.asarray(where, dtype=bool)
+    candidates = np.flatnonzero(valid if where is None else valid & where)
+    if n <= 0:
+        return candidates[:0]
+
+    keys = -values[candidates] if largest else values[candidates]
+    if n < len(candidates):
+        # Keys before the n-th one all make the cut; of the keys tied with it, the first
+        # positions fill the remaining places (candidates are in position order)
+        kth = np.partition(keys, n - 1)[n - 1]
+        better = keys < kth
+        tied = np.flatnonzero(keys == kth)[:n - np.count_nonzero(better)]
+        keep = np.concatenate([np.flatnonzero(better), tied])
+        candidates, keys = candidates[keep], keys[keep]
+    ranked = candidates[np.lexsort((candidates, keys))[:n]]
+    if len(ranked) < n:
+        # Not enough values: nlargest / nsmallest fill up with the missing ones
+        missing = np.flatnonzero(~valid if where is None else ~valid & where)
+        ranked = np.concatenate([ranked, missing[:n - len(ranked)]])
+    return ranked
+
+
+def _values(series: pd.Series) -> np.ndarray:
+    # Integers rank the same as float64 below 2**53, far above any count in the reports
+    return series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def select_rankings(df: pd.DataFrame, rankings: Dict[str, Ranking]) -> Dict[str, pd.DataFrame]:
+    """
+    Rows of every ranking: name -> a copy of the rows df.nlargest / df.nsmallest would
+    return (same index, same order).
+    """
+    columns = {}
+    selected = {}
+    for name, ranking in rankings.items():
+        if ranking.column not in columns:
+            columns[ranking.column] = _values(df[ranking.column])
+        positions = top_k_positions(columns[ranking.column], ranking.n, ranking.largest, ranking.where)
+        selected[name] = df.iloc[positions].copy()
+    return selected
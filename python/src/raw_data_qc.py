@@ -1,8 +1,24 @@
 import numpy as np
 import pandas as pd
+import pyarrow as pa
 from . import sql_queries as q
-from .utils import fetch_data_from_bq
+from .utils import (
+    fetch_data_from_bq, fetch_batches_from_bq, fetch_many_from_bq, get_backend,
+    arrow_to_pandas, decode_dictionaries
+)
+from .qc_profile import TableProfile
+from .qc_pushdown import build_profile_sql, profile_row_to_report
+from .qc_incremental import profile_table_incremental
+from .verbosity import get_verbosity, set_verbosity, is_quiet, quiet_reports
+from .metrics import instrument
+import io
+import os
 import json
+import shutil
+import tempfile
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 def perform_data_qc(df, df_name="DataFrame"):
@@ -41,13 +57,14 @@ def perform_data_qc(df, df_name="DataFrame"):
     null_percents = (null_counts / n_rows) * 100
     
     # Summary for printing
-    null_summary = pd.DataFrame({
-        'Dtype': df.dtypes,
-        'Null Count': null_counts,
-        'Null Percent': null_percents.round(3).astype(str) + '%' 
-    }).sort_values(by='Null Count', ascending=False)
+    if not is_quiet():
+        null_summary = pd.DataFrame({
+            'Dtype': df.dtypes,
+            'Null Count': null_counts,
+            'Null Percent': null_percents.round(3).astype(str) + '%' 
+        }).sort_values(by='Null Count', ascending=False)
 
-    print(null_summary)
+        print(null_summary)
     
     # Populate report dictionary with clean types for JSON serialization
     for col in df.columns:
@@ -74,7 +91,8 @@ def perform_data_qc(df, df_name="DataFrame"):
         print("\n#### Basic Statistics (Numeric Columns) ####")
         # Ensure conversion to standard float for JSON compatibility
         stats = df[numeric_cols].agg(['min', 'median', 'max']).T.astype(float) 
-        print(stats)
+        if not is_quiet():
+            print(stats)
         
         for col in numeric_cols:
             # Add min, median, max to the column's entry in the report
@@ -103,7 +121,8 @@ def perform_data_qc(df, df_name="DataFrame"):
             report['column_qc'][col]['unique_count'] = unique_count
             report['column_qc'][col]['top_3_values'] = top_counts
             
-            print(counts.head(3)) 
+            if not is_quiet():
+                print(counts.head(3)) 
             if unique_count > 3:
                 print(f"... and {unique_count - 3} more unique values.")
     else:
@@ -113,6 +132,190 @@ def perform_data_qc(df, df_name="DataFrame"):
     
     return report
 
+def perform_data_qc_streaming(batches, df_name="DataFrame", **sketch_options):
+    """
+    Streaming version of perform_data_qc: consumes Arrow record batches one at a time
+    and never materializes the whole table, so memory stays bounded.
+
+    Returns the same dictionary as perform_data_qc. Values are exact while each column
+    fits its sketch bounds (topk_capacity distinct values, quantile_capacity numbers);
+    past that, medians, top-3 counts and unique/duplicate counts are sketch estimates.
+
+    Parameters:
+    batches : Iterable of pyarrow.RecordBatch (e.g. from fetch_batches_from_bq).
+    df_name : Name used in the report.
+    sketch_options : Optional topk_capacity / quantile_capacity for the column sketches.
+    """
+    profile = TableProfile(df_name, **sketch_options)
+    n_batches = 0
+    for batch in batches:
+        profile.update(batch)
+        n_batches += 1
+
+    report = profile.to_report()
+    print_qc_summary(report, n_batches)
+    return report
+
+def perform_data_qc_pushdown(sql_query, df_name="DataFrame"):
+    """
+    Pushdown version of perform_data_qc: profiles the result of sql_query inside the
+    warehouse with one aggregate query and downloads only the one-row profile.
+
+    Returns the same dictionary as perform_data_qc (on BigQuery, medians and top values
+    are approximate), or None if a query fails.
+
+    Parameters:
+    sql_query : Query whose result is profiled (e.g. q.GET_CUSTOMERS).
+    df_name : Name used in the report.
+    """
+    backend = get_backend()
+    if backend is None:
+        return None
+
+    # LIMIT 0 returns just the schema, without scanning the table
+    empty = fetch_data_from_bq(f"SELECT * FROM ({sql_query.strip()}) LIMIT 0", use_cache=False, output="arrow")
+    if empty is None:
+        return None
+
+    profile = fetch_data_from_bq(build_profile_sql(sql_query, empty.schema, backend.dialect), output="arrow")
+    if profile is None:
+        return None
+
+    report = profile_row_to_report(profile.to_pylist()[0], empty.schema, df_name)
+    print_qc_summary(report)
+    return report
+
+def perform_data_qc_incremental(sql_query, df_name="DataFrame"):
+    """
+    Incremental version of perform_data_qc: keeps one profile state per partition on disk
+    (see qc_incremental.py), reprofiles only new or changed partitions and merges all of
+    them into the table-level report. Returns None if a query fails.
+
+    Parameters:
+    sql_query : Query for the raw table (e.g. q.GET_ORDERS).
+    df_name : Table name, which must have an entry in RAW_QC_PARTITIONS.
+    """
+    backend = get_backend()
+    if backend is None:
+        return None
+
+    report = profile_table_incremental(sql_query, df_name, dialect=backend.dialect)
+    if report is not None:
+        print_qc_summary(report)
+    return report
+
+def print_qc_summary(report, n_batches=None):
+    """Prints the sections of perform_data_qc from a finished report dictionary (nothing in quiet mode)."""
+    if is_quiet():
+        return
+    print("="*80)
+    print(f"                        *** Quality Control Report for {report['df_name']} ***")
+
+    print("\n### Table Information Overview ###")
+    print(f"Total Rows: {report['total_rows']:,}")
+    print(f"Table Name: {report['df_name']}")
+    print(f"Total Columns: {report['total_columns']}")
+    print(f"Total Duplicated Rows: {report['total_duplicated_rows']}")
+    if n_batches is not None:
+        print(f"Processed in {n_batches} batch(es)")
+    print("-" * 80)
+
+    column_qc = report['column_qc']
+    print("\n#### Null Value Analysis (For Each Columns) ####")
+    null_summary = pd.DataFrame({
+        'Dtype': {col: info['dtype'] for col, info in column_qc.items()},
+        'Null Count': {col: info['null_count'] for col, info in column_qc.items()},
+        'Null Percent': {col: f"{info['null_percent']}%" for col, info in column_qc.items()}
+    }).sort_values(by='Null Count', ascending=False)
+    print(null_summary)
+    print("-" * 80)
+
+    numeric_cols = [col for col, info in column_qc.items() if 'median' in info]
+    if numeric_cols:
+        print("\n#### Basic Statistics (Numeric Columns) ####")
+        print(pd.DataFrame({col: {k: column_qc[col][k] for k in ('min', 'median', 'max')} for col in numeric_cols}).T)
+    else:
+        print("\n* No Numeric Columns Found")
+    print("-" * 80)
+
+    categorical_cols = [col for col, info in column_qc.items() if 'top_3_values' in info]
+    if categorical_cols:
+        print("\n#### Value Counts (Categorical Columns) ####")
+        for col in categorical_cols:
+            print(f"\nColumn: {col}")
+            print(pd.Series(column_qc[col]['top_3_values'], dtype=object))
+            if column_qc[col]['unique_count'] > 3:
+                print(f"... and {column_qc[col]['unique_count'] - 3} more unique values.")
+    else:
+        print("\n* No Categorical/Object Columns Found")
+
+    print("\n" + "="*80)
+
+# --- Parallel QC: fetch on threads, profile on a process pool ---
+
+def _qc_worker(arrow_path, df_name, verbosity="normal"):
+    """
+    Process-pool task: memory-maps a table from an Arrow IPC file and runs perform_data_qc.
+    Output is captured and returned so reports print in a fixed order, not interleaved.
+    """
+    set_verbosity(verbosity)  # spawned workers start from the default verbosity
+    with pa.memory_map(str(arrow_path)) as source:
+        table = pa.ipc.open_file(source).read_all()
+    df = arrow_to_pandas(decode_dictionaries(table))
+
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        report = perform_data_qc(df, df_name=df_name)
+    return report, buffer.getvalue()
+
+def _write_arrow_file(table, path):
+    with pa.OSFile(str(path), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+def run_parallel_qc(queries, max_workers=None):
+    """
+    Fetches and profiles several tables concurrently. Queries run and download on threads
+    (I/O-bound); perform_data_qc runs on a process pool (CPU-bound). Each table is handed
+    to its worker as an Arrow IPC file in shared memory (/dev/shm where available), which
+    the worker memory-maps, so no DataFrame is pickled between processes.
+
+    Returns {name: report} in the order of `queries`, whatever order the work finishes in;
+    tables whose query failed are left out.
+
+    Parameters:
+    queries : Dict mapping a table name to its SQL query.
+    max_workers : Size of the process pool (defaults to the number of CPUs, at most one per table).
+    """
+    max_workers = max_workers or min(len(queries), os.cpu_count() or 1)
+    shm_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    work_dir = Path(tempfile.mkdtemp(prefix="olist_qc_", dir=shm_dir))
+
+    futures = {}
+    try:
+        # spawn: the parent has fetch threads running, which fork does not handle safely
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+            for name, table in fetch_many_from_bq(queries, output="arrow"):
+                if table is None:
+                    print(f"🛑 Skipping QC for {name}: no data was fetched.")
+                    continue
+                arrow_path = work_dir / f"{name}.arrow"
+                _write_arrow_file(table, arrow_path)
+                futures[name] = pool.submit(_qc_worker, arrow_path, name, get_verbosity())
+
+            reports = {}
+            for name in queries:
+                if name not in futures:
+                    continue
+                report, output = futures[name].result()
+                print(output, end="")
+                reports[name] = report
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return reports
+
 # Function to save QC report as JSON
 
 def save_qc_report(report: dict, path: str | Path):
@@ -123,25 +326,78 @@ def save_qc_report(report: dict, path: str | Path):
     print(f"[QC] Saved QC report → {path}")
 
 
+# Raw tables checked by run_raw_data_qc
+QC_QUERIES = {
+    # Output Name (Key) : SQL Query Variable (Value)
+    "CUSTOMERS": q.GET_CUSTOMERS,
+    "GEOLOCATION": q.GET_GEOLOCATION,
+    "ORDER_ITEMS": q.GET_ORDER_ITEMS,
+    "ORDER_PAYMENTS": q.GET_ORDER_PAYMENTS,
+    "ORDER_REVIEWS": q.GET_ORDER_REVIEWS,
+    "ORDERS": q.GET_ORDERS,
+    "PRODUCTS": q.GET_PRODUCTS,
+    "SELLERS": q.GET_SELLERS
+}
+
 # Perform QC on all relevant dataframes (all raw data tables)
-def run_raw_data_qc():
+def run_raw_data_qc(streaming=False, pushdown=False, parallel=False, max_workers=None, incremental=False,
+                    quiet=None):
+    """
+    Runs QC on every raw table and saves one JSON report per table.
+
+    Parameters:
+    streaming : If True, tables are profiled batch by batch with perform_data_qc_streaming
+                instead of being loaded whole into pandas (for tables larger than memory).
+    pushdown : If True, tables are profiled inside the warehouse with perform_data_qc_pushdown
+               and only a one-row profile per table is downloaded.
+    parallel : If True, tables are fetched and profiled concurrently with run_parallel_qc
+               (full download mode only).
+    max_workers : Process pool size for parallel mode.
+    incremental : If True, only partitions that changed since the last run are downloaded
+                  and profiled (perform_data_qc_incremental).
+    quiet : If True, the QC reports are not printed and one timing record is logged per
+            table (see verbosity.py); None uses the pipeline-wide verbosity.
+
+    Returns False if the report of any table could not be produced (its previous JSON
+    report is then left as it was), True otherwise.
+    """
     PROJECT_ROOT = Path(__file__).resolve().parents[2]  # points to OLIST/
 
-    queries_to_process = {
-        # Output Name (Key) : SQL Query Variable (Value)
-        "CUSTOMERS": q.GET_CUSTOMERS,
-        "GEOLOCATION": q.GET_GEOLOCATION,
-        "ORDER_ITEMS": q.GET_ORDER_ITEMS,
-        "ORDER_PAYMENTS": q.GET_ORDER_PAYMENTS,
-        "ORDER_REVIEWS": q.GET_ORDER_REVIEWS,
-        "ORDERS": q.GET_ORDERS,
-        "PRODUCTS": q.GET_PRODUCTS,
-        "SELLERS": q.GET_SELLERS
-    }
-
-    for df_clean_name, sql_query_name in queries_to_process.items():
-        qc = perform_data_qc(fetch_data_from_bq(sql_query_name), df_name=df_clean_name)
-        save_qc_report(qc, PROJECT_ROOT / "python" / "output" /"QC_Reports" / f"{df_clean_name}.json")
+    queries_to_process = QC_QUERIES
+
+    with quiet_reports(quiet):
+        if parallel and not (streaming or pushdown or incremental):
+            with instrument("qc", "parallel", tables=len(queries_to_process)):
+                reports = run_parallel_qc(queries_to_process, max_workers=max_workers)
+            for df_clean_name, qc in reports.items():
+                save_qc_report(qc, PROJECT_ROOT / "python" / "output" /"QC_Reports" / f"{df_clean_name}.json")
+        else:
+            mode = "incremental" if incremental else "pushdown" if pushdown else "streaming" if streaming else "full"
+            reports = {}
+            for df_clean_name, sql_query_name in queries_to_process.items():
+                with instrument("qc_table", df_clean_name, mode=mode):
+                    if incremental:
+                        qc = perform_data_qc_incremental(sql_query_name, df_name=df_clean_name)
+                    elif pushdown:
+                        qc = perform_data_qc_pushdown(sql_query_name, df_name=df_clean_name)
+                    elif streaming:
+                        try:
+                            qc = perform_data_qc_streaming(fetch_batches_from_bq(sql_query_name), df_name=df_clean_name)
+                        except Exception:
+                            qc = None  # fetch_batches_from_bq already printed the failure
+                    else:
+                        df = fetch_data_from_bq(sql_query_name)
+                        qc = None if df is None else perform_data_qc(df, df_name=df_clean_name)
+                if qc is None:
+                    print(f"🛑 Skipping the QC report for {df_clean_name}: its query failed.")
+                    continue
+                reports[df_clean_name] = qc
+                save_qc_report(qc, PROJECT_ROOT / "python" / "output" /"QC_Reports" / f"{df_clean_name}.json")
+
+    failed = [name for name in queries_to_process if name not in reports]
+    if failed:
+        print(f"🛑 No QC report for: {', '.join(failed)}")
+    return not failed
 
 if __name__ == "__main__":
     run_raw_data_qc()
\ No newline at end of file
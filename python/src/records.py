@@ -0,0 +1,93 @@
+from collections import namedtuple
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+# --- Columnar JSON record export for the analysis reports ---
+#
+# Replaces `for _, row in df.iterrows(): data.append({...})` loops. Casting, null
+# handling and rounding are done once per column, then the columns are zipped into
+# records. Each kind reproduces the per-row expression it replaces exactly, so the
+# JSON files stay byte-identical:
+#
+#   kind     per-row expression
+#   'str'    str(row[col])
+#   'int'    int(row[col])
+#   'float'  float(row[col])                       or round(float(row[col]), digits)
+#   'round'  round(row[col], digits)                (no float cast: NumPy floats round the NumPy way)
+#   'month'  row[col].strftime('%Y-%m')
+#
+# nullable=True adds `... if pd.notna(row[col]) else None`.
+# A dotted key ("avg_rfm_scores.recency") puts the value in a nested dict.
+
+Field = namedtuple("Field", ["key", "column", "kind", "digits", "nullable"], defaults=(None, False))
+
+
+def _python_round(values: List[float], digits) -> List[float]:
+    # Python's round() is correctly rounded; np.round can differ in the last digit
+    return [round(v, digits) for v in values]
+
+
+def _convert_column(series: pd.Series, field: Field) -> List[Any]:
+    """All values of one output field, as the per-row expression would have produced them."""
+    kind, digits = field.kind, field.digits
+    mask = series.notna().to_numpy() if field.nullable else None
+    if mask is not None and not mask.all():
+        present = series[mask]
+    else:
+        present, mask = series, None
+
+    if kind == 'str':
+        values = list(map(str, present.tolist()))
+    elif kind == 'int':
+        values = list(map(int, present.tolist()))
+    elif kind == 'float':
+        values = list(map(float, present.tolist()))
+        if digits is not None:
+            values = _python_round(values, digits)
+    elif kind == 'round':
+        if isinstance(present.dtype, np.dtype) and present.dtype.kind == 'f':
+            values = list(np.round(present.to_numpy(), digits))  # round(np.float64) -> np.float64
+        else:
+            values = _python_round(present.tolist(), digits)
+    elif kind == 'month':
+        values = present.dt.strftime('%Y-%m').tolist()
+    else:
+        raise ValueError(f"Unknown field kind '{kind}'.")
+
+    if mask is None:
+        return values
+    # Put the Nones back where the nulls were
+    out = [None] * len(mask)
+    for position, value in zip(np.flatnonzero(mask), values):
+        out[position] = value
+    return out
+
+
+def frame_to_records(df: pd.DataFrame, fields: List[Field]) -> List[Dict[str, Any]]:
+    """
+    Converts a DataFrame into a list of JSON-ready dicts, one per row, in row order.
+
+    Parameters:
+    df : Source rows.
+    fields : Output fields in key order (see the kinds above).
+    """
+    columns = [_convert_column(df[field.column], field) for field in fields]
+    keys = [field.key for field in fields]
+
+    if not any('.' in key for key in keys):
+        return [dict(zip(keys, values)) for values in zip(*columns)]
+
+    records = []
+    for values in zip(*columns):
+        record = {}
+        for key, value in zip(keys, values):
+            parent, _, child = key.rpartition('.')
+            target = record
+            if parent:
+                for part in parent.split('.'):
+                    target = target.setdefault(part, {})
+            target[child] = value
+        records.append(record)
+    return records
@@ -0,0 +1,136 @@
+from collections import namedtuple
+
+import pandas as pd
+
+# --- Pushdown aggregates for the delivery and seller reports ---
+#
+# In query mode 'aggregate' (run_analysis(query_mode='aggregate') or OLIST_QUERY_MODE=aggregate)
+# the delivery and seller reports are built from a few pre-aggregated frames computed in the
+# warehouse, instead of downloading every row of their source tables:
+#
+#   delivery  summary : one row with the overall counts and means, the late-order stats and
+#                       the delivery / fulfillment / delay bracket histograms
+#             sellers : per-seller on-time stats, only for sellers with enough orders
+#   seller    summary : one row with the totals, the review-score bracket histogram and the
+#                       number of sellers making up 80% of the revenue
+#             top     : the top and bottom rankings, tagged by a `ranking` column
+#
+# A histogram is returned as one column per bracket, named <histogram>_<bracket index>.
+# The SQL only uses constructs BigQuery and DuckDB share. Ties in the rankings are broken by
+# seller_id (the row-level reports keep the order in which the rows arrived).
+
+DeliveryAggregates = namedtuple("DeliveryAggregates", ["summary", "sellers"])
+SellerAggregates = namedtuple("SellerAggregates", ["summary", "top"])
+
+# Rankings returned by the seller 'top' query
+SELLER_RANKINGS = ("top_by_revenue", "top_by_review", "bottom_by_review")
+
+
+def _count_if(condition):
+    return f"SUM(CASE WHEN {condition} THEN 1 ELSE 0 END)"
+
+
+def _bracket_columns(histogram, column, bins, condition=None, include_lowest=False):
+    """
+    One count per pd.cut bracket of `column` (right-closed intervals between consecutive
+    bins, the first one also left-closed with include_lowest), aliased <histogram>_<i>.
+    `condition` restricts the counted rows.
+    """
+    exprs = []
+    for i in range(len(bins) - 1):
+        lower, upper = bins[i], bins[i + 1]
+        tests = [condition] if condition else []
+        tests.append(f"{column} {'>=' if include_lowest and i == 0 else '>'} {lower}")
+        if upper != float('inf'):
+            tests.append(f"{column} <= {upper}")
+        exprs.append(f"{_count_if(' AND '.join(tests))} AS {histogram}_{i}")
+    return exprs
+
+
+def bracket_counts(row, histogram, labels):
+    """{label: count} from the <histogram>_<i> columns of a summary row."""
+    counts = (row[f"{histogram}_{i}"] for i in range(len(labels)))
+    return {label: 0 if pd.isna(count) else int(count) for label, count in zip(labels, counts)}
+
+
+def _select(exprs, source_sql, alias="t"):
+    select_list = ",\n    ".join(exprs)
+    return f"SELECT\n    {select_list}\nFROM (\n{source_sql.strip()}\n) AS {alias}"
+
+
+def delivery_aggregate_queries(delivery_sql, delivery_bins, fulfillment_bins, delay_bins, min_seller_orders):
+    """
+    Queries computing the delivery report's aggregates from the rows of delivery_sql
+    (q.GET_delivery_performance). Returns {'summary': sql, 'sellers': sql}.
+    """
+    late = "NOT on_time_flag"
+    summary = [
+        "COUNT(*) AS total_orders",
+        f"{_count_if('on_time_flag')} AS total_on_time",
+        "AVG(actual_delivery_days) AS avg_actual_delivery",
+        "AVG(fulfillment_days) AS avg_fulfillment",
+        "AVG(delay_vs_estimate) AS avg_delay",
+        f"{_count_if(late)} AS late_orders",
+        f"AVG(CASE WHEN {late} THEN delay_vs_estimate END) AS avg_late_delay",
+        f"MAX(CASE WHEN {late} THEN delay_vs_estimate END) AS max_delay",
+        f"MIN(CASE WHEN {late} THEN delay_vs_estimate END) AS min_delay",
+        *_bracket_columns("delivery", "actual_delivery_days", delivery_bins),
+        *_bracket_columns("fulfillment", "fulfillment_days", fulfillment_bins),
+        *_bracket_columns("delay", "delay_vs_estimate", delay_bins, condition=late),
+    ]
+    sellers = [
+        "seller_id",
+        "COUNT(order_id) AS total_orders",
+        f"{_count_if('on_time_flag')} AS on_time_orders",
+        "AVG(actual_delivery_days) AS avg_delivery_days",
+        "AVG(delay_vs_estimate) AS avg_delay",
+    ]
+    return {
+        "summary": _select(summary, delivery_sql),
+        "sellers": _select(sellers, delivery_sql) + (
+            "\nWHERE seller_id IS NOT NULL"
+            "\nGROUP BY seller_id"
+            f"\nHAVING COUNT(order_id) >= {min_seller_orders}"
+            "\nORDER BY seller_id"
+        ),
+    }
+
+
+def seller_aggregate_queries(seller_sql, review_bins, min_review_orders, top_n):
+    """
+    Queries computing the seller report's aggregates from the rows of seller_sql
+    (q.GET_BI_SELLER_PERFORMANCE). Returns {'summary': sql, 'top': sql}.
+    """
+    reviewed = f"avg_review_score IS NOT NULL AND total_orders >= {min_review_orders}"
+    ranked = _select([
+        "*",
+        "SUM(total_revenue) OVER (ORDER BY total_revenue DESC, seller_id "
+        "ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS cumulative_revenue",
+        "SUM(total_revenue) OVER () AS all_revenue",
+    ], seller_sql, alias="s")
+    summary = [
+        "COUNT(*) AS total_sellers",
+        "COUNT(avg_review_score) AS sellers_with_reviews",
+        "SUM(total_orders) AS total_orders",
+        "SUM(total_items_sold) AS total_items",
+        "SUM(total_revenue) AS total_revenue",
+        "AVG(avg_delivery_days) AS avg_delivery",
+        "AVG(avg_review_score) AS avg_review",
+        f"{_count_if(reviewed)} AS sellers_min_orders",
+        f"{_count_if('total_revenue IS NOT NULL AND cumulative_revenue / all_revenue * 100 <= 80')} AS sellers_for_80pct",
+        *_bracket_columns("review", "avg_review_score", review_bins, include_lowest=True),
+    ]
+
+    rankings = {
+        "top_by_revenue": ("total_revenue IS NOT NULL", "total_revenue DESC"),
+        "top_by_review": (reviewed, "avg_review_score DESC"),
+        "bottom_by_review": (reviewed, "avg_review_score ASC"),
+    }
+    top = "\nUNION ALL\n".join(
+        f"(SELECT '{name}' AS ranking, * FROM sellers WHERE {condition} ORDER BY {order}, seller_id LIMIT {top_n})"
+        for name, (condition, order) in rankings.items()
+    )
+    return {
+        "summary": _select(summary, ranked),
+        "top": f"WITH sellers AS (\n{seller_sql.strip()}\n)\n{top}",
+    }
@@ -0,0 +1,170 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from .fingerprints import fingerprint_digest, is_unchanged, save_fingerprint
+from .metrics import instrument, current_stage_path
+from .verbosity import thread_stdout, capture_stdout
+
+# --- Pipeline DAG scheduler ---
+#
+# Stages declare the stages they depend on. A stage starts as soon as all of its
+# dependencies have succeeded, so independent stages run concurrently (on threads: the
+# work is mostly waiting on the warehouse and on LLM APIs). A stage fails if its function
+# raises or returns False; every stage downstream of a failure is skipped instead of
+# running on stale inputs. Each stage's console output is buffered and printed in one
+# block when it finishes, so concurrent reports do not interleave.
+#
+# A stage with an `inputs` callable is skipped when its inputs have not changed since it last
+# succeeded and its `outputs` still exist (see fingerprints.py); downstream stages then run
+# against the outputs it left from the previous run.
+
+Stage = namedtuple("Stage", ["name", "fn", "deps", "description", "inputs", "outputs"],
+                   defaults=((), "", None, ()))
+
+# Stage outcomes reported by run_dag
+OK, UNCHANGED, FAILED, SKIPPED = "ok", "unchanged (outputs reused)", "failed", "skipped (upstream failed)"
+SUCCEEDED = (OK, UNCHANGED)
+
+
+def validate_dag(stages):
+    """Checks that stage names are unique, dependencies exist and there is no cycle."""
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError("Duplicate stage names in the pipeline.")
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'.")
+
+    visiting, done = set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle through stage '{name}'.")
+        visiting.add(name)
+        for dep in by_name[name].deps:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for name in names:
+        visit(name)
+
+
+def downstream_of(stages, names):
+    """The given stages plus every stage that depends on them, directly or not."""
+    selected = set(names)
+    changed = True
+    while changed:
+        changed = False
+        for stage in stages:
+            if stage.name not in selected and selected.intersection(stage.deps):
+                selected.add(stage.name)
+                changed = True
+    return selected
+
+
+def select_stages(stages, only=None, start_from=None):
+    """
+    Returns the names of the stages to run.
+
+    Parameters:
+    only : Stage names to run (their dependencies are not run; their last outputs are used).
+    start_from : Stage names to restart from: they and everything downstream of them are run.
+    """
+    names = {stage.name for stage in stages}
+    for requested in (only or []) + (start_from or []):
+        if requested not in names:
+            raise ValueError(f"Unknown stage '{requested}'. Stages: {', '.join(s.name for s in stages)}.")
+
+    selected = set(names)
+    if only:
+        selected &= set(only)
+    if start_from:
+        selected &= downstream_of(stages, start_from)
+    return selected
+
+
+def _input_digest(stage):
+    """Fingerprint of the stage's current inputs (None if it has none or they cannot be read)."""
+    if stage.inputs is None:
+        return None
+    try:
+        return fingerprint_digest(stage.inputs())
+    except Exception as e:
+        print(f"⚠️ Could not fingerprint the inputs of {stage.name}, running it: {e}")
+        return None
+
+
+def _run_stage(stage, parent_path, force=False):
+    """Runs one stage on a worker thread; returns (outcome, captured output, error)."""
+    with capture_stdout() as output:
+        digest = _input_digest(stage)
+        if not force and is_unchanged(stage.name, digest, stage.outputs):
+            with instrument("step", stage.name, parent_path=parent_path, reused_outputs=True):
+                print(f"⏩ {stage.name}: inputs unchanged since the last run, reusing its outputs.")
+            return UNCHANGED, output.getvalue(), None
+        try:
+            with instrument("step", stage.name, parent_path=parent_path):
+                succeeded = stage.fn() is not False
+            error = None if succeeded else "reported a failure"
+        except Exception as e:
+            succeeded, error = False, repr(e)
+        if stage.inputs is not None:
+            # Fingerprint the inputs the stage actually ran on; a failed stage is always rerun
+            save_fingerprint(stage.name, digest if succeeded else None)
+    return (OK if succeeded else FAILED), output.getvalue(), error
+
+
+def run_dag(stages, only=None, start_from=None, max_workers=None, force=False):
+    """
+    Runs the pipeline stages in dependency order, independent stages concurrently.
+    Returns {stage name: OK, UNCHANGED, FAILED or SKIPPED} for the selected stages.
+
+    Parameters:
+    stages : List of Stage.
+    only, start_from : Stage selection (see select_stages). The stages named in them always
+                       run; the stages downstream of start_from are skipped if unchanged.
+    max_workers : Maximum number of stages running at once (defaults to all of them).
+    force : If True, stages run even when their inputs are unchanged.
+    """
+    validate_dag(stages)
+    selected = select_stages(stages, only, start_from)
+    pending = {stage.name: stage for stage in stages if stage.name in selected}
+    results = {}
+    parent_path = current_stage_path()
+    # Rerunning a named stage is the point of --only / --from: do not skip it as unchanged
+    named = set(only or []) | set(start_from or [])
+
+    with thread_stdout(), ThreadPoolExecutor(max_workers=max_workers or len(stages)) as pool:
+        running = {}
+        while pending or running:
+            # Stages whose selected dependencies have all finished
+            for name, stage in list(pending.items()):
+                deps = [dep for dep in stage.deps if dep in selected]
+                if any(results.get(dep) in (FAILED, SKIPPED) for dep in deps):
+                    del pending[name]
+                    results[name] = SKIPPED
+                    print(f"⏭️ Skipping {name}: an upstream stage failed.")
+                elif all(results.get(dep) in SUCCEEDED for dep in deps):
+                    del pending[name]
+                    print(f"▶️ Starting {name}{' - ' + stage.description if stage.description else ''}")
+                    running[pool.submit(_run_stage, stage, parent_path, force or name in named)] = name
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                outcome, output, error = future.result()
+                print(output, end="")
+                results[name] = outcome
+                if outcome == OK:
+                    print(f"✅ {name} complete.")
+                elif outcome == FAILED:
+                    print(f"❌ {name} failed: {error}")
+
+    return {stage.name: results[stage.name] for stage in stages if stage.name in results}
@@ -248,3 +248,23 @@ GROUP BY o.month, s.total_sellers
 ORDER BY o.month
 """
 
+
+### SHARED DATASETS (loaded once per run, see datasets.py)
+## only the columns used by the queries that datasets.py computes locally
+
+GET_shared_orders = """
+SELECT order_id, customer_id, order_status, order_purchase_timestamp, payment_value
+FROM `olist-ecommerce-1234321.mart.FACT_orders`
+"""
+GET_shared_order_items = """
+SELECT order_id, order_item_id, product_id, seller_id, price, freight_value
+FROM `olist-ecommerce-1234321.mart.FACT_order_items`
+"""
+GET_shared_customers = """
+SELECT customer_id, customer_unique_id, province, latitude, longitude
+FROM `olist-ecommerce-1234321.mart.DIM_customers`
+"""
+GET_shared_products = """
+SELECT product_id, product_category_name
+FROM `olist-ecommerce-1234321.mart.DIM_products`
+"""
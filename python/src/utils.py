@@ -1,12 +1,39 @@
 import os
+import re
+import json
+import time
+import hashlib
+import threading
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from dotenv import load_dotenv
 from google.cloud import bigquery
 from google.cloud import bigquery_storage
+from .backends import BigQueryBackend, DuckDBBackend, backend_name_from_env, bigquery_like_types
+from .metrics import record_query, current_stage_path
+from .verbosity import in_caller_context
 
 # --- Global client cache (Singletons) ---
 _bq_client = None
 _bq_storage_client = None
+_backend = None
+_backend_lock = threading.Lock()  # pipeline stages may ask for the backend concurrently
+
+# --- Local query result cache ---
+# Results are stored as Arrow IPC files named after a hash of the normalized SQL
+# and the last-modified time of every table the query reads.
+CACHE_DIR = Path(__file__).resolve().parents[1] / ".cache" / "query_results"
+CACHE_TTL_SECONDS = 24 * 60 * 60      # entries older than this are refetched
+CACHE_MAX_BYTES = 2 * 1024**3         # least recently used entries are evicted above this size
+
+_TABLE_REF_PATTERN = re.compile(r"`([\w-]+\.[\w-]+\.[\w-]+)`")
+
+# Result formats accepted by fetch_data_from_bq(output=...)
+OUTPUT_FORMATS = ("pandas", "arrow", "polars")
 
 def get_bq_client():
     """
@@ -34,33 +61,445 @@ def get_bq_client():
             
     return _bq_client, _bq_storage_client
 
-def fetch_data_from_bq(sql_query):
+def get_backend():
+    """
+    Returns the warehouse backend used by fetch_data_from_bq (cached).
+    OLIST_WAREHOUSE=bigquery (default) queries BigQuery; OLIST_WAREHOUSE=duckdb runs the
+    same SQL locally over the Parquet snapshot in OLIST_PARQUET_DIR (default: python/data/parquet).
+    """
+    global _backend
+
+    with _backend_lock:
+        if _backend is None:
+            load_dotenv(Path(__file__).resolve().parents[2] / '.env')
+            backend_name = backend_name_from_env()
+
+            if backend_name == "duckdb":
+                try:
+                    parquet_dir = os.environ.get("OLIST_PARQUET_DIR")
+                    _backend = DuckDBBackend(parquet_dir) if parquet_dir else DuckDBBackend()
+                    print(f"✅ Local DuckDB backend initialized ({_backend.data_dir}).")
+                except Exception as e:
+                    print("\n❌ FATAL ERROR: Could not initialize the DuckDB backend.")
+                    print("👉 Check OLIST_PARQUET_DIR in your .env file.")
+                    print(f"👉 Error details: {e}\n")
+                    return None
+            elif backend_name == "bigquery":
+                client, storage_client = get_bq_client()
+                if client is None:
+                    return None
+                _backend = BigQueryBackend(client, storage_client)
+            else:
+                print(f"❌ Unknown OLIST_WAREHOUSE '{backend_name}'. Use 'bigquery' or 'duckdb'.")
+                return None
+
+    return _backend
+
+def set_backend(backend):
+    """Overrides the backend used by fetch_data_from_bq (e.g. a DuckDBBackend in a benchmark)."""
+    global _backend
+    _backend = backend
+
+# -------------------------
+# Result formats
+# -------------------------
+def dictionary_encode_strings(table):
+    """
+    Dictionary-encodes every string column of an Arrow table. Low-cardinality columns
+    (states, cities, statuses, categories) then cost one small integer per row.
+    """
+    columns = []
+    for field, column in zip(table.schema, table.columns):
+        if pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+            column = pc.dictionary_encode(column)
+        columns.append(column)
+    return pa.Table.from_arrays(columns, names=table.column_names)
+
+def decode_dictionaries(table):
+    """Reverses dictionary_encode_strings, keeping the schema metadata."""
+    columns = [
+        column.cast(column.type.value_type) if pa.types.is_dictionary(column.type) else column
+        for column in table.columns
+    ]
+    return pa.Table.from_arrays(columns, names=table.column_names).replace_schema_metadata(table.schema.metadata)
+
+def arrow_to_pandas(table):
+    """
+    Converts an Arrow table to pandas with the same dtypes BigQuery's to_dataframe() returns.
+    Tables written from pandas keep their original dtypes through the pandas schema metadata.
+    """
+    if table.schema.pandas_metadata is not None:
+        return table.to_pandas()
+    return table.to_pandas(types_mapper=bigquery_like_types)
+
+def convert_result(data, output="pandas"):
+    """
+    Converts a query result (Arrow table or pandas DataFrame) to the requested output:
+    'pandas', 'arrow' (dictionary-encoded strings) or 'polars' (strings become Categorical).
+    """
+    if output not in OUTPUT_FORMATS:
+        raise ValueError(f"Invalid output '{output}'. Must be one of {OUTPUT_FORMATS}.")
+
+    if output == "pandas":
+        return arrow_to_pandas(data) if isinstance(data, pa.Table) else data
+
+    table = data if isinstance(data, pa.Table) else pa.Table.from_pandas(data, preserve_index=False)
+    table = dictionary_encode_strings(table)
+    if output == "arrow":
+        return table
+
+    import polars as pl
+    return pl.from_arrow(table)
+
+def _report_types(arrow_type):
+    """
+    Arrow -> pandas dtype mapping for as_pandas: strings stay Arrow-backed (missing values
+    read as NaN, as in the pandas path), numbers and booleans get the dtypes of arrow_to_pandas.
+    """
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    return bigquery_like_types(arrow_type)
+
+def as_pandas(data):
+    """
+    Returns a pandas DataFrame for any supported result type, so the report functions can
+    consume Arrow tables and Polars frames. Non-pandas inputs get Arrow-backed strings, which
+    avoids materializing them as Python objects; every other column gets the dtype the pandas
+    path uses, so the reports come out the same whatever the output format.
+    """
+    if isinstance(data, pd.DataFrame):
+        return data
+
+    if not isinstance(data, pa.Table):
+        data = data.to_arrow()  # polars.DataFrame
+
+    # Decode dictionary columns first: pandas handles plain Arrow strings better than categoricals
+    columns = [
+        column.cast(column.type.value_type) if pa.types.is_dictionary(column.type) else column
+        for column in data.columns
+    ]
+    table = pa.Table.from_arrays(columns, names=data.column_names)
+    return table.to_pandas(types_mapper=_report_types)
+
+def _result_rows(data):
+    return data.num_rows if isinstance(data, pa.Table) else len(data)
+
+# -------------------------
+# Query result cache
+# -------------------------
+def normalize_sql(sql_query):
+    """
+    Strips comments and collapses whitespace so formatting changes do not change the cache key.
+    """
+    no_comments = re.sub(r"--[^\n]*", " ", sql_query)
+    return " ".join(no_comments.split())
+
+def extract_table_refs(sql_query):
+    """
+    Returns the sorted fully-qualified table names (project.dataset.table) referenced by a query.
+    """
+    return sorted(set(_TABLE_REF_PATTERN.findall(sql_query)))
+
+def _read_table_versions(backend, table_refs):
+    """
+    Looks up the last-modified time of each table (metadata only, no scan), once per
+    distinct table and concurrently. Returns {table: time}, with None where a lookup failed.
+    """
+    def lookup(table_ref):
+        try:
+            return backend.table_last_modified(table_ref)
+        except Exception as e:
+            print(f"⚠️ Could not read metadata of {table_ref} ({e})")
+            return None
+
+    table_refs = sorted(set(table_refs))
+    if len(table_refs) <= 1:
+        return {table_ref: lookup(table_ref) for table_ref in table_refs}
+    with ThreadPoolExecutor(max_workers=len(table_refs)) as pool:
+        return dict(zip(table_refs, pool.map(in_caller_context(lookup), table_refs)))
+
+def _table_versions(backend, sql_query, known_versions=None):
+    """
+    Returns the last-modified time of every source table of the query, taken from
+    known_versions (see _read_table_versions) or looked up. Returns None if any lookup
+    failed, which disables caching for this query.
+    """
+    table_refs = extract_table_refs(sql_query)
+    if known_versions is None:
+        known_versions = _read_table_versions(backend, table_refs)
+    versions = {table_ref: known_versions.get(table_ref) for table_ref in table_refs}
+    if any(version is None for version in versions.values()):
+        print("⚠️ Cache disabled for this query: the metadata of a source table could not be read.")
+        return None
+    return versions
+
+def source_table_versions(sql_queries):
+    """
+    Returns {table: last-modified time} for every table read by the given queries (metadata
+    only, no scan), or None if the backend or any lookup is unavailable.
+    """
+    backend = get_backend()
+    if backend is None:
+        return None
+    versions = _read_table_versions(backend, extract_table_refs("\n".join(sql_queries)))
+    return None if any(version is None for version in versions.values()) else versions
+
+def query_cache_key(sql_query, table_versions):
+    payload = json.dumps({"sql": normalize_sql(sql_query), "tables": table_versions}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _cache_path(key):
+    return CACHE_DIR / f"{key}.arrow"
+
+def read_cached_result(key, ttl_seconds=CACHE_TTL_SECONDS):
+    """
+    Returns the cached Arrow table for a key, or None on a miss / expired entry.
+    The Arrow file is memory-mapped, so the table's buffers point into the page cache
+    and only the pages that are used get read.
+    """
+    path = _cache_path(key)
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+
+    if time.time() - stat.st_mtime > ttl_seconds:
+        path.unlink(missing_ok=True)
+        return None
+
+    try:
+        with pa.memory_map(str(path), "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+    except Exception as e:
+        print(f"⚠️ Ignoring unreadable cache entry {path.name}: {e}")
+        path.unlink(missing_ok=True)
+        return None
+
+    # Access time drives LRU eviction; modification time keeps the creation time for the TTL
+    os.utime(path, (time.time(), stat.st_mtime))
+    return table
+
+def write_cached_result(key, data, max_bytes=CACHE_MAX_BYTES):
+    """
+    Stores a DataFrame or Arrow table under a key, then evicts least recently used
+    entries above max_bytes.
+    """
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        table = data if isinstance(data, pa.Table) else pa.Table.from_pandas(data, preserve_index=False)
+        tmp_path = _cache_path(key).with_suffix(f".tmp{os.getpid()}")
+        with pa.OSFile(str(tmp_path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, _cache_path(key))
+    except Exception as e:
+        print(f"⚠️ Could not write query cache entry: {e}")
+        return
+
+    evict_cache(max_bytes)
+
+def evict_cache(max_bytes=CACHE_MAX_BYTES):
+    """
+    Deletes least recently used cache entries until the cache fits in max_bytes.
+    """
+    entries = []
+    for path in CACHE_DIR.glob("*.arrow"):
+        try:
+            entries.append((path.stat(), path))
+        except FileNotFoundError:
+            continue
+
+    total_bytes = sum(stat.st_size for stat, _ in entries)
+    for stat, path in sorted(entries, key=lambda entry: entry[0].st_atime):
+        if total_bytes <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total_bytes -= stat.st_size
+
+def clear_query_cache():
+    """Removes every cached query result."""
+    for path in CACHE_DIR.glob("*.arrow"):
+        path.unlink(missing_ok=True)
+
+def _lookup_cache(backend, sql_query, use_cache, refresh, known_versions=None):
+    """
+    Returns (cache_key, cached_table). cache_key is None when the result must not be cached.
+    known_versions : Table versions already looked up for several queries (see _read_table_versions).
+    """
+    if not use_cache:
+        return None, None
+
+    versions = _table_versions(backend, sql_query, known_versions)
+    if versions is None:
+        return None, None
+
+    key = query_cache_key(sql_query, versions)
+    if refresh:
+        return key, None
+
+    table = read_cached_result(key)
+    if table is not None:
+        print(f"⚡ Cache hit. Scanned 0.00 MB. Loaded {table.num_rows} rows from local cache.")
+        record_query("ok", rows=table.num_rows, cache_hit=True)
+    return key, table
+
+def _download_query_job(backend, query_job, sql_query, cache_key=None, output="pandas", stage=None):
+    """
+    Waits for a submitted query job and downloads its result (Storage API on BigQuery).
+    Non-pandas outputs are downloaded as Arrow and never go through pandas.
+    stage is the path of the stage the query is recorded under when this runs on a
+    download thread (see metrics.current_stage_path).
+    """
+    try:
+        start = time.perf_counter()
+        data, bytes_processed = backend.collect(query_job, as_arrow=(output != "pandas"))
+        
+        # Calculate costs/usage for visibility
+        mb_processed = bytes_processed / (1024**2)
+        print(f"✔️ Query successful. Scanned {mb_processed:.2f} MB. Loaded {_result_rows(data)} rows.")
+        record_query("ok", rows=_result_rows(data), bytes_processed=bytes_processed,
+                     seconds=time.perf_counter() - start, slot_ms=getattr(query_job, "slot_millis", None),
+                     stage=stage)
+
+        if cache_key is not None:
+            write_cached_result(cache_key, data)
+        
+        return convert_result(data, output)
+        
+    except Exception as e:
+        _print_query_failure(e, sql_query, stage=stage)
+        return None
+
+def _print_query_failure(error, sql_query, stage=None):
+    print("\n--- ⚠️ BIGQUERY QUERY FAILED ---")
+    print(f"Error: {error}")
+    print(f"Check your SQL syntax in sql_queries.py.")
+    # Print the first 100 characters of the failing query to help debug
+    print(f"Failing Query Snippet: {sql_query.strip()[:100]}...\n")
+    record_query("error", error=str(error), sql=sql_query.strip()[:100], stage=stage)
+
+def fetch_data_from_bq(sql_query, use_cache=True, refresh=False, output="pandas"):
     """
     Runs a query and returns a Pandas DataFrame using the high-speed Storage API.
+
+    Results are cached locally and reused while none of the source tables has been
+    modified (and the entry is younger than CACHE_TTL_SECONDS).
+    use_cache=False bypasses the cache entirely; refresh=True re-runs the query
+    and overwrites the cached entry.
+
+    output selects the result type: 'pandas' (default), 'arrow' for a pyarrow.Table or
+    'polars' for a polars.DataFrame. The Arrow/Polars paths skip pandas materialization
+    and dictionary-encode string columns, which cuts peak memory on wide tables.
     """
-    client, storage_client = get_bq_client()
+    backend = get_backend()
     
-    if client is None:
+    if backend is None:
         print("🛑 Fetch failed: Clients not initialized.")
         return None
+
+    cache_key, cached_table = _lookup_cache(backend, sql_query, use_cache, refresh)
+    if cached_table is not None:
+        return convert_result(cached_table, output)
     
     try:
         # Run the query job
-        query_job = client.query(sql_query)
-        
-        # Download the results using the storage_client (Fast Path)
-        df = query_job.to_dataframe(bqstorage_client=storage_client)
-        
-        # Calculate costs/usage for visibility
-        mb_processed = query_job.total_bytes_processed / (1024**2)
-        print(f"✔️ Query successful. Scanned {mb_processed:.2f} MB. Loaded {len(df)} rows.")
-        
-        return df
-        
+        query_job = backend.submit(sql_query)
+    except Exception as e:
+        _print_query_failure(e, sql_query)
+        return None
+
+    return _download_query_job(backend, query_job, sql_query, cache_key, output)
+
+def fetch_batches_from_bq(sql_query, use_cache=True):
+    """
+    Runs a query and yields its result as pyarrow.RecordBatch objects instead of one
+    DataFrame, so tables larger than memory can be processed chunk by chunk.
+
+    A valid cached result is streamed from its memory-mapped file; otherwise the result
+    is streamed straight from the warehouse and not written to the cache.
+    A failed query prints the usual failure message and then raises, so a partial or
+    empty result is never taken for the whole table.
+    """
+    backend = get_backend()
+
+    if backend is None:
+        print("🛑 Fetch failed: Clients not initialized.")
+        raise RuntimeError("Warehouse clients not initialized")
+
+    _, cached_table = _lookup_cache(backend, sql_query, use_cache, refresh=False)
+    if cached_table is not None:
+        yield from cached_table.to_batches()
+        return
+
+    n_rows = 0
+    try:
+        query_job = backend.submit(sql_query)
+        for batch in backend.iter_batches(query_job):
+            n_rows += batch.num_rows
+            yield batch
     except Exception as e:
-        print("\n--- ⚠️ BIGQUERY QUERY FAILED ---")
-        print(f"Error: {e}")
-        print(f"Check your SQL syntax in sql_queries.py.")
-        # Print the first 100 characters of the failing query to help debug
-        print(f"Failing Query Snippet: {sql_query.strip()[:100]}...\n")
-        return None
\ No newline at end of file
+        _print_query_failure(e, sql_query)
+        raise
+
+    bytes_processed = getattr(query_job, "total_bytes_processed", None) or 0
+    print(f"✔️ Query successful. Scanned {bytes_processed / (1024**2):.2f} MB. Streamed {n_rows} rows.")
+    record_query("ok", rows=n_rows, bytes_processed=bytes_processed,
+                 slot_ms=getattr(query_job, "slot_millis", None), streamed=True)
+
+def fetch_many_from_bq(queries, max_workers=None, use_cache=True, refresh=False, output="pandas"):
+    """
+    Submits several queries at once and yields (name, DataFrame) pairs as each job finishes.
+
+    All jobs are started up front so BigQuery runs them in parallel; results are
+    downloaded on a thread pool and handed back in completion order. A failed
+    query yields (name, None), mirroring fetch_data_from_bq.
+
+    Parameters:
+    queries : Dict mapping an output name to its SQL query string.
+    max_workers : Number of download threads (defaults to one per query).
+    use_cache, refresh, output : Same meaning as in fetch_data_from_bq. Cache hits are yielded first.
+    """
+    backend = get_backend()
+
+    if backend is None:
+        print("🛑 Fetch failed: Clients not initialized.")
+        for name in queries:
+            yield name, None
+        return
+
+    # 1. Serve what we can from the local cache, then submit every remaining job
+    #    before waiting on any of them (submit does not block). The source tables'
+    #    metadata is read up front, concurrently and once per table
+    known_versions = None
+    if use_cache:
+        known_versions = _read_table_versions(backend, extract_table_refs("\n".join(queries.values())))
+    jobs = {}
+    cache_keys = {}
+    ready = []
+    for name, sql_query in queries.items():
+        cache_keys[name], cached_table = _lookup_cache(backend, sql_query, use_cache, refresh, known_versions)
+        if cached_table is not None:
+            ready.append((name, convert_result(cached_table, output)))
+            continue
+        try:
+            jobs[name] = backend.submit(sql_query)
+        except Exception as e:
+            _print_query_failure(e, sql_query)
+            ready.append((name, None))
+
+    yield from ready
+    if not jobs:
+        return
+
+    # 2. Download results as the jobs complete. The download threads have no stage of their
+    #    own, so the queries are recorded under the caller's; each job also keeps the caller's
+    #    verbosity and stdout target (see verbosity.in_caller_context)
+    stage = current_stage_path()
+    download = in_caller_context(_download_query_job)
+    with ThreadPoolExecutor(max_workers=max_workers or len(jobs)) as pool:
+        futures = {
+            pool.submit(download, backend, job, queries[name], cache_keys[name], output, stage): name
+            for name, job in jobs.items()
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
@@ -0,0 +1,184 @@
+import contextlib
+import contextvars
+import io
+import json
+import logging
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+
+# --- Pipeline verbosity ---
+#
+# 'normal' : every report prints its full console output (the default).
+# 'quiet'  : for headless/scheduled runs. Reports skip building and printing their display
+#            tables, other stdout from the reports is discarded, and the pipeline writes
+#            one JSON log record per step, query and report to stderr instead (see metrics.py).
+#
+# Set with OLIST_VERBOSITY=quiet, set_verbosity('quiet'), `run_all --quiet` or the quiet=
+# argument of the run_* functions. JSON outputs are the same in both modes.
+
+VERBOSITY_LEVELS = ("normal", "quiet")
+
+_verbosity = os.getenv("OLIST_VERBOSITY", "normal").lower()
+if _verbosity not in VERBOSITY_LEVELS:
+    _verbosity = "normal"
+
+# Per-stage override set by quiet_reports(). Stages run concurrently on scheduler threads,
+# so the override lives in a context variable instead of replacing the pipeline-wide setting
+_override = contextvars.ContextVar("olist_verbosity_override", default=None)
+
+LOGGER = logging.getLogger("olist.pipeline")
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.fields, default=str)
+
+
+def _configure_logger():
+    if LOGGER.handlers:
+        return
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(_JsonFormatter())
+    LOGGER.addHandler(handler)
+    LOGGER.setLevel(logging.INFO)
+    LOGGER.propagate = False
+
+
+def set_verbosity(level: str) -> None:
+    """Sets the pipeline-wide verbosity ('normal' or 'quiet')."""
+    global _verbosity
+    if level not in VERBOSITY_LEVELS:
+        raise ValueError(f"Unknown verbosity '{level}'. Use one of {VERBOSITY_LEVELS}.")
+    _verbosity = level
+
+
+def get_verbosity() -> str:
+    """The verbosity in effect here: the quiet_reports() override if any, else the pipeline-wide one."""
+    override = _override.get()
+    return _verbosity if override is None else override
+
+
+def is_quiet() -> bool:
+    return get_verbosity() == "quiet"
+
+
+def log_event(event: str, **fields) -> None:
+    """Writes one structured log record (JSON line on stderr). Only emitted in quiet mode."""
+    if not is_quiet():
+        return
+    _configure_logger()
+    record = {"ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"), "event": event, **fields}
+    LOGGER.info(event, extra={"fields": record})
+
+
+class _ThreadStdout:
+    """
+    sys.stdout replacement used while pipeline stages run on threads: each thread writes to
+    its own innermost target (a capture buffer or a discard sink) if it has one, otherwise
+    to the real stdout (or nowhere in quiet mode).
+    """
+    def __init__(self, default):
+        self.default = default
+        self._local = threading.local()
+
+    def targets(self):
+        if not hasattr(self._local, "targets"):
+            self._local.targets = []
+        return self._local.targets
+
+    def write(self, text):
+        targets = self.targets()
+        if targets:
+            return targets[-1].write(text)
+        if is_quiet():
+            return len(text)
+        return self.default.write(text)
+
+    def flush(self):
+        targets = self.targets()
+        (targets[-1] if targets else self.default).flush()
+
+    def __getattr__(self, name):
+        return getattr(self.default, name)
+
+
+@contextlib.contextmanager
+def thread_stdout():
+    """Routes stdout per thread (see _ThreadStdout) for the duration of the block."""
+    if isinstance(sys.stdout, _ThreadStdout):
+        yield
+        return
+    router = _ThreadStdout(sys.stdout)
+    sys.stdout = router
+    try:
+        yield
+    finally:
+        sys.stdout = router.default
+
+
+@contextlib.contextmanager
+def _thread_target(target):
+    targets = sys.stdout.targets()
+    targets.append(target)
+    try:
+        yield target
+    finally:
+        targets.pop()
+
+
+def in_caller_context(fn):
+    """
+    Wraps fn for a worker thread: each call runs in a copy of the calling thread's context
+    (its quiet_reports() override) and prints to the calling thread's stdout target, so
+    the output of helper threads lands in the same capture buffer (or discard sink).
+    """
+    context = contextvars.copy_context()
+    targets = sys.stdout.targets() if isinstance(sys.stdout, _ThreadStdout) else []
+    target = targets[-1] if targets else None
+
+    def run(*args, **kwargs):
+        if target is None:
+            return context.copy().run(fn, *args, **kwargs)
+        with _thread_target(target):
+            return context.copy().run(fn, *args, **kwargs)
+    return run
+
+
+@contextlib.contextmanager
+def capture_stdout():
+    """
+    Collects what the current thread prints inside the block into a StringIO, which is
+    yielded. Only this thread is captured when stdout is routed per thread (thread_stdout()).
+    """
+    if isinstance(sys.stdout, _ThreadStdout):
+        with _thread_target(io.StringIO()) as buffer:
+            yield buffer
+    else:
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            yield buffer
+
+
+@contextlib.contextmanager
+def quiet_reports(quiet=None):
+    """
+    Runs the block at the given verbosity: with quiet=True, display tables are skipped and
+    any other stdout is discarded. quiet=None keeps the current setting. The override only
+    applies to the current thread (context), so concurrent stages do not affect each other.
+    """
+    level = _override.get() if quiet is None else "quiet" if quiet else "normal"
+    token = _override.set(level)
+    try:
+        if not is_quiet():
+            yield
+        elif isinstance(sys.stdout, _ThreadStdout):
+            # Stages run on threads: discard only this thread's output
+            with open(os.devnull, "w") as devnull, _thread_target(devnull):
+                yield
+        else:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                yield
+    finally:
+        _override.reset(token)